@@ -0,0 +1,135 @@
+"""
+Microbenchmarks for the Ctx variable store.
+
+Compares Ctx (PersistentMap with per-key JIT copy) against DictCtx, the
+dict-plus-variables_need_copy scheme Ctx used before, on scopes with hundreds
+of globals. Then times whole explorations of programs with that many globals.
+
+    python benchmarks/bench_Ctx.py
+"""
+
+import os
+import sys
+import time
+import logging
+import weakref
+from copy import copy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+logging.disable(logging.CRITICAL)
+
+from pySym import ast_parse
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyObjectManager.Ctx import Ctx
+
+
+class DictCtx:
+    """The old Ctx store, cut down to what the benchmark uses."""
+
+    __slots__ = ['ctx', 'variables', 'variables_need_copy', 'state', '__weakref__']
+
+    def __init__(self, ctx, variables=None):
+        self.ctx = ctx
+        self.state = None
+        self.variables = {} if variables is None else variables
+        self.variables_need_copy = {key: True for key in self.variables.keys()}
+
+    def copy(self):
+        self.variables_need_copy = {key: True for key in self.variables.keys()}
+        return DictCtx(ctx=self.ctx, variables=self.variables)
+
+    def __ensure_copy(self, key):
+        if not any(self.variables_need_copy[key] is False for key in self.variables_need_copy):
+            self.variables = {key: value for key, value in self.variables.items()}
+
+        if key not in self.variables_need_copy:
+            self.variables_need_copy[key] = True
+
+        elif self.variables_need_copy[key]:
+            self.variables[key] = copy(self.variables[key])
+            self.variables[key].state = self.state
+            self.variables[key].parent = weakref.proxy(self)
+            self.variables_need_copy[key] = False
+
+    def __getitem__(self, key):
+        self.__ensure_copy(key)
+        return self.variables[key]
+
+    def __setitem__(self, key, value):
+        self.__ensure_copy(key)
+        self.variables[key] = value
+        self.variables_need_copy[key] = True
+
+
+def _globals(n):
+    return "\n".join("g{0} = {0}".format(i) for i in range(n))
+
+
+def _fill(store, state, n):
+    """Fills store with the Ints of a State that assigned n globals."""
+    for i in range(n):
+        store["g{0}".format(i)] = state.getVar("g{0}".format(i))
+    return store
+
+
+def _time(func, repeat):
+    best = None
+    for _ in range(3):
+        start = time.time()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.time() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def micro(sizes=(100, 300, 1000), touched=4, repeat=200):
+    """Fork a scope of n globals and touch a few of them, like one step of a State does."""
+    print("Fork + touch {0} of n globals (us per fork)".format(touched))
+    print("{0:>6} {1:>10} {2:>10} {3:>8}".format("n", "DictCtx", "Ctx", "speedup"))
+
+    for n in sizes:
+        source = _globals(n)
+        pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+        pg.explore()
+        state = pg.completed[0].state
+
+        results = []
+        for store in (_fill(DictCtx(0), state, n), _fill(Ctx(0), state, n)):
+            store.state = state
+            names = ["g{0}".format(i) for i in range(0, n, max(1, n // touched))][:touched]
+
+            def fork(store=store, names=names):
+                child = store.copy()
+                child.state = state
+                for name in names:
+                    child[name]
+
+            results.append(_time(fork, repeat) * 1e6)
+
+        print("{0:>6} {1:>10.1f} {2:>10.1f} {3:>7.1f}x".format(n, results[0], results[1], results[0] / results[1]))
+
+
+def explore(sizes=(100, 300, 1000), forks=6):
+    """Explore the forking tail of a program that first binds n globals. Assigning them is left out,
+    since State.copy copies the statements still to run."""
+    print("\nexplore() after n globals, {0} forks (s)".format(forks))
+    print("{0:>6} {1:>10}".format("n", "time"))
+
+    for n in sizes:
+        source = _globals(n) + "\nx = pyState.Int()\nc = 0\nfor i in range({0}):\n    if x > i:\n        c += 1\n".format(forks)
+
+        pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+        pg.explore(find=n + 1)
+
+        start = time.time()
+        pg = PathGroup(pg.found[0])
+        pg.explore()
+        print("{0:>6} {1:>10.3f}".format(n, time.time() - start))
+
+
+if __name__ == "__main__":
+    micro()
+    explore()
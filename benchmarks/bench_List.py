@@ -0,0 +1,60 @@
+"""
+Benchmarks for List on the kind of bit lists the CRC in bkpctf/ works on.
+
+    python benchmarks/bench_List.py
+"""
+
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+logging.disable(logging.CRITICAL)
+
+from pySym import ast_parse
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+
+BITS = """
+def to_bits(length, N):
+    out = []
+    for i in range(length):
+        out.insert(0, pyState.BVV((N >> i) & 1,1))
+    return out
+
+POLY = to_bits({0}, 0x1eff67c77d13835f7)
+mesg = to_bits({0}, 0x1abaddeadbeef1dea)
+"""
+
+PROGRAMS = {
+    # For pops the front of the list it walks every iteration
+    "for": BITS + """
+c = 0
+for b in POLY:
+    c += 1
+""",
+    # Index and update every bit in place
+    "xor": BITS + """
+for i in range({0}):
+    mesg[i] ^= POLY[i]
+""",
+}
+
+
+def explore(sizes=(65, 260)):
+    print("{0:>6} {1:>6} {2:>10}".format("bits", "loop", "time (s)"))
+
+    for n in sizes:
+        for name, program in sorted(PROGRAMS.items()):
+            source = program.format(n)
+            start = time.time()
+            pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+            pg.explore()
+            assert len(pg.completed) == 1, pg
+            print("{0:>6} {1:>6} {2:>10.2f}".format(n, name, time.time() - start))
+
+
+if __name__ == "__main__":
+    explore()
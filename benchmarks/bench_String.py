@@ -0,0 +1,103 @@
+"""
+Benchmark of the "chars" and "seq" string search modes.
+
+Explores the programs of the existing String tests under both modes (see
+pySym.pyState.Seq), plus a few programs that lean on String.index and "in",
+and prints the time and number of completed/errored paths for each. Only
+those two operations differ between the modes, so most test programs
+should time about the same. Under "seq", String.index gives a symbolic Int,
+which programs that need a concrete one (range, zfill, str) can't take.
+
+    python benchmarks/bench_String.py
+"""
+
+import os
+import sys
+import time
+import glob
+import logging
+import importlib.util
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+logging.disable(logging.CRITICAL)
+
+from pySym import ast_parse, Config
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+
+EXTRA = {
+    "index_symbolic_20": """
+s = pyState.String(20)
+x = s.index("ab")
+""",
+    "in_symbolic_20": """
+s = pyState.String(20)
+x = 0
+if "abc" in s:
+    x = 1
+""",
+    "in_then_index_12": """
+s = pyState.String(12)
+x = -1
+if "pw" in s:
+    x = s.index("pw")
+""",
+}
+
+
+def _test_programs():
+    """Module level programs of tests/test_*String*.py, by "module:name". Format templates are left out."""
+    programs = {}
+
+    for filename in sorted(glob.glob(os.path.join(ROOT, "tests", "test_*String*.py"))):
+        name = os.path.splitext(os.path.basename(filename))[0]
+        spec = importlib.util.spec_from_file_location(name, filename)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        for var, value in sorted(vars(module).items()):
+            if type(value) is not str or "\n" not in value or "{" in value:
+                continue
+            programs["{0}:{1}".format(name, var)] = value
+
+    return programs
+
+
+def _run(source):
+    start = time.time()
+    try:
+        pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+        pg.explore()
+    except Exception as e:
+        return time.time() - start, type(e).__name__
+    return time.time() - start, "{0}/{1}".format(len(pg.completed), len(pg.errored))
+
+
+def main():
+    programs = _test_programs()
+    programs.update(EXTRA)
+
+    print("{0:<45} {1:>10} {2:>7} {3:>10} {4:>7}".format("program", "chars (s)", "c/e", "seq (s)", "c/e"))
+    totals = {mode: 0.0 for mode in ["chars", "seq"]}
+
+    try:
+        for name, source in programs.items():
+            row = []
+            for mode in ["chars", "seq"]:
+                Config.PYSYM_STRING_SEARCH = mode
+                elapsed, paths = _run(source)
+                totals[mode] += elapsed
+                row += [elapsed, paths]
+
+            print("{0:<45} {1:>10.3f} {2:>7} {3:>10.3f} {4:>7}".format(name, *row), flush=True)
+
+    finally:
+        Config.PYSYM_STRING_SEARCH = "chars"
+
+    print("{0:<45} {1:>10.3f} {2:>7} {3:>10.3f}".format("total", totals["chars"], "", totals["seq"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmarks for ObjectManager.getParent.
+
+Times parent lookups of a global and of a list element in a scope with n
+globals, then whole explorations of a loop of augmented assignments (which
+look up the parent of their target every time) after n globals.
+
+    python benchmarks/bench_getParent.py
+"""
+
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+logging.disable(logging.CRITICAL)
+
+from pySym import ast_parse
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+
+
+def _globals(n):
+    return "\n".join("g{0} = {0}".format(i) for i in range(n))
+
+
+def _time(func, repeat):
+    best = None
+    for _ in range(3):
+        start = time.time()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.time() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def micro(sizes=(100, 300, 1000), repeat=200):
+    """getParent of the last global and of an element of the last list, right after a fork."""
+    print("getParent after a fork (us per lookup)")
+    print("{0:>6} {1:>10} {2:>10}".format("n", "global", "element"))
+
+    for n in sizes:
+        source = _globals(n) + "\nl = [1, 2, 3, 4, 5, 6, 7, 8]\nz = 1\n"
+        pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+        pg.explore()
+        state = pg.completed[0].state
+
+        results = []
+        for name in ["z", "l"]:
+            def lookup(name=name):
+                s = state.copy()
+                var = s.getVar(name)
+                key = var[5] if name == "l" else var
+                s.objectManager.getParent(key)
+
+            results.append((_time(lookup, repeat) - _time(state.copy, repeat)) * 1e6)
+
+        print("{0:>6} {1:>10.1f} {2:>10.1f}".format(n, *results))
+
+
+def explore(sizes=(100, 300, 1000), iterations=32):
+    """Explore a loop of augmented assignments into a global and a list after n globals. Assigning them is left out."""
+    print("\nexplore() of {0} loop iterations after n globals (s)".format(iterations))
+    print("{0:>6} {1:>10}".format("n", "time"))
+
+    for n in sizes:
+        source = _globals(n) + "\nl = [0] * {0}\nc = 0\nfor i in range({0}):\n    l[i] += i\n    c += l[i]\n".format(iterations)
+
+        pg = PathGroup(Path(ast_parse.parse(source).body, source=source))
+        pg.explore(find=n + 1)
+
+        start = time.time()
+        pg = PathGroup(pg.found[0])
+        pg.explore()
+        assert pg.completed[0].state.any_int('c') == sum(range(iterations))
+        print("{0:>6} {1:>10.3f}".format(n, time.time() - start))
+
+
+if __name__ == "__main__":
+    micro()
+    explore()
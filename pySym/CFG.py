@@ -0,0 +1,187 @@
+"""
+Statement level control-flow graph of a script.
+
+Nodes are line numbers, since that's what State.lineno reports. Calls to
+functions defined in the script get an edge into the function, and the
+function's returns lead back to every line that calls it. That makes the
+graph an over-approximation: if a line can't reach another in the graph, no
+path starting there can.
+"""
+
+import ast
+import logging
+from collections import deque
+
+logger = logging.getLogger("CFG")
+
+
+class CFG:
+    """
+    Control-flow graph built from a parsed module body.
+    """
+
+    __slots__ = ['successors', 'functions', 'entry', '__calls', '__predecessors', '__distances', '__weakref__']
+
+    def __init__(self, body):
+        """
+        Args:
+            body (list): Statements of the module, as from ast.parse(source).body.
+        """
+        # node -> set of nodes. Nodes are line numbers, or ("exit", function name) for where a function returns from.
+        self.successors = {}
+        # function name -> line of its first statement
+        self.functions = {}
+        # (line, function name) for every call of a function defined in the script
+        self.__calls = []
+        self.__distances = {}
+
+        self.entry = self.__block(body, None, None, None)
+
+        for line, name in self.__calls:
+            if name in self.functions:
+                self.__edge(line, self.functions[name])
+                self.__edge(("exit", name), line)
+        del self.__calls
+
+        self.__predecessors = {}
+        for node, succs in self.successors.items():
+            for succ in succs:
+                self.__predecessors.setdefault(succ, set()).add(node)
+
+    @classmethod
+    def from_source(cls, source):
+        """CFG: Graph of a script's source code."""
+        return cls(ast.parse(source).body)
+
+    def __edge(self, src, dst):
+        self.successors.setdefault(src, set())
+        if dst is not None:
+            self.successors[src].add(dst)
+            self.successors.setdefault(dst, set())
+
+    def __block(self, stmts, after, loop, ret):
+        """Adds the statements of a block.
+
+        Args:
+            stmts (list): Statements of the block.
+            after: Node control goes to when the block runs off its end. None for the end of the program.
+            loop (tuple): (header, exit) nodes of the innermost loop, for break and continue.
+            ret: Node return statements go to. None outside functions.
+
+        Returns:
+            Node of the block's first statement, or after if it's empty.
+        """
+        node = after
+        for stmt in reversed(stmts):
+            node = self.__stmt(stmt, node, loop, ret)
+        return node
+
+    def __stmt(self, stmt, after, loop, ret):
+        line = stmt.lineno
+        self.successors.setdefault(line, set())
+
+        if type(stmt) is ast.If:
+            self.__calls_in(line, stmt.test)
+            self.__edge(line, self.__block(stmt.body, after, loop, ret))
+            self.__edge(line, self.__block(stmt.orelse, after, loop, ret))
+
+        elif type(stmt) in [ast.While, ast.For]:
+            self.__calls_in(line, stmt.test if type(stmt) is ast.While else stmt.iter)
+            done = self.__block(stmt.orelse, after, loop, ret)
+            self.__edge(line, self.__block(stmt.body, line, (line, done), ret))
+            self.__edge(line, done)
+
+        elif type(stmt) is ast.Break:
+            self.__edge(line, loop[1] if loop is not None else after)
+
+        elif type(stmt) is ast.Continue:
+            self.__edge(line, loop[0] if loop is not None else after)
+
+        elif type(stmt) is ast.Return:
+            if stmt.value is not None:
+                self.__calls_in(line, stmt.value)
+            self.__edge(line, ret)
+
+        elif type(stmt) is ast.FunctionDef:
+            exit = ("exit", stmt.name)
+            self.successors.setdefault(exit, set())
+            self.functions[stmt.name] = self.__block(stmt.body, exit, None, exit)
+            self.__edge(line, after)
+
+        # Anything else that holds blocks (with, try, class) may run any of them
+        elif any(hasattr(stmt, field) for field in ["body", "orelse", "finalbody", "handlers"]):
+            self.__edge(line, after)
+            for field in ["body", "orelse", "finalbody"]:
+                self.__edge(line, self.__block(getattr(stmt, field, []), after, loop, ret))
+            for handler in getattr(stmt, "handlers", []):
+                self.__edge(line, self.__block(handler.body, after, loop, ret))
+
+        else:
+            self.__calls_in(line, stmt)
+            self.__edge(line, after)
+
+        return line
+
+    def __calls_in(self, line, node):
+        for n in ast.walk(node):
+            if type(n) is ast.Call and type(n.func) is ast.Name:
+                self.__calls.append((line, n.func.id))
+
+    def distances(self, target, avoid=None):
+        """Statements it takes to get from each line to target.
+
+        Args:
+            target (int): Line to get to.
+            avoid (iterable, optional): Lines that may not be passed through.
+
+        Returns:
+            dict: line -> distance, for every line that can reach target. Computed once per target and avoid set.
+        """
+        avoid = frozenset() if avoid is None else frozenset(avoid)
+        key = (target, avoid)
+
+        dist = self.__distances.get(key)
+        if dist is not None:
+            return dist
+
+        dist = {}
+        if target in self.successors and target not in avoid:
+            dist[target] = 0
+
+        # 0-1 BFS backwards from the target. Function exits aren't statements, so they're free.
+        todo = deque(dist)
+        while todo:
+            node = todo.popleft()
+            for pred in self.__predecessors.get(node, ()):
+                if pred in avoid:
+                    continue
+
+                free = type(pred) is tuple
+                d = dist[node] + (0 if free else 1)
+
+                if d < dist.get(pred, d + 1):
+                    dist[pred] = d
+                    if free:
+                        todo.appendleft(pred)
+                    else:
+                        todo.append(pred)
+
+        dist = {node: d for node, d in dist.items() if type(node) is int}
+        self.__distances[key] = dist
+        return dist
+
+    def distance(self, line, target, avoid=None):
+        """int: Statements it takes to get from line to target. None if it can't."""
+        return self.distances(target, avoid).get(line)
+
+    def can_reach(self, line, target, avoid=None):
+        """bool: False only if no path at line can ever get to target. Lines not in the graph are assumed to."""
+        if line not in self.successors:
+            return True
+        return line in self.distances(target, avoid)
+
+    def __contains__(self, line):
+        return line in self.successors
+
+    def __len__(self):
+        return sum(1 for node in self.successors if type(node) is int)
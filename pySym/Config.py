@@ -1,3 +1,76 @@
 # This file will house generic PySym config settings
 
 PYSYM_MAX_SYM_LIST_SPLIT=256
+
+# Maximum number of solver queries remembered by a PathGroup's QueryCache
+PYSYM_QUERY_CACHE_SIZE=4096
+
+# Default number of processes a PathGroup steps paths in. 1 steps everything in this process.
+PYSYM_WORKERS=1
+
+# Default longest time in milliseconds a single solver query may take. None for no limit.
+PYSYM_QUERY_TIMEOUT=None
+
+# Default total solver time in milliseconds one path (including its parents) may use. None for no limit.
+PYSYM_PATH_SOLVER_BUDGET=None
+
+# Tactic chains a solver tries in order. Each entry is a tactic name or a list of them to run one after another.
+PYSYM_SOLVER_TACTICS=[
+    "smt",
+    ["simplify","propagate-ineqs","propagate-values","unit-subsume-simplify","smt","fail-if-undecided"],
+    ["simplify","propagate-ineqs","propagate-values","unit-subsume-simplify","qfnra-nlsat"],
+]
+
+# "tactic" to always use PYSYM_SOLVER_TACTICS. "logic" is opt-in, and picks a solver per query class from PYSYM_SOLVER_ROUTES.
+PYSYM_SOLVER_MODE="tactic"
+
+# Query class -> logic name for z3.SolverFor, list of tactic chains, or None for PYSYM_SOLVER_TACTICS
+PYSYM_SOLVER_ROUTES={
+    "bool": "QF_UF",
+    "bv": "QF_BV",
+    "lia": "QF_LIA",
+    "lra": "QF_LRA",
+    "nonlinear": None,
+    "mixed": None,
+}
+
+# Default state merging mode. None forks at every If, "always" merges straight-line If branches back together,
+# "qce" only merges when that doesn't make variables read by upcoming conditions symbolic. Only the two branches of one
+# If are ever merged. Paths at a While or For head, or paths that reach the same line on their own, are not merged with
+# each other (PathGroup's dedup option drops the covered ones instead). See pySym.pyState.Merge.
+PYSYM_MERGE=None
+
+# Most upcoming conditions a "qce" merge may make symbolic
+PYSYM_MERGE_QCE_THRESHOLD=0
+
+# Most steps either branch of an If may take before merging gives up and forks instead
+PYSYM_MERGE_MAX_STEPS=64
+
+# Default for PathGroup's lazy option. True only sat checks paths once they're picked to be stepped.
+PYSYM_LAZY_FEASIBILITY=False
+
+# Default for PathGroup's memory_budget. Most active paths kept in memory, the rest and every finished path are
+# spilled to disk. It's a count of paths, not of bytes. None keeps everything in memory. See pySym.Spill.
+PYSYM_MEMORY_BUDGET=None
+
+# Directory spilled paths are written to. None for the system's temporary directory.
+PYSYM_SPILL_DIR=None
+
+# Default seconds between the checkpoints PathGroup.explore saves, if the group has a checkpoint file
+PYSYM_CHECKPOINT_INTERVAL=600
+
+# Default for PathGroup's dedup option. True drops paths an active path at the same point already covers. See pySym.pyState.Fingerprint.
+PYSYM_DEDUP=False
+
+# Default for Project's profile option. True records where exploration spends its time into PathGroup.stats. See pySym.Profiler.
+PYSYM_PROFILE=False
+
+# Symbolic indexes into lists of all Int, all BitVec or all Char become one z3 Select (and Store, for assignments)
+# over an Array of the elements, instead of a solver check per index and state splitting. See pySym.pyState.Subscript.
+PYSYM_SYMBOLIC_LIST_ARRAYS=False
+
+# Default for Project's string_search option. Only substring searches (String.index and "in") use it. "chars" checks
+# them a Char at a time, "seq" turns each into a single z3 sequence constraint. "seq" only speeds up those searches, all
+# other String operations are modelled as Chars either way. Its String.index result is symbolic, and range(), zfill and
+# str() only take it once it has a single possible value. See pySym.pyState.Seq.
+PYSYM_STRING_SEARCH="chars"
@@ -0,0 +1,381 @@
+"""
+Exploration split across processes or machines.
+
+A Coordinator holds the frontier of serialized paths (see pySym.Serialize).
+Workers connect to it with multiprocessing.connection, pull a batch of
+paths, run a normal PathGroup on it a few steps at a time and push back
+whatever finished. While some workers are waiting for work, busy ones push
+half of their active paths back onto the frontier, so one exploding branch
+gets spread over everyone.
+
+The coordinator remembers the paths each worker is holding and holds on to
+what it sends back until it's done with them. If a worker is lost, what it
+sent back since then is dropped and its paths go back on the frontier.
+
+explore runs a coordinator and its workers on this machine. To use other
+machines, start the coordinator with an address they can reach and run
+"python -m pySym.Distributed HOST PORT" on each of them. The worker reads
+the coordinator's authkey, in hex, from the PYSYM_AUTHKEY environment
+variable, or from the first line of stdin if that isn't set. It never goes
+on the command line, where other users could see it in the process list.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import Listener, Client
+from . import Serialize
+from .pyPathGroup import PathGroup
+from .pyState import Merge
+
+logger = logging.getLogger("Distributed")
+
+# Environment variable the worker command line reads the authkey from, in hex
+AUTHKEY_ENV = "PYSYM_AUTHKEY"
+
+# Stashes workers stream back. Active paths only come back when they're given away.
+STASHES = ["completed", "errored", "deadended", "found", "unknown"]
+
+
+class Coordinator:
+    """
+    Hands out paths to Workers and collects what they finish.
+    """
+
+    __slots__ = ['find', 'ignore_groups', 'authkey', 'address', '__frontier', '__results', '__busy', '__waiting', '__done',
+                 '__outstanding', '__pending', '__lock', '__listener', '__weakref__']
+
+    def __init__(self, paths, address=None, authkey=None, find=None, ignore_groups=None):
+        """
+        Args:
+            paths (list): Paths to explore from.
+            address (tuple, optional): (host, port) to listen on. Defaults to any free port on localhost.
+            authkey (bytes, optional): Key workers have to present. Defaults to a random one.
+            find (int, optional): Line number to explore to. Everything stops once a path gets there.
+            ignore_groups (list, optional): Stashes workers shouldn't bother sending back. See PathGroup.
+        """
+        self.find = find
+        self.ignore_groups = [] if ignore_groups is None else list(ignore_groups)
+        self.authkey = os.urandom(16) if authkey is None else authkey
+
+        assert type(self.find) in [int, type(None)], "Invalid find of {}".format(self.find)
+        assert type(self.authkey) is bytes, "Invalid authkey type of {}".format(type(self.authkey))
+
+        self.__listener = Listener(("localhost", 0) if address is None else address, authkey=self.authkey)
+        self.address = self.__listener.address
+
+        # Serialized lists of paths waiting for a worker
+        self.__frontier = deque(Serialize.dumps([path]) for path in paths)
+        # stash name -> serialized lists of paths
+        self.__results = {stash: [] for stash in STASHES}
+        # Connections of workers that are holding paths, and of those waiting for some
+        self.__busy = set()
+        self.__waiting = set()
+        # Connection -> serialized paths the worker is holding, and results it sent back since it got them
+        self.__outstanding = {}
+        self.__pending = {}
+        self.__done = False
+        self.__lock = threading.Condition()
+
+    def serve(self):
+        """Hands out work until every path is finished, or one got to find.
+
+        Returns:
+            PathGroup: Every path workers sent back, in their stashes. Paths still on the frontier are in active.
+        """
+        threading.Thread(target=self.__accept, daemon=True).start()
+
+        with self.__lock:
+            while not self.__done:
+                self.__lock.wait()
+
+            # Stopped early by find. Keep what busy workers got so far.
+            for conn in list(self.__pending):
+                self.__commit(conn)
+
+        # Wake the accept thread so it sees we're done
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+        pg = PathGroup()
+
+        for stash, batches in list(self.__results.items()) + [("active", self.__frontier)]:
+            for data in batches:
+                for path in Serialize.loads(data):
+                    pg.unstash(path=path, to_stash=stash)
+
+        return pg
+
+    def close(self):
+        """Stops listening for workers. Processes forked from the coordinator's should call this on their copy,
+        otherwise the socket stays open in them after serve is done."""
+        self.__listener.close()
+
+    def __accept(self):
+        while True:
+            try:
+                conn = self.__listener.accept()
+            except Exception as e:
+                logger.warning("Refused a connection: {0}".format(e))
+                continue
+
+            if self.__done:
+                conn.close()
+                self.close()
+                return
+
+            threading.Thread(target=self.__handle, args=(conn,), daemon=True).start()
+
+    def __handle(self, conn):
+        try:
+            conn.send(("config", self.find, self.ignore_groups))
+
+            while True:
+                reply = self.__message(conn, conn.recv())
+                conn.send(reply)
+                if reply[0] == "done":
+                    break
+
+        except (EOFError, OSError):
+            with self.__lock:
+                if conn in self.__busy:
+                    logger.warning("Lost a worker that was still holding paths. Putting them back on the frontier.")
+                    self.__pending.pop(conn, None)
+                    self.__frontier.append(self.__outstanding.pop(conn))
+                self.__busy.discard(conn)
+                self.__waiting.discard(conn)
+                self.__check_done()
+
+        finally:
+            conn.close()
+
+    def __message(self, conn, msg):
+        """Handles one worker request and returns the reply.
+
+        Requests are ("pull",) for more work, or ("push", results, given away, kept, idle) to report progress.
+        kept is what the worker still holds after giving paths away, None if it didn't.
+        Replies are ("paths", data), ("wait",), ("ok", number of waiting workers) or ("done",).
+        """
+        with self.__lock:
+            if msg[0] == "pull":
+                if self.__done:
+                    return ("done",)
+
+                if len(self.__frontier) > 0:
+                    self.__waiting.discard(conn)
+                    self.__busy.add(conn)
+                    data = self.__frontier.popleft()
+                    self.__outstanding[conn] = data
+                    self.__pending[conn] = {stash: [] for stash in STASHES}
+                    return ("paths", data)
+
+                self.__waiting.add(conn)
+                self.__check_done()
+                return ("done",) if self.__done else ("wait",)
+
+            if msg[0] == "push":
+                _, results, given, kept, idle = msg
+
+                for stash, data in results.items():
+                    self.__pending[conn][stash].append(data)
+
+                # What it gave away is someone else's now. Its results so far go with the paths it started from.
+                if given is not None:
+                    self.__frontier.append(given)
+                    self.__outstanding[conn] = kept
+                    self.__commit(conn)
+
+                if idle:
+                    self.__commit(conn)
+                    del self.__pending[conn]
+                    del self.__outstanding[conn]
+                    self.__busy.discard(conn)
+
+                if self.find is not None and "found" in results:
+                    self.__finish()
+
+                self.__check_done()
+                return ("done",) if self.__done else ("ok", len(self.__waiting))
+
+            err = "Unknown request {0}".format(msg[0])
+            logger.error(err)
+            raise Exception(err)
+
+    def __commit(self, conn):
+        """Moves the results conn sent back into the ones we keep."""
+        for stash, batches in self.__pending[conn].items():
+            self.__results[stash] += batches
+            del batches[:]
+
+    def __check_done(self):
+        if len(self.__frontier) == 0 and len(self.__busy) == 0:
+            self.__finish()
+
+    def __finish(self):
+        self.__done = True
+        self.__lock.notify_all()
+
+
+class Worker:
+    """
+    Explores paths handed out by a Coordinator.
+    """
+
+    __slots__ = ['address', 'authkey', 'steps', '__weakref__']
+
+    def __init__(self, address, authkey, steps=None):
+        """
+        Args:
+            address (tuple): (host, port) of the coordinator.
+            authkey (bytes): The coordinator's authkey.
+            steps (int, optional): Steps to run between reports to the coordinator. Defaults to 10.
+        """
+        self.address = address
+        self.authkey = authkey
+        self.steps = 10 if steps is None else steps
+
+        assert type(self.steps) is int and self.steps > 0, "Invalid steps of {}".format(self.steps)
+
+    def run(self):
+        """Pulls and explores paths until the coordinator says it's done."""
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+        except OSError as e:
+            # Late workers find the coordinator already done
+            logger.warning("Couldn't reach the coordinator: {0}".format(e))
+            return
+
+        try:
+            _, find, ignore_groups = conn.recv()
+
+            while True:
+                conn.send(("pull",))
+                reply = conn.recv()
+
+                if reply[0] == "done":
+                    return
+
+                if reply[0] == "wait":
+                    time.sleep(0.05)
+                    continue
+
+                pg = PathGroup(ignore_groups=ignore_groups)
+                for path in Serialize.loads(reply[1]):
+                    pg.unstash(path=path, to_stash="active")
+
+                with Merge.stop_at([find]):
+                    if not self.__explore(conn, pg, find):
+                        return
+
+        except (EOFError, OSError):
+            logger.warning("Lost the coordinator")
+
+        finally:
+            conn.close()
+
+    def __explore(self, conn, pg, find):
+        """Runs pg until it has no active paths. Returns False if the coordinator is done."""
+        waiting = 0
+
+        while True:
+            for _ in range(self.steps):
+                if len(pg.active) == 0:
+                    break
+
+                pg.step()
+
+                if find is not None:
+                    for path in [path for path in pg.active if path.lineno() == find]:
+                        pg.unstash(path=path, from_stash="active", to_stash="found")
+
+            # Give half our paths away if others have nothing to do
+            given = kept = None
+            if waiting > 0 and len(pg.active) > 1:
+                half = len(pg.active) // 2
+                away = pg.active[half:]
+                given = Serialize.dumps(away)
+                for path in away:
+                    pg.unstash(path=path, from_stash="active")
+                kept = Serialize.dumps(pg.active)
+
+            results = {}
+            for stash in STASHES:
+                paths = getattr(pg, stash)
+                if len(paths) > 0:
+                    results[stash] = Serialize.dumps(paths)
+                    setattr(pg, stash, [])
+
+            idle = len(pg.active) == 0
+            conn.send(("push", results, given, kept, idle))
+            reply = conn.recv()
+
+            if reply[0] == "done":
+                return False
+
+            if idle:
+                return True
+
+            waiting = reply[1]
+
+
+def _run_worker(coordinator, steps):
+    coordinator.close()
+    Worker(coordinator.address, coordinator.authkey, steps=steps).run()
+
+
+def explore(path, workers=2, find=None, ignore_groups=None, steps=None):
+    """Explores path with a coordinator and worker processes on this machine.
+
+    Args:
+        path (pySym.pyPath.Path): Path to start from.
+        workers (int, optional): Number of worker processes. Defaults to 2.
+        find (int, optional): Line number to explore to.
+        ignore_groups (list, optional): Stashes not to keep. See PathGroup.
+        steps (int, optional): Steps workers run between reports. See Worker.
+
+    Returns:
+        PathGroup: The explored paths.
+    """
+    coordinator = Coordinator([path], find=find, ignore_groups=ignore_groups)
+
+    processes = [Process(target=_run_worker, args=(coordinator, steps), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    pg = coordinator.serve()
+
+    for process in processes:
+        process.join()
+
+    return pg
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Explore paths handed out by a pySym Coordinator.",
+                                     epilog="The coordinator authkey is read in hex from ${0}, or from the first line of stdin if that isn't set.".format(AUTHKEY_ENV))
+    parser.add_argument("host", help="Coordinator host.")
+    parser.add_argument("port", type=int, help="Coordinator port.")
+    parser.add_argument("--steps", type=int, default=None, help="Steps to run between reports.")
+    args = parser.parse_args()
+
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if authkey is None:
+        authkey = sys.stdin.readline()
+
+    try:
+        authkey = bytes.fromhex(authkey.strip())
+    except ValueError:
+        parser.error("authkey isn't valid hex")
+
+    if len(authkey) == 0:
+        parser.error("no authkey given in ${0} or on stdin".format(AUTHKEY_ENV))
+
+    Worker((args.host, args.port), authkey, steps=args.steps).run()
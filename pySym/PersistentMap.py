@@ -0,0 +1,275 @@
+"""
+Immutable hash array mapped trie (HAMT).
+
+Updates return a new map that shares everything but the path to the changed
+entry with the old one, so copying is free and a set or delete costs
+O(log32 n) new nodes.
+"""
+
+import logging
+logger = logging.getLogger("PersistentMap")
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+def _hash(key):
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+def _popcount(x):
+    return bin(x).count('1')
+
+
+class _Node:
+    """Interior node. array holds, in bit order, (hash, key, value) leaves and child nodes."""
+
+    __slots__ = ['bitmap', 'array']
+
+    def __init__(self, bitmap, array):
+        self.bitmap = bitmap
+        self.array = array
+
+
+class _Collision:
+    """Keys whose full hashes are equal."""
+
+    __slots__ = ['hash', 'pairs']
+
+    def __init__(self, hash, pairs):
+        self.hash = hash
+        self.pairs = pairs
+
+
+_EMPTY = _Node(0, ())
+
+
+def _merge(shift, a, b):
+    """Builds the smallest subtree holding leaves a and b."""
+    if shift >= _HASH_BITS:
+        return _Collision(a[0], ((a[1], a[2]), (b[1], b[2])))
+
+    ia = (a[0] >> shift) & _MASK
+    ib = (b[0] >> shift) & _MASK
+
+    if ia == ib:
+        return _Node(1 << ia, (_merge(shift + _BITS, a, b),))
+
+    if ia < ib:
+        return _Node((1 << ia) | (1 << ib), (a, b))
+
+    return _Node((1 << ia) | (1 << ib), (b, a))
+
+
+def _set(node, shift, h, key, value):
+    """Returns (new node, True if key was added). Returns node itself if nothing changed."""
+
+    if type(node) is _Collision:
+        for i, (k, v) in enumerate(node.pairs):
+            if k == key:
+                if v is value:
+                    return node, False
+                return _Collision(h, node.pairs[:i] + ((key, value),) + node.pairs[i+1:]), False
+        return _Collision(h, node.pairs + ((key, value),)), True
+
+    bit = 1 << ((h >> shift) & _MASK)
+    i = _popcount(node.bitmap & (bit - 1))
+
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, node.array[:i] + ((h, key, value),) + node.array[i:]), True
+
+    entry = node.array[i]
+
+    if type(entry) is tuple:
+        if entry[0] == h and entry[1] == key:
+            if entry[2] is value:
+                return node, False
+            new = (h, key, value)
+            added = False
+        else:
+            new = _merge(shift + _BITS, entry, (h, key, value))
+            added = True
+
+    else:
+        new, added = _set(entry, shift + _BITS, h, key, value)
+        if new is entry:
+            return node, False
+
+    return _Node(node.bitmap, node.array[:i] + (new,) + node.array[i+1:]), added
+
+
+def _delete(node, shift, h, key):
+    """Returns the node without key. Returns node itself if key is not there,
+    None if the node is now empty, or a leaf tuple if only one is left below the root."""
+
+    if type(node) is _Collision:
+        pairs = tuple(pair for pair in node.pairs if pair[0] != key)
+        if len(pairs) == len(node.pairs):
+            return node
+        if len(pairs) == 1:
+            return (h, pairs[0][0], pairs[0][1])
+        return _Collision(h, pairs)
+
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+
+    i = _popcount(node.bitmap & (bit - 1))
+    entry = node.array[i]
+
+    if type(entry) is tuple:
+        if entry[0] != h or entry[1] != key:
+            return node
+        new = None
+
+    else:
+        new = _delete(entry, shift + _BITS, h, key)
+        if new is entry:
+            return node
+
+    if new is None:
+        bitmap = node.bitmap & ~bit
+        array = node.array[:i] + node.array[i+1:]
+    else:
+        bitmap = node.bitmap
+        array = node.array[:i] + (new,) + node.array[i+1:]
+
+    if len(array) == 0:
+        return None if shift > 0 else _EMPTY
+
+    # Pull lone leaves up so lookups stay short
+    if len(array) == 1 and type(array[0]) is tuple and shift > 0:
+        return array[0]
+
+    return _Node(bitmap, array)
+
+
+def _items(node):
+    if type(node) is _Collision:
+        yield from node.pairs
+        return
+
+    for entry in node.array:
+        if type(entry) is tuple:
+            yield entry[1], entry[2]
+        else:
+            yield from _items(entry)
+
+
+class PersistentMap:
+    """
+    Immutable mapping. set, delete and update return new maps and leave this one alone.
+    """
+
+    __slots__ = ['__root', '__len', '__weakref__']
+
+    def __init__(self, mapping=None):
+        """
+        Args:
+            mapping (dict, optional): Initial contents.
+        """
+        self.__root = _EMPTY
+        self.__len = 0
+
+        if mapping is not None:
+            for key, value in mapping.items():
+                self.__root, added = _set(self.__root, 0, _hash(key), key, value)
+                self.__len += added
+
+    @classmethod
+    def _from_root(cls, root, length):
+        new = cls.__new__(cls)
+        new.__root = root
+        new.__len = length
+        return new
+
+    def get(self, key, default=None):
+        """Returns the value for key, or default if it isn't in the map."""
+        h = _hash(key)
+        node = self.__root
+        shift = 0
+
+        while True:
+            if type(node) is _Collision:
+                for k, v in node.pairs:
+                    if k == key:
+                        return v
+                return default
+
+            bit = 1 << ((h >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return default
+
+            node = node.array[_popcount(node.bitmap & (bit - 1))]
+
+            if type(node) is tuple:
+                return node[2] if node[0] == h and node[1] == key else default
+
+            shift += _BITS
+
+    def set(self, key, value):
+        """PersistentMap: Copy of this map with key bound to value."""
+        root, added = _set(self.__root, 0, _hash(key), key, value)
+        if root is self.__root:
+            return self
+        return PersistentMap._from_root(root, self.__len + added)
+
+    def delete(self, key):
+        """PersistentMap: Copy of this map without key. Missing keys are ignored."""
+        root = _delete(self.__root, 0, _hash(key), key)
+        if root is self.__root:
+            return self
+        return PersistentMap._from_root(root, self.__len - 1)
+
+    def update(self, mapping):
+        """PersistentMap: Copy of this map with every binding in mapping (dict or PersistentMap) applied."""
+        root = self.__root
+        length = self.__len
+
+        for key, value in mapping.items():
+            root, added = _set(root, 0, _hash(key), key, value)
+            length += added
+
+        if root is self.__root:
+            return self
+        return PersistentMap._from_root(root, length)
+
+    def items(self):
+        """Iterator of (key, value) pairs, in no particular order."""
+        return _items(self.__root)
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def __getitem__(self, key):
+        sentinel = _EMPTY
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _EMPTY) is not _EMPTY
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self.__len
+
+    def __copy__(self):
+        return self
+
+    def __reduce__(self):
+        # Hashes of some keys (str) change between processes, so rebuild rather than pickle the trie
+        return (PersistentMap, (dict(self.items()),))
+
+    def __str__(self):
+        return "PersistentMap({" + ", ".join("{!r}: {!r}".format(key, value) for key, value in self.items()) + "})"
+
+    def __repr__(self):
+        return self.__str__()
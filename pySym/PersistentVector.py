@@ -0,0 +1,184 @@
+"""
+Immutable vector, stored as a 32-way trie of tuples.
+
+Like PersistentMap, updates return a new vector that shares everything but
+the path to the changed slot with the old one. Indexing, set, append and
+removing the first or last element cost O(log32 n). The first element is
+removed by moving a start offset, so the vector works as a queue. Inserting
+or deleting anywhere else rebuilds it in O(n).
+"""
+
+import logging
+logger = logging.getLogger("PersistentVector")
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+
+def _build(items):
+    """Returns (root, shift) of a trie holding items in its first len(items) slots."""
+    nodes = [tuple(items[i:i + _WIDTH]) for i in range(0, len(items), _WIDTH)] or [()]
+    shift = 0
+
+    while len(nodes) > 1:
+        nodes = [tuple(nodes[i:i + _WIDTH]) for i in range(0, len(nodes), _WIDTH)]
+        shift += _BITS
+
+    return nodes[0], shift
+
+
+def _set(node, shift, i, value):
+    """Returns node with slot i set to value. Missing nodes on the way are created."""
+    slot = (i >> shift) & _MASK
+
+    if shift == 0:
+        child = value
+    else:
+        child = _set(node[slot] if slot < len(node) else (), shift - _BITS, i, value)
+
+    if slot < len(node):
+        return node[:slot] + (child,) + node[slot + 1:]
+
+    # Appending. Slots are filled in order, so this is the next one.
+    return node + (child,)
+
+
+def _leaves(node, shift):
+    if shift == 0:
+        yield node
+        return
+
+    for child in node:
+        yield from _leaves(child, shift - _BITS)
+
+
+class PersistentVector:
+    """
+    Immutable sequence. set, append, insert and delete return new vectors and leave this one alone.
+    """
+
+    __slots__ = ['__root', '__shift', '__start', '__end', '__weakref__']
+
+    def __init__(self, items=None):
+        """
+        Args:
+            items (iterable, optional): Initial contents.
+        """
+        items = [] if items is None else list(items)
+        self.__root, self.__shift = _build(items)
+        self.__start = 0
+        self.__end = len(items)
+
+    @classmethod
+    def _from_root(cls, root, shift, start, end):
+        new = cls.__new__(cls)
+        new.__root = root
+        new.__shift = shift
+        new.__start = start
+        new.__end = end
+        return new
+
+    def __slot(self, index):
+        """Trie slot of index. Negative indexes count from the end, like list."""
+        length = self.__end - self.__start
+
+        if index < 0:
+            index += length
+
+        if index < 0 or index >= length:
+            raise IndexError("PersistentVector index out of range")
+
+        return index + self.__start
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return list(self)[index]
+
+        i = self.__slot(index)
+        node = self.__root
+        shift = self.__shift
+
+        while shift > 0:
+            node = node[(i >> shift) & _MASK]
+            shift -= _BITS
+
+        return node[i & _MASK]
+
+    def set(self, index, value):
+        """PersistentVector: Copy of this vector with value at index."""
+        i = self.__slot(index)
+        return PersistentVector._from_root(_set(self.__root, self.__shift, i, value), self.__shift, self.__start, self.__end)
+
+    def append(self, value):
+        """PersistentVector: Copy of this vector with value added to the end."""
+        root, shift, i = self.__root, self.__shift, self.__end
+
+        # Out of room. Grow a level.
+        if i >> shift >= _WIDTH:
+            root = (root,)
+            shift += _BITS
+
+        return PersistentVector._from_root(_set(root, shift, i, value), shift, self.__start, i + 1)
+
+    def insert(self, index, value):
+        """PersistentVector: Copy of this vector with value inserted before index, like list.insert."""
+        length = len(self)
+        index = max(0, min(length, index + length if index < 0 else index))
+
+        if index == length:
+            return self.append(value)
+
+        # Reuse the slot in front of a popped start
+        if index == 0 and self.__start > 0:
+            start = self.__start - 1
+            return PersistentVector._from_root(_set(self.__root, self.__shift, start, value), self.__shift, start, self.__end)
+
+        items = list(self)
+        items.insert(index, value)
+        return PersistentVector(items)
+
+    def delete(self, index):
+        """PersistentVector: Copy of this vector without the element at index."""
+        i = self.__slot(index)
+
+        if i == self.__start:
+            start = i + 1
+            # Most of the trie is dead slots. Let them go.
+            if start >= _WIDTH and start > self.__end - start:
+                return PersistentVector(self[1:])
+            # Drop the reference so the element can be collected
+            return PersistentVector._from_root(_set(self.__root, self.__shift, i, None), self.__shift, start, self.__end)
+
+        if i == self.__end - 1:
+            return PersistentVector._from_root(_set(self.__root, self.__shift, i, None), self.__shift, self.__start, i)
+
+        items = list(self)
+        del items[i - self.__start]
+        return PersistentVector(items)
+
+    def __iter__(self):
+        start, end = self.__start, self.__end
+        i = 0
+
+        for leaf in _leaves(self.__root, self.__shift):
+            if i + len(leaf) > start:
+                yield from leaf[max(0, start - i):end - i]
+            i += len(leaf)
+            if i >= end:
+                return
+
+    def __len__(self):
+        return self.__end - self.__start
+
+    def __copy__(self):
+        return self
+
+    def __reduce__(self):
+        return (PersistentVector, (list(self),))
+
+    def __str__(self):
+        return "PersistentVector([" + ", ".join("{!r}".format(value) for value in self) + "])"
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,150 @@
+"""
+Where exploration spends its time.
+
+With profiling on (see Project.profile), PathGroup.step records wall time and
+call counts into the group's Profiler, available as PathGroup.stats, under
+these categories:
+
+    - handler: AST handlers, by node type. Statements from State.step and
+      expressions from State.resolveObject.
+    - line: Steps, by the source line being run.
+    - simFunction: simFunctions, by name (e.g. "String.index").
+    - query: z3 checks, by query class. See pySym.pyState.SolverFactory.
+    - copy: State.copy.
+
+Times are inclusive. A handler's time includes the handlers it calls, and a
+line's time includes everything its step did, so entries within a category
+can add up to more than the total.
+
+Instrumented code only looks at the module level current Profiler, which is
+None unless a PathGroup with profiling on is stepping. That check is all
+profiling costs when it's off.
+"""
+
+import json
+import time
+import logging
+from contextlib import contextmanager
+from prettytable import PrettyTable
+
+logger = logging.getLogger("Profiler")
+
+CATEGORIES = ["handler", "line", "simFunction", "query", "copy"]
+
+# Profiler being recorded into, or None
+current = None
+
+
+@contextmanager
+def recording(profiler):
+    """Context in which instrumented code records into profiler. None records nothing."""
+    global current
+    old = current
+    current = profiler
+    try:
+        yield profiler
+    finally:
+        current = old
+
+
+def call(category, key, func, *args, **kwargs):
+    """Calls func with the given arguments, recording it under category and key if profiling is on. Returns what func returns."""
+    profiler = current
+    if profiler is None:
+        return func(*args, **kwargs)
+
+    start = time.time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.record(category, key, time.time() - start)
+
+
+class Profiler:
+    """
+    Call counts and wall time per category and key.
+    """
+
+    __slots__ = ['stats', '__weakref__']
+
+    def __init__(self):
+        # category -> key -> [calls, seconds]
+        self.stats = {category: {} for category in CATEGORIES}
+
+    def record(self, category, key, seconds):
+        """Adds one call that took seconds.
+
+        Args:
+            category (str): One of CATEGORIES.
+            key: What was called, such as a handler name or line number.
+            seconds (float): Wall time it took.
+        """
+        entries = self.stats[category]
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def merge(self, other):
+        """Adds everything other recorded to this Profiler. Used for stats from worker processes.
+
+        Args:
+            other (dict): stats of another Profiler.
+        """
+        for category, entries in other.items():
+            mine = self.stats[category]
+            for key, (calls, seconds) in entries.items():
+                entry = mine.get(key)
+                if entry is None:
+                    entry = mine[key] = [0, 0.0]
+                entry[0] += calls
+                entry[1] += seconds
+
+    def reset(self):
+        """Forgets everything recorded so far."""
+        self.stats = {category: {} for category in CATEGORIES}
+
+    def table(self, category, limit=None):
+        """Entries of one category, most time first.
+
+        Args:
+            category (str): One of CATEGORIES.
+            limit (int, optional): Most rows to show. Defaults to all of them.
+
+        Returns:
+            PrettyTable: Calls, total and average time per key.
+        """
+        assert category in CATEGORIES, "Invalid category of {}".format(category)
+
+        table = PrettyTable(field_names=[category, "calls", "time (s)", "avg (ms)"])
+        table.align = 'l'
+
+        rows = sorted(self.stats[category].items(), key=lambda item: -item[1][1])
+        for key, (calls, seconds) in rows[:limit]:
+            table.add_row([key, calls, "{0:.3f}".format(seconds), "{0:.3f}".format(seconds * 1000 / calls)])
+
+        return table
+
+    def to_json(self):
+        """str: Everything recorded, as {category: {key: {"calls": int, "time": seconds}}}. Line numbers become strings."""
+        return json.dumps({
+            category: {str(key): {"calls": calls, "time": seconds} for key, (calls, seconds) in entries.items()}
+            for category, entries in self.stats.items()}, indent=2, sort_keys=True)
+
+    def dump(self, filename):
+        """Writes to_json to filename."""
+        with open(filename, "w") as f:
+            f.write(self.to_json())
+
+    def __getstate__(self):
+        return {'stats': self.stats}
+
+    def __setstate__(self, state):
+        self.stats = state['stats']
+
+    def __str__(self):
+        return "\n".join("{0}\n{1}".format(category, self.table(category)) for category in CATEGORIES if len(self.stats[category]) > 0)
+
+    def __repr__(self):
+        return "<Profiler {0}>".format(", ".join("{0} {1}".format(len(self.stats[category]), category) for category in CATEGORIES))
@@ -5,13 +5,28 @@ from . import Colorer
 import enforce
 import os
 import types
+from . import Config
 
 #@enforce.runtime_validation
 class Project:
 
-    __slots__ = ['__file_name', '__factory', '__weakref__', '__hooks']
+    __slots__ = ['__file_name', '__factory', '__weakref__', '__hooks', '__query_timeout', '__path_solver_budget', '__solver_factory', '__merge', '__profile', '__string_search']
 
-    def __init__(self, file, debug=False):
+    def __init__(self, file, debug=False, query_timeout=None, path_solver_budget=None, solver_mode=None, tactics=None, merge=None, profile=None, string_search=None):
+        """
+        Args:
+            file (str): Python file to symbolically execute.
+            debug (bool, optional): Turn on debug logging.
+            query_timeout (int, optional): Longest a single solver query may run, in milliseconds. Defaults to Config.PYSYM_QUERY_TIMEOUT.
+            path_solver_budget (int, optional): Total solver time a path may use, in milliseconds. Defaults to Config.PYSYM_PATH_SOLVER_BUDGET.
+            solver_mode (str, optional): "tactic" or "logic". See SolverFactory. Defaults to Config.PYSYM_SOLVER_MODE.
+            tactics (list, optional): Tactic chains for the solver to try in order. Defaults to Config.PYSYM_SOLVER_TACTICS.
+            merge (str, optional): State merging mode, "always" or "qce". See pySym.pyState.Merge. Defaults to Config.PYSYM_MERGE.
+            profile (bool, optional): Record where exploration spends its time into PathGroup.stats. See pySym.Profiler. Defaults to Config.PYSYM_PROFILE.
+            string_search (str, optional): "chars" or "seq". How String.index and "in" are handed to z3. See pySym.pyState.Seq. Defaults to Config.PYSYM_STRING_SEARCH.
+
+        Paths that hit either limit, or whose queries z3 can't decide, end up in the PathGroup's unknown stash.
+        """
     
         if debug:
             logging.basicConfig(level=logging.DEBUG)
@@ -19,6 +34,12 @@ class Project:
         self.file_name = file
         self.factory = Factory(self)
         self._hooks = {}
+        self.query_timeout = Config.PYSYM_QUERY_TIMEOUT if query_timeout is None else query_timeout
+        self.path_solver_budget = Config.PYSYM_PATH_SOLVER_BUDGET if path_solver_budget is None else path_solver_budget
+        self.solver_factory = SolverFactory(tactics=tactics, mode=solver_mode)
+        self.merge = Config.PYSYM_MERGE if merge is None else merge
+        self.profile = Config.PYSYM_PROFILE if profile is None else profile
+        self.string_search = Config.PYSYM_STRING_SEARCH if string_search is None else string_search
 
     def hook(self, address, callback):
         """Registers pySym to hook address and call the callback when hit.
@@ -54,6 +75,69 @@ class Project:
         assert isinstance(hooks, dict), "Unexpected type for hooks of {}".format(type(hooks))
         self.__hooks = hooks
 
+    @property
+    def query_timeout(self):
+        """int: Longest a single solver query may run, in milliseconds. None for no limit."""
+        return self.__query_timeout
+
+    @query_timeout.setter
+    def query_timeout(self, query_timeout):
+        assert query_timeout is None or (type(query_timeout) is int and query_timeout > 0), "Invalid query_timeout of {}".format(query_timeout)
+        self.__query_timeout = query_timeout
+
+    @property
+    def path_solver_budget(self):
+        """int: Total solver time a path may use, in milliseconds. None for no limit."""
+        return self.__path_solver_budget
+
+    @path_solver_budget.setter
+    def path_solver_budget(self, path_solver_budget):
+        assert path_solver_budget is None or (type(path_solver_budget) is int and path_solver_budget > 0), "Invalid path_solver_budget of {}".format(path_solver_budget)
+        self.__path_solver_budget = path_solver_budget
+
+    @property
+    def merge(self):
+        """str: State merging mode. None to always fork. Only the branches of an If are merged, not loop heads or
+        separate paths. See pySym.pyState.Merge."""
+        return self.__merge
+
+    @merge.setter
+    def merge(self, merge):
+        assert merge in Merge.MODES, "Invalid merge mode of {}".format(merge)
+        self.__merge = merge
+
+    @property
+    def profile(self):
+        """bool: Whether PathGroups of this project record where they spend their time. See pySym.Profiler."""
+        return self.__profile
+
+    @profile.setter
+    def profile(self, profile):
+        assert type(profile) is bool, "Invalid profile of {}".format(profile)
+        self.__profile = profile
+
+    @property
+    def string_search(self):
+        """str: How String.index and "in" are handed to z3, "chars" or "seq". "seq" is only a search accelerator, other String
+        operations are modelled as Chars under both. Its String.index result is symbolic, so range(), zfill and str() raise
+        on it unless it has a single possible value. See pySym.pyState.Seq."""
+        return self.__string_search
+
+    @string_search.setter
+    def string_search(self, string_search):
+        assert string_search in Seq.MODES, "Invalid string_search of {}".format(string_search)
+        self.__string_search = string_search
+
+    @property
+    def solver_factory(self):
+        """pySym.pyState.SolverFactory.SolverFactory: Builds the z3 solvers for every State in this project."""
+        return self.__solver_factory
+
+    @solver_factory.setter
+    def solver_factory(self, solver_factory):
+        assert isinstance(solver_factory, SolverFactory), "Unexpected solver_factory type of {}".format(type(solver_factory))
+        self.__solver_factory = solver_factory
+
     @property
     def factory(self):
         return self.__factory
@@ -78,3 +162,6 @@ class Project:
         self.__file_name = file_name
 
 from .Factory import Factory
+from .pyState.SolverFactory import SolverFactory
+from .pyState import Merge
+from .pyState import Seq
@@ -0,0 +1,322 @@
+"""
+Pickling for Paths, States and anything else that holds z3 expressions.
+
+Plain pickle can't handle z3 objects, or the weakrefs objects keep back to
+their State. dumps writes every z3 expression it reaches into one SMT-LIB2
+script and drops weakrefs. loads parses the script back in this process's
+z3 context, and States re-attach their objects as they are loaded.
+
+Constraint trails go in a flat table instead of as nested objects, so deep
+trails don't hit the recursion limit and trails that share a prefix still
+share it after loading.
+
+Script source code is written once, and the AST nodes a State holds from it
+are written as their index in the parsed script. Nodes pySym changed (For
+loops keep their iterator in the node, calls get swapped for their return
+values) go in as the index plus the fields that differ. Loading parses the
+source again, once per process, so States loaded in one process share their
+AST nodes like States forked from each other do.
+"""
+
+import io
+import ast
+import z3
+import pickle
+import copyreg
+import logging
+import weakref
+from .pyState.ConstraintTrail import ConstraintTrail
+
+logger = logging.getLogger("Serialize")
+
+_WEAKREFS = (weakref.ReferenceType, weakref.ProxyType, weakref.CallableProxyType)
+
+
+def _to_smt2(exprs):
+    """Writes expressions as SMT-LIB2 assertions, in order. Non-boolean ones are asserted as e == e.
+
+    Printed straight from the ASTs. Asserting them into a solver first is an order of magnitude slower.
+    """
+    asts = [(e if z3.is_bool(e) else e == e).as_ast() for e in exprs]
+    ctx = z3.main_ctx() if len(exprs) == 0 else exprs[0].ctx
+
+    # Every expression goes in as an assumption. The formula is true, which isn't printed.
+    return z3.Z3_benchmark_to_smtlib_string(ctx.ref(), "", "", "unknown", "", len(asts), (z3.Ast * len(asts))(*asts), z3.BoolVal(True, ctx).as_ast())
+
+
+def _from_smt2(smt2, bools):
+    assertions = z3.parse_smt2_string(smt2)
+    return [assertions[i] if is_bool else assertions[i].arg(0) for i, is_bool in enumerate(bools)]
+
+
+class _Tree:
+    """Parsed script, with its nodes in ast.walk order."""
+
+    __slots__ = ['source', 'nodes', 'ids', 'positions']
+
+    def __init__(self, source):
+        self.source = source
+        self.nodes = list(ast.walk(ast.parse(source)))
+        # id -> index, for nodes of this very tree
+        self.ids = {id(node): i for i, node in enumerate(self.nodes)}
+        # (type, lineno, col_offset) -> indexes of the nodes there
+        self.positions = {}
+        for i, node in enumerate(self.nodes):
+            if hasattr(node, 'lineno'):
+                self.positions.setdefault((type(node), node.lineno, node.col_offset), []).append(i)
+
+
+# source -> _Tree. A process only ever sees a handful of scripts.
+_trees = {}
+
+
+def _tree(source):
+    tree = _trees.get(source)
+    if tree is None:
+        tree = _trees[source] = _Tree(source)
+    return tree
+
+
+_PLAIN = (int, float, complex, str, bytes, bool, type(None))
+
+
+def _same(a, b):
+    """bool: True if a and b are equal AST (sub)trees or values. Anything else pySym put in a node only matches itself."""
+    if a is b:
+        return True
+
+    if type(a) is not type(b):
+        return False
+
+    if isinstance(a, ast.AST):
+        return a.__dict__.keys() == b.__dict__.keys() and all(_same(value, b.__dict__[name]) for name, value in a.__dict__.items())
+
+    if type(a) in (list, tuple):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+
+    return type(a) in _PLAIN and a == b
+
+
+def _subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _subclasses(sub)
+
+
+_AST_TYPES = list(_subclasses(ast.AST))
+
+
+def _copy_node(node):
+    """Copy of an AST node, for changed nodes to be rebuilt from. See _Pickler.reduce_node."""
+    new = node.__class__()
+    new.__dict__.update(node.__dict__)
+    return new
+
+
+def _node_diff(node, orig):
+    """dict: Fields of node that differ from orig, or None if node lacks some of orig's."""
+    if not node.__dict__.keys() >= orig.__dict__.keys():
+        return None
+    return {name: value for name, value in node.__dict__.items() if name not in orig.__dict__ or not _same(value, orig.__dict__[name])}
+
+
+class _Pickler(pickle.Pickler):
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.path_type = pyPath.Path
+        # Script sources seen on Paths, and their index
+        self.sources = []
+        self.source_index = {}
+        self.trees = []
+        # id -> persistent id, for AST nodes already looked at. seen holds them, so ids aren't reused under us.
+        self.node_pids = {}
+        self.seen = []
+        # id -> (original, diff), for changed AST nodes. They are pickled by reduce_node.
+        self.changed = {}
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        self.dispatch_table.update((t, self.reduce_node) for t in _AST_TYPES)
+        self.exprs = []
+        # ast id -> index into exprs. exprs holds the expressions, so ids aren't reused under us.
+        self.expr_index = {}
+        # (parent index, constraint, constraint is in exprs, sat) per trail node, parents first
+        self.trails = []
+        self.trail_index = {}
+
+    def expr(self, e):
+        i = self.expr_index.get(e.get_id())
+        if i is None:
+            i = self.expr_index[e.get_id()] = len(self.exprs)
+            self.exprs.append(e)
+        return i
+
+    def trail(self, node):
+        todo = []
+        n = node
+        while n is not None and n not in self.trail_index:
+            todo.append(n)
+            n = n.parent
+
+        for n in reversed(todo):
+            is_expr = isinstance(n.constraint, z3.ExprRef)
+            self.trail_index[n] = len(self.trails)
+            self.trails.append((
+                None if n.parent is None else self.trail_index[n.parent],
+                self.expr(n.constraint) if is_expr else n.constraint,
+                is_expr,
+                n.sat))
+
+        return self.trail_index[node]
+
+    def source(self, source):
+        if source not in self.source_index:
+            self.source_index[source] = len(self.sources)
+            self.sources.append(source)
+            self.trees.append(_tree(source))
+
+    def node(self, node):
+        """Persistent id of an AST node that is unchanged from its script, or None."""
+        key = id(node)
+        if key in self.node_pids:
+            return self.node_pids[key]
+
+        self.seen.append(node)
+        pid = self.node_pids[key] = self.__node(node)
+        return pid
+
+    def __node(self, node):
+        position = (type(node), getattr(node, 'lineno', None), getattr(node, 'col_offset', None))
+        changed = None
+
+        for n, tree in enumerate(self.trees):
+            i = tree.ids.get(id(node))
+            if i is not None and tree.nodes[i] is node:
+                return ("node", n, i)
+
+            for i in tree.positions.get(position, ()):
+                diff = _node_diff(node, tree.nodes[i])
+                if diff is not None and len(diff) == 0:
+                    return ("node", n, i)
+                if diff is not None and changed is None:
+                    changed = (tree.nodes[i], diff)
+
+        if changed is not None:
+            self.changed[id(node)] = changed
+
+        return None
+
+    def reduce_node(self, node):
+        """Changed nodes are rebuilt as a copy of the original with their own fields on top.
+        Going through reduce rather than a persistent id lets pickle's memo handle nodes that refer back to themselves."""
+        changed = self.changed.get(id(node))
+        if changed is None:
+            return node.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+
+        orig, diff = changed
+        return (_copy_node, (orig,), diff)
+
+    def persistent_id(self, obj):
+        t = type(obj)
+
+        if t in _WEAKREFS:
+            return ("weakref",)
+
+        if t is self.path_type and type(obj.source) is str:
+            self.source(obj.source)
+            return None
+
+        if t is str:
+            i = self.source_index.get(obj)
+            return None if i is None else ("source", i)
+
+        if isinstance(obj, ast.AST) and len(self.trees) > 0:
+            return self.node(obj)
+
+        if t is ConstraintTrail:
+            return ("trail", self.trail(obj))
+
+        if isinstance(obj, z3.ExprRef):
+            return ("expr", self.expr(obj))
+
+        if isinstance(obj, z3.Z3PPObject):
+            raise pickle.PicklingError("Can't serialize z3 object {0} of type {1}".format(obj, t))
+
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+
+    def __init__(self, file, exprs, trails, sources):
+        super().__init__(file)
+        self.exprs = exprs
+        self.trails = trails
+        self.trees = [_tree(source) for source in sources]
+
+    def persistent_load(self, pid):
+        if pid[0] == "expr":
+            return self.exprs[pid[1]]
+
+        if pid[0] == "node":
+            return self.trees[pid[1]].nodes[pid[2]]
+
+        if pid[0] == "source":
+            return self.trees[pid[1]].source
+
+        if pid[0] == "trail":
+            return self.trails[pid[1]]
+
+        if pid[0] == "weakref":
+            return None
+
+        raise pickle.UnpicklingError("Unknown persistent id {0}".format(pid))
+
+
+def dumps(obj, sources=()):
+    """Serializes obj, z3 expressions and all.
+
+    Args:
+        obj: Path, State, or any picklable structure of them.
+        sources (iterable, optional): Script sources whose AST nodes are written as indexes. Those of Paths in obj always are.
+
+    Returns:
+        bytes: Data for loads. Everything in it is plain data, so it can go to another process or machine.
+    """
+    body = io.BytesIO()
+    pickler = _Pickler(body)
+    for source in sources:
+        pickler.source(source)
+    pickler.dump(obj)
+
+    return pickle.dumps((
+        _to_smt2(pickler.exprs),
+        [z3.is_bool(e) for e in pickler.exprs],
+        pickler.trails,
+        pickler.sources,
+        body.getvalue()), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    """Rebuilds an object serialized by dumps.
+
+    Args:
+        data (bytes): Output of dumps.
+
+    Returns:
+        The object. Objects that shared a solver or trail when dumped together share them again.
+    """
+    smt2, bools, trail_table, sources, body = pickle.loads(data)
+    exprs = _from_smt2(smt2, bools)
+
+    trails = []
+    for parent, constraint, is_expr, sat in trail_table:
+        if parent is None:
+            node = ConstraintTrail()
+        else:
+            node = ConstraintTrail(exprs[constraint] if is_expr else constraint, trails[parent])
+        node.sat = sat
+        trails.append(node)
+
+    return _Unpickler(io.BytesIO(body), exprs, trails, sources).load()
+
+
+from . import pyPath
@@ -0,0 +1,101 @@
+"""
+On-disk store for paths that don't fit in memory.
+
+A PathGroup with a memory budget (a count of paths, see PathGroup.memory_budget) writes the
+States of finished paths, and of active paths beyond the budget, into a
+PathStore with Path.spill. The Path object itself stays where it is, so
+stashes and strategies don't notice. Its State is loaded back the next time
+something reads path.state.
+
+The store is a SQLite database holding one Serialize.dumps blob per spilled
+State. Unless given a filename, it lives in a temporary file under
+Config.PYSYM_SPILL_DIR that is removed when the store is closed or garbage
+collected.
+"""
+
+import os
+import sqlite3
+import logging
+import tempfile
+import weakref
+from . import Config
+
+logger = logging.getLogger("Spill")
+
+
+def _cleanup(db, filename):
+    db.close()
+    if filename is not None and os.path.exists(filename):
+        os.remove(filename)
+
+
+class PathStore:
+    """
+    Key/value store of serialized States, backed by SQLite.
+    """
+
+    __slots__ = ['filename', '__db', '__finalizer', '__weakref__']
+
+    def __init__(self, filename=None):
+        """
+        Args:
+            filename (str, optional): Database file to use. It is kept on close. Defaults to a temporary file in Config.PYSYM_SPILL_DIR
+                (or the system's temporary directory if that is None), which is removed on close.
+        """
+        temporary = filename is None
+        if temporary:
+            fd, filename = tempfile.mkstemp(prefix="pySym-", suffix=".spill", dir=Config.PYSYM_SPILL_DIR)
+            os.close(fd)
+
+        self.filename = filename
+        self.__db = sqlite3.connect(filename)
+
+        # Scratch data. Nothing needs to survive a crash.
+        self.__db.execute("PRAGMA journal_mode=OFF")
+        self.__db.execute("PRAGMA synchronous=OFF")
+        self.__db.execute("CREATE TABLE IF NOT EXISTS states (id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+
+        self.__finalizer = weakref.finalize(self, _cleanup, self.__db, filename if temporary else None)
+
+    def put(self, data):
+        """Stores data.
+
+        Args:
+            data (bytes): Output of Serialize.dumps.
+
+        Returns:
+            int: Key to get it back with.
+        """
+        return self.__db.execute("INSERT INTO states (data) VALUES (?)", (sqlite3.Binary(data),)).lastrowid
+
+    def get(self, key):
+        """bytes: Data stored under key."""
+        row = self.__db.execute("SELECT data FROM states WHERE id = ?", (key,)).fetchone()
+
+        if row is None:
+            err = "get: Nothing stored under key {0}".format(key)
+            logger.error(err)
+            raise Exception(err)
+
+        return bytes(row[0])
+
+    def delete(self, key):
+        """Removes what is stored under key, if anything."""
+        self.__db.execute("DELETE FROM states WHERE id = ?", (key,))
+
+    def size(self):
+        """int: Bytes of data currently stored."""
+        return self.__db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM states").fetchone()[0]
+
+    def close(self):
+        """Closes the database. Temporary files are removed."""
+        self.__finalizer()
+
+    def __len__(self):
+        return self.__db.execute("SELECT COUNT(*) FROM states").fetchone()[0]
+
+    def __str__(self):
+        return "<PathStore {0} with {1} states>".format(self.filename, len(self))
+
+    def __repr__(self):
+        return self.__str__()
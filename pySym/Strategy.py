@@ -0,0 +1,272 @@
+"""
+Search strategies that order active paths with a heap.
+
+A Strategy scores each path as it becomes active, and PathGroup steps the
+lowest scoring ones first. Give PathGroup a Strategy, a scoring function or
+one of the names in STRATEGIES as its search_strategy.
+"""
+
+import math
+import heapq
+import random
+import logging
+import weakref
+
+logger = logging.getLogger("Strategy")
+
+
+class Strategy:
+    """
+    Steps the paths with the lowest score first. Paths with equal scores go in the order they were added.
+
+    Scores are computed once, when a path becomes active. Subclasses with
+    rescore set get their scores recomputed when a path comes up, and go
+    back in the heap if it got worse.
+    """
+
+    __slots__ = ['batch', '__score', '__heap', '__live', '__count', '__weakref__']
+
+    rescore = False
+
+    def __init__(self, score=None, batch=None):
+        """
+        Args:
+            score (callable, optional): Takes a Path and returns its score. Lower goes first. Required unless a subclass overrides score.
+            batch (int, optional): Paths to step each PathGroup.step. Defaults to the PathGroup's number of workers.
+        """
+        assert score is None or callable(score), "Invalid score function of {}".format(score)
+        assert batch is None or (type(batch) is int and batch > 0), "Invalid batch of {}".format(batch)
+
+        self.batch = batch
+        self.__score = score
+        # (score, count, path)
+        self.__heap = []
+        # id(path) -> count of its current heap entry. Other entries for it are stale.
+        self.__live = {}
+        self.__count = 0
+
+    def score(self, path):
+        """Scores a path. Lower scores get stepped first."""
+        if self.__score is None:
+            err = "score: {0} has no score function".format(type(self).__name__)
+            logger.error(err)
+            raise Exception(err)
+
+        return self.__score(path)
+
+    def stepped(self, path, paths):
+        """Called with each path PathGroup steps and the paths it turned into, before those are stashed."""
+        pass
+
+    def push(self, path):
+        """Adds a path that just became active."""
+        self.__count += 1
+        self.__live[id(path)] = self.__count
+        heapq.heappush(self.__heap, (self.score(path), self.__count, path))
+
+    def discard(self, path):
+        """Forgets a path that is no longer active. Its heap entry is dropped when it comes up."""
+        self.__live.pop(id(path), None)
+
+    def pop(self):
+        """Path: Removes and returns the lowest scoring path, or None if there are none."""
+        heap = self.__heap
+
+        while len(heap) > 0:
+            score, count, path = heapq.heappop(heap)
+
+            if self.__live.get(id(path)) != count:
+                continue
+
+            if self.rescore:
+                new = self.score(path)
+                if new > score and len(heap) > 0 and new > heap[0][0]:
+                    heapq.heappush(heap, (new, count, path))
+                    continue
+
+            del self.__live[id(path)]
+            return path
+
+        return None
+
+    def select(self, n):
+        """list: Up to n paths to step next, popped off the heap."""
+        paths = []
+        for _ in range(n):
+            path = self.pop()
+            if path is None:
+                break
+            paths.append(path)
+        return paths
+
+    def reset(self, paths):
+        """Starts over with the given active paths."""
+        self.__heap = []
+        self.__live = {}
+        for path in paths:
+            self.push(path)
+
+    def __getstate__(self):
+        """Pickle support, see pySym.Serialize. Only live heap entries are kept. Path ids don't carry over, so they're matched up again on load."""
+        state = dict(getattr(self, '__dict__', {}))
+
+        # Public attributes of subclasses come along
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', []):
+                if not name.startswith('__') and hasattr(self, name):
+                    state[name] = getattr(self, name)
+
+        state['_score'] = self.__score
+        state['_heap'] = [entry for entry in self.__heap if self.__live.get(id(entry[2])) == entry[1]]
+        state['_count'] = self.__count
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self.__score = state.pop('_score')
+        self.__heap = state.pop('_heap')
+        self.__count = state.pop('_count')
+        self.__live = {id(path): count for _, count, path in self.__heap}
+        heapq.heapify(self.__heap)
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __len__(self):
+        return len(self.__live)
+
+    def __str__(self):
+        return "<{0} with {1} paths>".format(type(self).__name__, len(self))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class FewestConstraints(Strategy):
+    """Steps the paths with the fewest constraints first."""
+
+    __slots__ = []
+
+    def score(self, path):
+        return path.constraints()
+
+
+class LeastVisitedLine(Strategy):
+    """Coverage guided. Steps paths sitting on the lines that have been stepped the fewest times first."""
+
+    __slots__ = ['visits']
+
+    rescore = True
+
+    def __init__(self, batch=None):
+        super().__init__(batch=batch)
+        # line number -> times a path was stepped there
+        self.visits = {}
+
+    def score(self, path):
+        return self.visits.get(path.lineno(), 0)
+
+    def stepped(self, path, paths):
+        line = path.lineno()
+        self.visits[line] = self.visits.get(line, 0) + 1
+
+
+def _line_gap(line, target):
+    return abs(line - target)
+
+
+class ClosestToTarget(Strategy):
+    """Steps the paths closest to a target line first. Paths that are done go last."""
+
+    __slots__ = ['target', 'distance']
+
+    def __init__(self, target=None, distance=None, batch=None):
+        """
+        Args:
+            target (int, optional): Line to head for. PathGroup.explore sets it from find if it isn't set.
+            distance (callable, optional): Takes a line number and the target and returns how far apart they are, or None if the line can't get there.
+                Defaults to the gap between the line numbers. PathGroup.explore switches the default to distances in the script's CFG.
+            batch (int, optional): See Strategy.
+        """
+        super().__init__(batch=batch)
+        self.target = target
+        self.distance = distance
+
+    def score(self, path):
+        line = path.lineno()
+
+        if self.target is None:
+            return 0
+
+        if line is None:
+            return math.inf
+
+        distance = (self.distance or _line_gap)(line, self.target)
+        return math.inf if distance is None else distance
+
+
+class RandomPathTree(Strategy):
+    """
+    KLEE style random path selection.
+
+    Picks paths as if walking down the tree of forks from the root and taking
+    a random branch at each fork. A path that forked k times gets picked with
+    weight 2**-k, so paths in small subtrees don't starve behind an exploding
+    branch. Weighted picks come from the heap by scoring each path with an
+    exponential random key divided by its weight.
+
+    The keys race each other. What is left of a waiting path's key after the
+    last pick is exponential again, so new paths start from the key that was
+    last picked rather than from zero. Otherwise they would always jump ahead
+    of paths that have been waiting.
+    """
+
+    __slots__ = ['forks', 'keys', 'now']
+
+    def __init__(self, batch=None):
+        super().__init__(batch=batch)
+        # Path -> number of forks on its way from the root
+        self.forks = weakref.WeakKeyDictionary()
+        # Path -> key it got when it was scored
+        self.keys = weakref.WeakKeyDictionary()
+        # Key of the last path picked
+        self.now = 0
+
+    def score(self, path):
+        key = self.now + random.expovariate(1) * 2 ** self.forks.get(path, 0)
+        self.keys[path] = key
+        return key
+
+    def pop(self):
+        path = super().pop()
+        if path is not None:
+            self.now = max(self.now, self.keys.pop(path, self.now))
+        return path
+
+    def stepped(self, path, paths):
+        forks = self.forks.get(path, 0) + (1 if len(paths) > 1 else 0)
+        for p in paths:
+            self.forks[p] = forks
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['forks'] = list(self.forks.items())
+        state['keys'] = list(self.keys.items())
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        forks = state.pop('forks')
+        keys = state.pop('keys')
+        super().__setstate__(state)
+        self.forks = weakref.WeakKeyDictionary(forks)
+        self.keys = weakref.WeakKeyDictionary(keys)
+
+
+# search_strategy names for the built in strategies
+STRATEGIES = {
+    "fewest-constraints": FewestConstraints,
+    "least-visited": LeastVisitedLine,
+    "closest": ClosestToTarget,
+    "random-path": RandomPathTree,
+}
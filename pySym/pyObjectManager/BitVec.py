@@ -52,6 +52,7 @@ class BitVec:
             clone = self._clone.copy() if self._clone is not None else None
         )
 
+    @decorators.reindex
     def increment(self):
         """
         Increment the counter
@@ -142,7 +143,7 @@ class BitVec:
             return True
 
         # If this is a BitVec with only one possibility
-        if len(self.state.any_n_int(self,2)) == 1:
+        if self.state.is_unique(self):
             return True
 
         return False
@@ -217,11 +218,11 @@ class BitVec:
             return False
 
         # Can we be something else?
-        if len(self.state.any_n_int(self,2)) == 2:
+        if not self.state.is_unique(self):
             return False
 
         # Ok, we can't be anything else. How about the var?
-        if len(self.state.any_n_int(var,2)) == 2:
+        if not self.state.is_unique(var):
             return False
 
         # So we can be, now must we?
@@ -44,6 +44,12 @@ class Char:
         z3_obj = self.variable.getZ3Object() # This is hackish... But if I call my own getZ3Object it will recurse forever.
         return z3.And(z3_obj <= 0xff, z3_obj >= 0)
 
+    def __remove_bounds(self):
+        """Retracts our bounds constraint if it's in the solver. Cheap, since they are retractable."""
+        bounds = self.__z3_bounds_constraint()
+        if self.state.solver.is_retractable(bounds):
+            self.state.remove_constraints(bounds)
+
     def _add_variable_bounds(self):
         """Adds variable bounds to the solver for this Int to emulate a Char."""
         assert self.state is not None, "Char: Trying to add bounds without a state..."
@@ -52,14 +58,14 @@ class Char:
 
         # If we're static, we don't need the bounds
         if self.isStatic():
-            #if bounds in self.state.solver.assertions():
-            self.state.remove_constraints(bounds)
+            self.__remove_bounds()
             return
 
         # If we don't already have those added, add them
-        if bounds not in self.state.solver.assertions():
+        if not self.state.solver.is_retractable(bounds):
             # We're ignoring these for the purpose of checking if the variable is in the solver. Sorta emulating a different var type.
-            self.state.addConstraint(bounds)
+            # Retractable since we drop them again as soon as we become static.
+            self.state.addConstraint(bounds, retractable=True)
 
 
     def __deepcopy__(self,_):
@@ -105,7 +111,7 @@ class Char:
         if type(var) is str:
             self._clone = None
             # Remove our bounds constraints to help improve speed.
-            self.state.remove_constraints(self.__z3_bounds_constraint())
+            self.__remove_bounds()
             self.variable.setTo(ord(var))
         
         else:
@@ -115,7 +121,7 @@ class Char:
             # Remove our bounds constraints to help improve speed.
             if var.isStatic():
                 self._clone = None
-                self.state.remove_constraints(self.__z3_bounds_constraint())
+                self.__remove_bounds()
                 self.variable.setTo(var)
 
             # We're being set to a non-static object
@@ -123,7 +129,7 @@ class Char:
 
                 # If we don't have any bounds ourselves, use clone approach
                 if self.is_unconstrained and type(var) is Char:
-                    self.state.remove_constraints(self.__z3_bounds_constraint())
+                    self.__remove_bounds()
                     self._clone = var.copy()
 
                 else:
@@ -131,6 +137,7 @@ class Char:
                     self._add_variable_bounds()
                     self.variable.setTo(var)
 
+    @decorators.reindex
     def increment(self):
         self._clone = None
         self.count += 1
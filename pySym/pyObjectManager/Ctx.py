@@ -10,6 +10,7 @@ from .BitVec import BitVec
 from .List import List
 from .String import String
 from .Char import Char
+from ..PersistentMap import PersistentMap
 from .. import pyState
 
 logger = logging.getLogger("ObjectManager:Ctx")
@@ -17,50 +18,59 @@ logger = logging.getLogger("ObjectManager:Ctx")
 class Ctx:
     """
     Define a Ctx Object
+
+    Variables live in a PersistentMap shared between copies, so copying a Ctx
+    is O(1). A variable object is copied the first time a Ctx hands it out
+    after a copy (JIT copy), and rebinding it only rebuilds the map's path to
+    that key.
     """
 
-    __slots__ = ['ctx', 'variables', 'variables_need_copy', '__state', '__weakref__']
+    __slots__ = ['ctx', 'variables', '__owned', '__state', '__weakref__']
 
     def __init__(self,ctx,variables=None):
         assert type(ctx) is int, "Unexpected ctx type of {}".format(type(ctx))
         
         self.ctx = ctx
-        self.variables = {} if variables is None else variables
-        self.variables_need_copy = {key: True for key in self.variables.keys()} # JIT Copy
+        self.variables = PersistentMap() if variables is None else variables
+        # Keys whose variable objects are ours alone. Everything else may be shared with other copies.
+        self.__owned = set()
 
     def copy(self):
-        self.variables_need_copy = {key: True for key in self.variables.keys()} # JIT Copy
+        # Both of us share every variable object now
+        self.__owned = set()
 
         return Ctx(
             ctx = self.ctx,
-            #variables = {key:self.variables[key].copy() for key in self.variables},
-            #variables = {key:value for key, value in self.variables.items()} # JIT copy
             variables = self.variables
         )
 
     def __iter__(self): return iter(self.variables)
 
+    def __contains__(self, key): return key in self.variables
+
+    def __len__(self): return len(self.variables)
+
     def __ensure_copy(self, key):
         """Perform JIT copy for the given key."""
-        # If this is the first touch, create a new dictionary object for us
-        if not any(self.variables_need_copy[key] is False for key in self.variables_need_copy):
-            self.variables = {key:value for key, value in self.variables.items()}
-
-        # If this is a first time set
-        if key not in self.variables_need_copy:
-            self.variables_need_copy[key] = True
-
-        # If we are returning to an existing key
-        elif self.variables_need_copy[key]:
-            #print("CTX {} Copy".format(self.ctx))
-            self.variables[key] = copy(self.variables[key])
-            self.variables[key].state = self.state # Pass it the correct state...
-            self.variables[key].parent = weakref.proxy(self)
-            self.variables_need_copy[key] = False
-
-    #def items(self): return self.variables.items()
-    def items(self): 
-        for key in self.variables.keys():
+        if key in self.__owned:
+            return
+
+        value = self.variables.get(key)
+
+        # First time set. __setitem__ fills it in.
+        if value is None:
+            return
+
+        value = copy(value)
+        value.state = self.state # Pass it the correct state...
+        value.parent = weakref.proxy(self)
+        self.variables = self.variables.set(key, value)
+        self.__owned.add(key)
+
+    def items(self):
+        """Iterator of (name, variable) pairs. Every variable is JIT copied first, since callers may change them.
+        Read self.variables directly to look without copying."""
+        for key in list(self.variables.keys()):
             self.__ensure_copy(key)
         return self.variables.items()
 
@@ -69,6 +79,11 @@ class Ctx:
         Returns "index" of the given element. Raises exception if it's not found
         For a pseudo dict class, this is just the key for the key,val pair
         """
+        # Variables are almost always stored under their own name
+        value = self.variables.get(getattr(elm, 'varName', None))
+        if value is not None and value.uuid is elm.uuid:
+            return elm.varName
+
         val = [k for k,v in self.variables.items() if v.uuid is elm.uuid]
         assert len(val) == 1, "Expected one item to be found. Found {} instead".format(len(val))
         return val[0]
@@ -87,17 +102,11 @@ class Ctx:
         # Attempt to return variable
         assert type(value) in [Int, Real, BitVec, List, String, Char]
 
-        self.__ensure_copy(key)
-        
+        old = self.variables.get(key)
+
         # Things get weird if our variable names don't match up...
         #assert key == value.varName
 
-        # Get that index's current count
-        if key in self.variables:
-            count = self.variables[key].count + 1
-        else:
-            count = 0
-
         #try:
         #    self.index(value)
         #    raise Exception("Trying to make duplicate variable uuid.")
@@ -117,7 +126,7 @@ class Ctx:
             logger.debug("__setitem__: setting Int")
             #self.variables[key] = Int('{0}'.format(key),ctx=self.ctx,count=count,state=self.state,on_increment=value.on_increment)
 
-            self.variables[key] = value
+            self.variables = self.variables.set(key, value)
             # Don't add a constraint if it's the same thing!
             #if self.variables[key].getZ3Object().get_id() != value.getZ3Object().get_id():
             #    #self.state.addConstraint(self.variables[key].getZ3Object() == value.getZ3Object())
@@ -126,7 +135,7 @@ class Ctx:
         elif type(value) is Real:
             logger.debug("__setitem__: setting Real")
             #self.variables[key] = Real('{0}'.format(key),ctx=self.ctx,count=count,state=self.state)
-            self.variables[key] = value
+            self.variables = self.variables.set(key, value)
             # Don't add a constraint if it's the same thing!
             if self.variables[key].getZ3Object().get_id() != value.getZ3Object().get_id():
                 #self.state.addConstraint(self.variables[key].getZ3Object() == value.getZ3Object())
@@ -135,7 +144,7 @@ class Ctx:
         elif type(value) is BitVec:
             logger.debug("__setitem__: setting BitVec")
             #self.variables[key] = BitVec('{0}'.format(key),ctx=self.ctx,count=count,size=value.size,state=self.state)
-            self.variables[key] = value
+            self.variables = self.variables.set(key, value)
             # Don't add a constraint if it's the same thing!
             if self.variables[key].getZ3Object().get_id() != value.getZ3Object().get_id():
                 #self.state.addConstraint(self.variables[key].getZ3Object() == value.getZ3Object())
@@ -144,14 +153,14 @@ class Ctx:
         elif type(value) in [List, String]:
             logger.debug("__setitem__: setting {0}".format(type(value)))
             value = value.copy()
-            self.variables[key] = value
+            self.variables = self.variables.set(key, value)
             self.variables[key].state = self.state
             #value.count = count
         
         elif type(value) is Char:
             logger.debug("__setitem__: setting Char")
             #self.variables[key] = Char('{0}'.format(key),ctx=self.ctx,count=count,state=self.state)
-            self.variables[key] = value
+            self.variables = self.variables.set(key, value)
             # Don't add a constraint if it's the same thing!
             #if self.variables[key].getZ3Object().get_id() != value.getZ3Object().get_id():
             #    #self.state.addConstraint(self.variables[key].getZ3Object() == value.getZ3Object())
@@ -162,7 +171,13 @@ class Ctx:
             logger.error(err)
             raise Exception(err)
 
-        self.variables_need_copy[key] = True
+        # value may still be referenced elsewhere, so copy it before handing it out
+        self.__owned.discard(key)
+
+        if self.state is not None:
+            if old is not None and old.uuid != self.variables[key].uuid:
+                self.state.objectManager.dropped(old, self)
+            self.state.objectManager.placed(self.variables[key], self, key)
         
     def __copy__(self):
         return self.copy()
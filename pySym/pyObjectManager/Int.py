@@ -64,6 +64,7 @@ class Int:
             clone = self._clone.copy() if self._clone is not None else None,
         )
 
+    @decorators.reindex
     def increment(self):
         # If we're incrementing, remove our clone
         self._clone = None
@@ -103,7 +104,7 @@ class Int:
             return True
         
         # If this is an integer with only one possibility
-        if len(self.state.any_n_int(self,2)) == 1:
+        if self.state.is_unique(self):
             return True
 
         return False
@@ -217,11 +218,11 @@ class Int:
             return False
 
         # Can we be something else?
-        if len(self.state.any_n_int(self,2)) == 2:
+        if not self.state.is_unique(self):
             return False
 
         # Can the other var be something else?
-        if len(self.state.any_n_int(var,2)) == 2:
+        if not self.state.is_unique(var):
             return False
         
         #return False
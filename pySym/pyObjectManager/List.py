@@ -3,6 +3,7 @@ import weakref
 import ast
 import logging
 from .. import pyState
+from . import decorators
 
 logger = logging.getLogger("ObjectManager:List")
 
@@ -11,39 +12,53 @@ import os
 class List:
     """
     Define a List
+
+    Elements live in a PersistentVector shared between copies, so copying a
+    List is O(1). Each entry is (element, owner). An element is copied the
+    first time this List hands it out (JIT copy) unless owner is this List's
+    current epoch. Copying the List starts a new epoch, so every element is
+    shared again.
     """
 
-    __slots__ = ['count', 'varName', 'ctx', 'variables', 'uuid', '__state', '__weakref__', 'variables_need_copy', 'parent']
+    __slots__ = ['count', 'varName', 'ctx', 'uuid', '__state', '__weakref__', 'parent', '__vector', '__epoch', 'array']
 
-    def __init__(self,varName,ctx,count=None,variables=None,state=None,increment=False,uuid=None):
+    def __init__(self,varName,ctx,count=None,variables=None,state=None,increment=False,uuid=None,array=None):
         assert type(varName) is str
         assert type(ctx) is int
 
         self.count = 0 if count is None else count
         self.varName = varName
         self.ctx = ctx
-        self.variables = [] if variables is None else variables
-        self.variables_need_copy = [True] * len(self.variables)
+        self.__epoch = object()
+
+        # Copies share the vector itself
+        if type(variables) is PersistentVector:
+            self.__vector = variables
+        else:
+            self.variables = [] if variables is None else variables
+
         self.uuid = os.urandom(32) if uuid is None else uuid
         self.parent = None
         self.state = state
+        # (element z3 terms, z3 Array over them) from the last symbolic index. See pySym.pyState.Subscript.
+        self.array = array
 
         if increment:
             self.increment()
 
 
     def copy(self):
-        # Reset my copy requirements
-        self.variables_need_copy = [True] * len(self.variables)
+        # Both of us share every element now
+        self.__epoch = object()
 
         return List(
             varName = self.varName,
             ctx = self.ctx,
             count = self.count,
-            #variables = [x.copy() for x in self.variables],
-            variables = self.variables,
+            variables = self.__vector,
             state = self.state if hasattr(self,"state") else None,
-            uuid = self.uuid
+            uuid = self.uuid,
+            array = self.array
         )
 
     def __deepcopy__(self,_):
@@ -52,6 +67,25 @@ class List:
     def __copy__(self):
         return self.copy()
 
+    def __own(self, var):
+        """Copies var for this List. Returns the entry to store."""
+        var = copy(var)
+        var.state = self.state # Pass it the correct state...
+        var.parent = weakref.proxy(self)
+        return (var, self.__epoch)
+
+    def __placed(self, var, index):
+        """Tells the ObjectManager's parent index that var is at index now. Only Lists it already knows about are tracked."""
+        state = self.state
+        if state is not None and self.uuid in state.objectManager.parents:
+            state.objectManager.placed(var, self, index)
+
+    def __dropped(self, var):
+        """Tells the ObjectManager's parent index that var is no longer in this List."""
+        state = self.state
+        if state is not None and self.uuid in state.objectManager.parents:
+            state.objectManager.dropped(var, self)
+
     def __ensure_copy(self, index):
         """Small stub to ensure that we make a copy if we need to.
         
@@ -59,23 +93,23 @@ class List:
         """
         # If we're copying it all
         if index is None:
-            self.variables = [copy(x) for x in self.variables]
-            for var in self.variables:
-                var.state = self.state
-                var.parent = weakref.proxy(self)
-            self.variables_need_copy = [False] * len(self.variables)
+            epoch = self.__epoch
+            if any(owner is not epoch for _, owner in self.__vector):
+                self.__vector = PersistentVector(entry if entry[1] is epoch else self.__own(entry[0]) for entry in self.__vector)
 
-        # If this is the first touch, create a new list object for us
         else:
-            if not any(val is False for val in self.variables_need_copy):
-                self.variables = list(self.variables)
+            var, owner = self.__vector[index]
+            if owner is not self.__epoch:
+                self.__vector = self.__vector.set(index, self.__own(var))
 
-            # If we are in need of copy, do so
-            if self.variables_need_copy[index] == True:
-                self.variables[index] = copy(self.variables[index])
-                self.variables[index].state = self.state # Pass it the correct state...
-                self.variables[index].parent = weakref.proxy(self)
-                self.variables_need_copy[index] = False
+    @property
+    def variables(self):
+        """list: Elements of this List, without JIT copying them. Setting it replaces them all."""
+        return [var for var, _ in self.__vector]
+
+    @variables.setter
+    def variables(self, variables):
+        self.__vector = PersistentVector((var, None) for var in variables)
 
 
     def setTo(self,otherList,clear=False):
@@ -99,11 +133,15 @@ class List:
             raise Exception("Not implemented")
 
 
+    @decorators.reindex
     def increment(self):
         self.count += 1
         # reset variable list if we're incrementing our count
-        self.variables = []
-        self.variables_need_copy = []
+        old = self.__vector
+        self.__vector = PersistentVector()
+
+        for var, _ in old:
+            self.__dropped(var)
 
         # Reset my copy requirements
         self.uuid = os.urandom(32)
@@ -121,44 +159,43 @@ class List:
         """
         # Variable names in list are "<verson><varName>[<index>]". This is in addition to base naming conventions 
 
-        self.__ensure_copy(None)
-
         if type(var) is Int or var is Int:
             logger.debug("append: adding Int")
-            self.variables.append(Int('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {}))
+            new = Int('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
             # We're being given an object. Let's make sure we link it to Z3 appropriately
             if type(var) is Int:
-                self.variables[-1].setTo(copy(var))
+                new.setTo(copy(var))
 
         elif type(var) is Real or var is Real:
             logger.debug("append: adding Real")
-            self.variables.append(Real('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state))
+            new = Real('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state)
             if type(var) is Real:
-                self.variables[-1].setTo(copy(var))
+                new.setTo(copy(var))
 
         elif type(var) is BitVec or var is BitVec:
             logger.debug("append: adding BitVec")
             kwargs = {'size': var.size} if kwargs is None else kwargs
-            self.variables.append(BitVec('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {}))
+            new = BitVec('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
             if type(var) is BitVec:
-                self.variables[-1].setTo(copy(var))
+                new.setTo(copy(var))
         
         elif type(var) is Char or var is Char:
             logger.debug("append: adding Char")
-            self.variables.append(Char('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state))
+            new = Char('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state)
             if type(var) is Char:
-                self.variables[-1].setTo(copy(var))
+                new.setTo(copy(var))
 
         elif type(var) in [List, String]:
             logger.debug("append: adding {0}".format(type(var)))
-            self.variables.append(copy(var))
+            new = copy(var)
 
         else:
             err = "append: Don't know how to append/resolve object '{0}'".format(type(var))
             logger.error(err)
             raise Exception(err)
 
-        self.variables_need_copy.append(True)
+        self.__vector = self.__vector.append((new, None))
+        self.__placed(new, len(self) - 1)
 
 
     def insert(self, index, object, kwargs=None):
@@ -167,8 +204,6 @@ class List:
         assert type(index) in [int, Int], "Unexpected index of type {}".format(type(index))
         assert type(object) in [Int, Real, Char, BitVec, List, String], "Unexpected type for object of {}".format(type(object))
 
-        self.__ensure_copy(None)
-
         # Use concrete int
         if type(index) is Int:
             assert index.isStatic(), "Insert got symbolic index value. Not supported."
@@ -179,35 +214,32 @@ class List:
         logger.debug("insert: inserting {} at {}".format(type(object), index))
 
         if type(object) is Int:
-            var = Int('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
+            var = Int('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
             var.setTo(object)
-            self.variables.insert(index, var)
 
         elif type(object) is Real:
-            var = Real('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state)
+            var = Real('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state)
             var.setTo(object)
-            self.variables.insert(index, var)
 
         elif type(object) is BitVec:
             kwargs = {'size': object.size} if kwargs is None else kwargs
-            var = BitVec('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
+            var = BitVec('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state,**kwargs if kwargs is not None else {})
             var.setTo(object)
-            self.variables.insert(index, var)
         
         elif type(object) is Char:
-            var = Char('{2}{0}[{1}]'.format(self.varName,len(self.variables),self.count),ctx=self.ctx,state=self.state)
+            var = Char('{2}{0}[{1}]'.format(self.varName,len(self),self.count),ctx=self.ctx,state=self.state)
             var.setTo(object)
-            self.variables.insert(index, var)
 
         elif type(object) in [List, String]:
-            self.variables.insert(index, object)
+            var = object
 
         else:
             err = "append: Don't know how to append/resolve object '{0}'".format(type(var))
             logger.error(err)
             raise Exception(err)
 
-        self.variables_need_copy.insert(index, True)
+        self.__vector = self.__vector.insert(index, (var, None))
+        self.__placed(var, index)
 
 
     def _isSame(self):
@@ -224,7 +256,7 @@ class List:
         # Lookup our own variables by uuid
         if type(elm) in [String, Int, BitVec, Char, Real]:
             i = 0
-            for var in self.variables:
+            for var, _ in self.__vector:
                 if var.uuid == elm.uuid:
                     return i
                 i += 1
@@ -236,8 +268,6 @@ class List:
         """
         We want to be able to do "list[x]", so we define this.
         """
-        self.__ensure_copy(index)
-
         if type(index) is slice:
             # Build a new List object containing the sliced stuff
             newList = List("temp",ctx=self.ctx,state=self.state)
@@ -245,8 +275,9 @@ class List:
             for var in oldList:
                 newList.append(var.copy())
             return newList
-            
-        return self.variables[index]
+
+        self.__ensure_copy(index)
+        return self.__vector[index][0]
 
     def __setitem__(self,key,value):
         """
@@ -256,29 +287,27 @@ class List:
         assert type(key) is int
         assert type(value) in [Int, Real, BitVec, List, String]
 
-        self.__ensure_copy(key)
-
         # Get that index's current count
-        count = self.variables[key].count + 1
+        count = self.__vector[key][0].count + 1
 
         if type(value) is Int:
             logger.debug("__setitem__: setting Int")
-            self.variables[key] = Int('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,state=self.state)
-            self.variables[key].setTo(value)
+            var = Int('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,state=self.state)
+            var.setTo(value)
 
         elif type(value) is Real:
             logger.debug("__setitem__: setting Real")
-            self.variables[key] = Real('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,state=self.state)
-            self.variables[key].setTo(value)
+            var = Real('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,state=self.state)
+            var.setTo(value)
 
         elif type(value) is BitVec:
             logger.debug("__setitem__: setting BitVec")
-            self.variables[key] = BitVec('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,size=value.size,state=self.state)
-            self.variables[key].setTo(value)
+            var = BitVec('{2}{0}[{1}]'.format(self.varName,key,self.count),ctx=self.ctx,count=count,size=value.size,state=self.state)
+            var.setTo(value)
 
         elif type(value) in [List, String]:
             logger.debug("__setitem__: setting {0}".format(type(value)))
-            self.variables[key] = value
+            var = value
             #value.count = count
 
         else:
@@ -286,11 +315,19 @@ class List:
             logger.error(err)
             raise Exception(err)
 
-        self.variables[key].parent = weakref.proxy(self)
+        var.parent = weakref.proxy(self)
+        old = self.__vector[key][0]
+        self.__vector = self.__vector.set(key, (var, self.__epoch))
+
+        if old.uuid != var.uuid:
+            self.__dropped(old)
+        self.__placed(var, key)
 
     def pop(self,i):
         self.__ensure_copy(i)
-        var = self.variables.pop(i)
+        var = self.__vector[i][0]
+        self.__vector = self.__vector.delete(i)
+        self.__dropped(var)
         return var
 
     def mustBe(self,var):
@@ -346,7 +383,11 @@ class List:
         return new_list
 
     def __len__(self):
-        return len(self.variables)
+        return len(self.__vector)
+
+    def __iter__(self):
+        self.__ensure_copy(None)
+        return (var for var, _ in self.__vector)
 
     def getValue(self):
         """
@@ -397,4 +438,5 @@ from .Real import Real
 from .BitVec import BitVec
 from .Char import Char
 from .String import String
+from ..PersistentVector import PersistentVector
 
@@ -3,6 +3,7 @@ import weakref
 import logging
 import os
 from .. import pyState
+from . import decorators
 
 logger = logging.getLogger("ObjectManager:Real")
 
@@ -45,6 +46,7 @@ class Real:
             uuid = self.uuid
         )
 
+    @decorators.reindex
     def increment(self):
         self.value = None
         self.count += 1
@@ -79,7 +81,7 @@ class Real:
         if self.value is not None:
             return True
 
-        elif len(self.state.any_n_real(self,2)) == 1:
+        elif self.state.is_unique(self):
             return True
 
         return False
@@ -147,11 +149,11 @@ class Real:
         #    return True
 
         # Can we be something else?
-        if len(self.state.any_n_int(self,2)) == 2:
+        if not self.state.is_unique(self):
             return False
 
         # Can the other var be something else?
-        if len(self.state.any_n_int(var,2)) == 2:
+        if not self.state.is_unique(var):
             return False
 
 
@@ -3,6 +3,7 @@ import weakref
 import ast
 import logging
 from .. import pyState
+from . import decorators
 
 logger = logging.getLogger("ObjectManager:String")
 
@@ -27,13 +28,11 @@ class String:
         self.variables = [] if variables is None else variables
         self.uuid = os.urandom(32) if uuid is None else uuid
         self.parent = None
+        self.state = state
 
         if increment:
             self.increment()
 
-        self.state = state
-
-
         if string is not None:
             self.setTo(string,clear=True)
 
@@ -60,6 +59,7 @@ class String:
     def __copy__(self):
         return self.copy()
 
+    @decorators.reindex
     def increment(self):
         self.count += 1
 
@@ -200,7 +200,7 @@ class String:
         # If we can possible be this value, see if we MUST be this value
         # Loop through all our characters and see if they have more than one possibility
         for c in self:
-            if len(self.state.any_n_int(c,2)) != 1:
+            if not self.state.is_unique(c):
                 return False
 
         # Looks like we've got a match...
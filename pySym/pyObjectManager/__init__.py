@@ -9,6 +9,7 @@ from .List import List
 from .Ctx import Ctx
 from .String import String
 from .Char import Char
+from ..PersistentMap import PersistentMap
 from .. import pyState
 
 logger = logging.getLogger("ObjectManager")
@@ -19,13 +20,21 @@ CTX_RETURNS = 1
 class ObjectManager:
     """
     Object Manager will keep track of objects. Generally, Objects will be variables such as ints, lists, strings, etc.
+
+    It also keeps an index of where variables live, for getParent. parents maps
+    the uuid of each variable placed in a Ctx or List to (container, slot),
+    where container is the ctx number for a Ctx and the uuid of the List
+    otherwise. Ctx and List update it as they take variables in and let them
+    go, and increment moves a variable's entry to its new uuid. It is a
+    PersistentMap, so copies share it until one of them changes.
     """
 
-    __slots__ = ['variables', 'returnObjects', '__state','__weakref__']
+    __slots__ = ['variables', 'returnObjects', 'parents', '__state','__weakref__']
 
-    def __init__(self,variables=None,returnObjects=None,state=None):
+    def __init__(self,variables=None,returnObjects=None,state=None,parents=None):
         self.variables = {CTX_GLOBAL: Ctx(CTX_GLOBAL), CTX_RETURNS: Ctx(CTX_RETURNS)} if variables is None else variables
         self.returnObjects = returnObjects if returnObjects is not None else {}
+        self.parents = PersistentMap() if parents is None else parents
 
         if state is not None:
             self.state = state
@@ -113,45 +122,176 @@ class ObjectManager:
         
         return self.variables[ctx][varName]
 
-    def getParent(self,key,haystack=None):
-        """
-        Returns the parent object for any given object by recursively searching.
+    def placed(self,var,container,slot):
+        """Records in the parent index that var is at slot of container. A List's elements are recorded too, unless they already are.
+
+        Args:
+            var: Variable object, such as an Int or List.
+            container (Ctx or List): What var is in.
+            slot: Its key in a Ctx or index in a List.
         """
+        # getParent never looks in the returns Ctx. Its temporaries are often copies of real variables, and would take their entries.
+        if type(container) is Ctx and container.ctx == CTX_RETURNS:
+            return
+
+        self.parents = self.parents.set(var.uuid, (container.ctx if type(container) is Ctx else container.uuid, slot))
+
+        if type(var) is List and len(var) > 0 and self.parents.get(var.variables[0].uuid) != (var.uuid, 0):
+            self.__index(var)
 
+    def dropped(self,var,container):
+        """Removes var's parent index entry now that it left container, along with the entries of everything in it.
+
+        Copies share a uuid, so the entry is kept if the slot it names still holds var's uuid, or if it names
+        another container.
+
+        Args:
+            var: Variable object that was removed or replaced.
+            container (Ctx or List): What var was in. Already without it.
         """
-        
-        # Recursively resolve up the chain for JIT copy
-        parents = [key, key.parent]
-        while not isinstance(parents[-1], Ctx):
-            parents.append[parents[-1].parent]
+        if type(container) is Ctx and container.ctx == CTX_RETURNS:
+            return
+
+        if type(container) is List and not self.__owns(container,self.parents.get(container.uuid)):
+            return
+
+        entry = self.parents.get(var.uuid)
+        if entry is None or entry[0] != (container.ctx if type(container) is Ctx else container.uuid):
+            return
+
+        if self.__at(container,entry[1],var.uuid) is None:
+            self.__forget(var)
+
+    def __forget(self,var):
+        """Removes var's parent index entry and, for a List, those of everything still indexed under it."""
+        self.parents = self.parents.delete(var.uuid)
+
+        if type(var) is List:
+            for child in var.variables:
+                entry = self.parents.get(child.uuid)
+                if entry is not None and entry[0] == var.uuid:
+                    self.__forget(child)
+
+    def renamed(self,var,old):
+        """Moves the parent index entry of var from its old uuid to its current one."""
+        entry = self.parents.get(old)
+
+        if self.__owns(var,entry):
+            self.parents = self.parents.delete(old).set(var.uuid, entry)
+
+    def __owns(self,var,entry):
+        """True if parent index entry is about var itself. Copies share a uuid, so it may be about another copy, such as
+        the variable a temporary List was assigned to. Only entries for a Ctx can be told apart."""
+        if entry is None:
+            return False
+
+        if type(entry[0]) is not int:
+            return True
+
+        ctx = self.variables.get(entry[0])
+        return ctx is not None and ctx.variables.get(entry[1]) is var
+
+    def __container(self,key,ctx):
+        """Ctx or List that parent index container key refers to, JIT copied. None if it's gone or isn't under ctx."""
+        if type(key) is int:
+            return self.variables[key] if key == ctx else None
+
+        entry = self.parents.get(key)
+        if entry is None:
+            return None
+
+        container = self.__container(entry[0],ctx)
+        if container is None:
+            return None
+
+        container = self.__at(container,entry[1],key)
+        return container if type(container) is List else None
+
+    def __at(self,container,slot,uuid):
+        """Variable at slot of container, JIT copied, if it has the given uuid. None otherwise."""
+        if type(container) is Ctx:
+            value = container.variables.get(slot)
+            if value is None or value.uuid != uuid:
+                return None
+            return container[slot]
+
+        if slot >= len(container):
+            return None
+
+        value = container[slot]
+        return value if value.uuid == uuid else None
+
+    def __lookup(self,key,ctx):
+        """Parent of key from the parent index, or None if the index doesn't know or is out of date."""
+        entry = self.parents.get(key.uuid)
+        if entry is None:
+            return None
+
+        container = self.__container(entry[0],ctx)
+        if container is None:
+            return None
+
+        if self.__at(container,entry[1],key.uuid) is not None:
+            return container
 
-        # Now that we know the parents, start at the top and ensure JIT copy has happened for each step
-        parents = parents[::-1]
-        for i in range(len(parents)-1):
-            parent = parents[i]
-            child = parents[i+1]
+        # Something was inserted or popped before it. Only look through this List.
+        if type(container) is List:
+            for i,var in enumerate(container.variables):
+                if var.uuid == key.uuid:
+                    self.placed(key,container,i)
+                    return container
 
-            if isinstance(parent, (Ctx, List, String)):
-                # Force JIT copy
-                index = parent.index(child)
-                parent[index]
+        return None
 
-            #elif isinstance(parent, Char):
+    def __index(self,haystack):
+        """Adds everything under haystack (a Ctx or List) to the parent index."""
+        items = haystack.variables.items() if type(haystack) is Ctx else enumerate(haystack.variables)
 
-        return key.parent
+        for slot,var in items:
+            self.placed(var,haystack,slot)
+
+    def getParent(self,key,haystack=None):
+        """
+        Returns the parent object for any given object.
+
+        Looks it up in the parent index, which costs O(1) for variables in a Ctx, plus
+        O(1) per List they are nested in. If the index doesn't know the key, the key's
+        Ctx is searched recursively and indexed along the way.
         """
 
-        # TODO: This might get to be a long search if there are a lot of variables...
+        if haystack is None:
+            ctx = key.state.ctx
+
+            parent = self.__lookup(key,ctx)
+            if parent is not None:
+                return parent
+
+            parent = self.__search(key,self.variables[ctx])
 
-        #haystack = self.variables if haystack is None else haystack
-        haystack = self.variables[key.state.ctx] if haystack is None else haystack
+            # Index the whole Ctx while we're at it, so its other variables are found right away too
+            if type(parent) in [Ctx,List]:
+                self.__index(self.variables[ctx])
 
-        if type(haystack) in [dict, Ctx]:
+            return parent
+
+        return self.__search(key,haystack)
+
+    def __search(self,key,haystack):
+        """Returns the parent object for key by recursively searching haystack."""
+
+        if type(haystack) is Ctx:
+            # Look without JIT copying every variable, and only copy the one the key turns out to be under
+            for k,v in haystack.variables.items():
+                if hasattr(v,'uuid') and v.uuid == key.uuid:
+                    return haystack
+                elif type(v) in [List,String] and self.__search(key,v):
+                    return self.__search(key,haystack[k])
+        elif type(haystack) is dict:
             for k,v in haystack.items():
                 if hasattr(v,'uuid') and v.uuid == key.uuid:
                     return haystack
                 elif type(v) in [dict, List, Ctx,String]:
-                    p = self.getParent(key,v)
+                    p = self.__search(key,v)
                     if p:
                         return p
         elif isinstance(haystack,(List,String)):
@@ -159,7 +299,7 @@ class ObjectManager:
                 if hasattr(v,'uuid') and v.uuid == key.uuid:
                     return haystack
                 elif type(v) in [dict,List,String]:
-                    p = self.getParent(key,v)
+                    p = self.__search(key,v)
                     if p:
                         return p
         elif isinstance(haystack,Char):
@@ -175,6 +315,7 @@ class ObjectManager:
         return ObjectManager(
             variables = {key:self.variables[key].copy() for key in self.variables},
             returnObjects = {key:self.returnObjects[key].copy() for key in self.returnObjects},
+            parents = self.parents,
         )
 
     def __copy__(self):
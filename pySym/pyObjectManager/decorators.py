@@ -22,3 +22,17 @@ def as_clone_property(orig_func):
             return orig_func(self, *args, **kwargs)
 
     return run_from_clone
+
+def reindex(orig_func):
+    """For methods that give the object a new uuid, such as increment. Moves its entry in the ObjectManager's parent index to the new uuid."""
+    def run_and_reindex(self, *args, **kwargs):
+        old = self.uuid
+        ret = orig_func(self, *args, **kwargs)
+
+        state = self.state
+        if self.uuid is not old and state is not None:
+            state.objectManager.renamed(self, old)
+
+        return ret
+
+    return run_and_reindex
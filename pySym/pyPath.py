@@ -3,6 +3,7 @@ import ast
 import logging
 from .pyState import State
 from .Project import Project
+from . import Serialize
 from prettytable import PrettyTable
 import sys
 from copy import copy
@@ -15,7 +16,7 @@ class Path():
     Defines a path of execution.
     """
 
-    __slots__ = ['backtrace','state','source','error','__weakref__','__project']
+    __slots__ = ['backtrace','source','error','__weakref__','__project','__state','__spill']
     
     def __init__(self,path=None,backtrace=None,state=None,source=None,project=None):
         """
@@ -27,6 +28,8 @@ class Path():
         """
         
         self._project = project
+        # (store, key, line, constraint count, query cache) while the state is spilled to disk. Fresh from a checkpoint, store is None and key is the data.
+        self.__spill = None
         path = [] if path is None else path
         self.backtrace = [] if backtrace is None else backtrace
         self.state = State(path=path,project=self._project) if state is None else state
@@ -93,6 +96,125 @@ class Path():
     def __copy__(self):
         return self.copy()
 
+    def __getstate__(self):
+        """Pickle support, see pySym.Serialize. A spilled state goes along as the data it was spilled as, without loading it."""
+        state = {
+            'backtrace': self.backtrace,
+            'source': self.source,
+            '_project': self._project,
+        }
+
+        if self.__spill is not None:
+            store, key, line, constraints, _ = self.__spill
+            state['spilled'] = (key if store is None else store.get(key), line, constraints)
+        else:
+            state['state'] = self.__state
+
+        if hasattr(self, 'error'):
+            state['error'] = self.error
+
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        spilled = state.pop('spilled', None)
+
+        self.__spill = None
+        self.__state = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        # Held in memory until it's read, or spill moves it to a store
+        if spilled is not None:
+            self.__spill = (None, spilled[0], spilled[1], spilled[2], None)
+
+    def spill(self, store):
+        """
+        Input:
+            store = pySym.Spill.PathStore to write the state to
+        Action:
+            Serializes the state into store and lets go of it. Reading state loads it back.
+            Does nothing if the state is already spilled to a store. A state that can't be
+            serialized stays in memory.
+        Returns:
+            True if the state is spilled to a store now, False if it stayed in memory
+        """
+        if self.__spill is not None:
+            old, data, line, constraints, cache = self.__spill
+            if old is None:
+                self.__spill = (store, store.put(data), line, constraints, cache)
+            return True
+
+        state = self.__state
+
+        try:
+            key = store.put(Serialize.dumps(state, sources=[self.source] if type(self.source) is str else []))
+        except Exception as e:
+            logger.warning("spill: Couldn't spill the state at line {0}, keeping it in memory: {1}".format(state.lineno(), e))
+            return False
+
+        # Kept out here so strategies can score the path without loading it
+        self.__spill = (store, key, state.lineno(), len(state.solver.trail), state.solver._shared.cache)
+        self.__state = None
+        return True
+
+    def restore(self):
+        """
+        Loads a spilled state back from its store. Does nothing if the state isn't spilled.
+        """
+        if self.__spill is None:
+            return
+
+        store, key, _, _, cache = self.__spill
+        if store is None:
+            state = Serialize.loads(key)
+        else:
+            state = Serialize.loads(store.get(key))
+            store.delete(key)
+
+        # Keep answering queries from the same cache, and point at the same project rather than the copy that was pickled
+        if cache is not None:
+            state.solver._shared.cache = cache
+        state._project = self._project
+
+        self.__spill = None
+        self.__state = state
+
+    def lineno(self):
+        """
+        Returns the line the path is on, as State.lineno does. Doesn't load a spilled state.
+        """
+        return self.__spill[2] if self.__spill is not None else self.__state.lineno()
+
+    def constraints(self):
+        """
+        Returns the number of constraints on the path, as len(state.solver.trail). Doesn't load a spilled state.
+        """
+        return self.__spill[3] if self.__spill is not None else len(self.__state.solver.trail)
+
+    @property
+    def spilled(self):
+        """bool: True if the state is in a PathStore instead of memory."""
+        return self.__spill is not None
+
+    @property
+    def state(self):
+        """State object for current path. A spilled state is loaded back first."""
+        if self.__spill is not None:
+            self.restore()
+        return self.__state
+
+    @state.setter
+    def state(self, state):
+        # Replacing a spilled state. The stored copy is stale now.
+        if self.__spill is not None:
+            store, key, _, _, _ = self.__spill
+            if store is not None:
+                store.delete(key)
+            self.__spill = None
+
+        self.__state = state
+
     @property
     def _project(self):
         """pySym Project that this is associated with."""
@@ -1,29 +1,176 @@
+import os
+import time
+import zlib
 import random
+import logging
+import weakref
+from functools import partial
 from multiprocessing import Pool
 from .pyPath import Path
 from .Project import Project
+from .pyState.QueryCache import QueryCache
+from .pyState.ConstraintTrail import SolverUnknown
+from .pyState import Merge, Fingerprint
+from .Spill import PathStore
+from .Profiler import Profiler, recording
+from . import Config
+from . import Serialize
+from .Strategy import Strategy, ClosestToTarget, STRATEGIES
+from .CFG import CFG
+
+logger = logging.getLogger("PathGroup")
+
+# Stashes whose paths are done for good, or until retry_unknown. With a memory budget they go straight to disk.
+_FINISHED = ["deadended", "completed", "errored", "unknown", "pruned"]
+
+_STASHES = ["active", "found"] + _FINISHED
+
+# First bytes of a checkpoint file
+_CHECKPOINT_MAGIC = b"pySym-checkpoint-1\n"
+
+
+def _step(path, lazy=False):
+    """Steps one path and sat checks what comes out.
+
+    Args:
+        path (pySym.pyPath.Path): Path to step.
+        lazy (bool, optional): Sat check path itself before stepping it, instead of the paths it steps to. See PathGroup.
+
+    Returns:
+        list: (path, stash name) pairs. The path itself if it's done or failed, otherwise the paths it stepped to.
+    """
+    try:
+        if lazy and not path.state.isSat():
+            return [(path, "deadended")]
+
+        paths_ret = path.step()
+
+    # Solver couldn't answer. Keep the path as it was so it can be retried.
+    except SolverUnknown as e:
+        path.error = str(e)
+        path.state.solver.time = max(path.state.solver.time, e.time)
+        return [(path, "unknown")]
+
+    except Exception as e:
+        path.error = str(e)
+        return [(path, "errored")]
+
+    # If an empty list is returned, this path must be done
+    if len(paths_ret) == 0:
+        return [(path, "completed")]
+
+    # Checked once they come up
+    if lazy:
+        return [(returnedPath, "active") for returnedPath in paths_ret]
+
+    out = []
+
+    for returnedPath in paths_ret:
+        # Make sure the returned path is possible
+        try:
+            sat = returnedPath.state.isSat()
+        except SolverUnknown as e:
+            returnedPath.error = str(e)
+            out.append((returnedPath, "unknown"))
+            continue
+
+        # We found our next step in the path, or it's impossible
+        out.append((returnedPath, "active" if sat else "deadended"))
+
+    return out
+
+
+def _step_serialized(data, barriers=frozenset(), lazy=False, profile=False):
+    """Worker process side of _step. Takes and returns data from Serialize.dumps. barriers are the caller's Merge.barriers.
+    Returns the stepped paths along with the worker's Profiler stats, or None if profile is off."""
+    profiler = Profiler() if profile else None
+    with Merge.stop_at(barriers), recording(profiler):
+        stepped = _step(Serialize.loads(data), lazy)
+    return Serialize.dumps((stepped, None if profiler is None else profiler.stats))
+
 
 class PathGroup:
 
-    __slots__ = ['active', 'deadended', 'completed', 'errored', 'found',
-                 'ignore_groups', '__weakref__', '__search_strategy', '__project']
+    __slots__ = ['active', 'deadended', 'completed', 'errored', 'found', 'unknown', 'pruned',
+                 'ignore_groups', 'query_cache', 'workers', 'lazy', '__weakref__', '__search_strategy', '__project', '__pool', '__cfg',
+                 '__siblings', '__memory_budget', '__store', 'checkpoint', 'checkpoint_interval', '__last_checkpoint',
+                 'dedup', 'deduplicated', '__fingerprints', '__fingerprint_of', '__covered', 'stats']
 
-    def __init__(self, path=None, ignore_groups=None, search_strategy=None, project=None):
+    def __init__(self, path=None, ignore_groups=None, search_strategy=None, project=None, query_cache_size=None, workers=None, lazy=None, memory_budget=None,
+                 checkpoint=None, checkpoint_interval=None, dedup=None, profile=None):
         """
         (optional) path = starting path object for path group
         (optional) discard_groups = List/set of path groups to ignore (i.e.: don't save) as we execute. Defaults to saving everything.
-        (optional) search_strategy = Which paths to step? Valid: depth/breadth/random (default: breadth)
+        (optional) search_strategy = Which paths to step? Valid: depth/breadth/random, a name from Strategy.STRATEGIES, a Strategy or a function scoring paths (default: breadth)
         (optional) project = pySym project file associated with this group. This will be auto-filled.
+        (optional) query_cache_size = Max number of solver queries to remember across all paths. Defaults to Config.PYSYM_QUERY_CACHE_SIZE.
+        (optional) workers = Number of processes to step paths in. Paths are sent to them with pySym.Serialize. Defaults to Config.PYSYM_WORKERS.
+        (optional) lazy = Only sat check paths once they are picked to be stepped. active may then hold paths that turn out to be impossible.
+                          A model found for one path is tried on the others from the same fork, which often settles them without a query.
+                          Defaults to Config.PYSYM_LAZY_FEASIBILITY.
+        (optional) memory_budget = Most active paths to keep in memory. This counts paths, not bytes. Finished paths and the active paths least
+                                   likely to be stepped next are spilled to a pySym.Spill.PathStore on disk. None keeps everything in memory.
+                                   Defaults to Config.PYSYM_MEMORY_BUDGET.
+        (optional) checkpoint = File explore saves the group to every checkpoint_interval seconds, and when it's done. See save and load.
+        (optional) checkpoint_interval = Seconds between checkpoints. Defaults to Config.PYSYM_CHECKPOINT_INTERVAL.
+        (optional) dedup = Drop paths that become active while an active path at the same point, with the same bindings and a path condition
+                           they include, is there already. Active paths a new one covers that way are dropped too. deduplicated counts them.
+                           See pySym.pyState.Fingerprint. Defaults to Config.PYSYM_DEDUP.
+        (optional) profile = Record where stepping spends its time into stats. See pySym.Profiler. Defaults to the project's profile option,
+                             or Config.PYSYM_PROFILE without a project.
         """
 
         # Init the groups
-        self.active = [path] if path is not None else []
+        self.active = []
         self.deadended = []
         self.completed = []
         self.errored = []
         self.found = []
+        # Paths whose solver queries were undecided or ran out of time
+        self.unknown = []
+        # Paths explore dropped because they can't get to find, or got to a line to avoid
+        self.pruned = []
+        self.__cfg = None
         self.search_strategy = search_strategy
         self._project = project
+        self.workers = Config.PYSYM_WORKERS if workers is None else workers
+        assert type(self.workers) is int and self.workers > 0, "Invalid number of workers of {}".format(self.workers)
+        self.__pool = None
+        self.lazy = Config.PYSYM_LAZY_FEASIBILITY if lazy is None else lazy
+        assert type(self.lazy) is bool, "Invalid lazy of {}".format(self.lazy)
+        # Path -> WeakSet of the paths it was forked with. Only kept in lazy mode.
+        self.__siblings = weakref.WeakKeyDictionary()
+        # Created on first spill
+        self.__store = None
+        self.memory_budget = Config.PYSYM_MEMORY_BUDGET if memory_budget is None else memory_budget
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = Config.PYSYM_CHECKPOINT_INTERVAL if checkpoint_interval is None else checkpoint_interval
+        assert self.checkpoint_interval >= 0, "Invalid checkpoint_interval of {}".format(self.checkpoint_interval)
+        self.__last_checkpoint = time.time()
+        self.dedup = Config.PYSYM_DEDUP if dedup is None else dedup
+        assert type(self.dedup) is bool, "Invalid dedup of {}".format(self.dedup)
+        # Paths dropped as duplicates
+        self.deduplicated = 0
+        # fingerprint -> [(path, constraint set)] of active paths, and path -> its fingerprint
+        self.__fingerprints = {}
+        self.__fingerprint_of = {}
+        # Active paths dropped as duplicates during the current step
+        self.__covered = set()
+
+        if profile is None:
+            profile = project.profile if project is not None else Config.PYSYM_PROFILE
+        assert type(profile) is bool, "Invalid profile of {}".format(profile)
+        # pySym.Profiler.Profiler, or None with profiling off
+        self.stats = Profiler() if profile else None
+
+        # Every path in this group answers solver queries from the same cache
+        self.query_cache = QueryCache(query_cache_size)
+
+        if path is not None:
+            path.state.solver._shared.cache = self.query_cache
+            path.state.solver.timeout = project.query_timeout if project is not None else Config.PYSYM_QUERY_TIMEOUT
+            path.state.solver.budget = project.path_solver_budget if project is not None else Config.PYSYM_PATH_SOLVER_BUDGET
+            self.active.append(path)
         
         if ignore_groups is None:
             self.ignore_groups = set()
@@ -53,34 +200,239 @@ class PathGroup:
             attr.append("{0} errored".format(len(self.errored)))
         if len(self.found) > 0:
             attr.append("{0} found".format(len(self.found)))
+        if len(self.unknown) > 0:
+            attr.append("{0} unknown".format(len(self.unknown)))
+        if len(self.pruned) > 0:
+            attr.append("{0} pruned".format(len(self.pruned)))
         
         return s.format(', '.join(attr))
 
     def __repr__(self):
         return self.__str__()
 
-    def explore(self,find=None):
+    def explore(self,find=None,avoid=None):
         """
         Input:
             (optional) find = input line number to explore to
+            (optional) avoid = line numbers to stay away from. Paths that get to one are pruned.
         Action:
-            Step through script until line is found
+            Step through script until line is found. Paths that the script's CFG says can no longer
+            get to find (without passing through avoid) are moved to the pruned stash.
         Returns:
             True if found, False if not
         """
         assert type(find) in [int,type(None)]
-        
-        while len(self.active) > 0:
-            # Step the things
-            self.step()
+        avoid = set() if avoid is None else set(avoid)
+
+        cfg = self.cfg if find is not None or len(avoid) > 0 else None
+        reach = find is not None and cfg is not None and find in cfg
+
+        strategy = self.search_strategy
+        if find is not None and isinstance(strategy, ClosestToTarget):
+            if strategy.target is None:
+                strategy.target = find
+            if reach and strategy.distance is None:
+                strategy.distance = partial(cfg.distance, avoid=avoid)
+            strategy.reset(self.active)
+
+        self.__prune(find if reach else None, avoid)
+
+        # Merged If branches are run in one go, so paths would never stop on find or avoid inside them
+        with Merge.stop_at([find] + list(avoid)):
+            while len(self.active) > 0:
+                # Step the things
+                self.step()
+
+                if find:
+                    # Check for any path that has made it here
+                    for path in list(self.active):
+                        if path.lineno() == find and self.__feasible(path):
+                            self.unstash(path,from_stash="active",to_stash="found")
+                            self.close()
+                            self.__checkpoint(force=True)
+                            return True
+
+                self.__prune(find if reach else None, avoid)
+                self.__checkpoint()
+
+        self.close()
+        self.__checkpoint(force=True)
+
+    def __prune(self, find, avoid):
+        """Moves active paths that are on a line in avoid, or can't get to find, to pruned."""
+        if find is None and len(avoid) == 0:
+            return
+
+        for path in list(self.active):
+            line = path.lineno()
+            if line in avoid or (find is not None and line is not None and not self.cfg.can_reach(line, find, avoid)):
+                self.unstash(path,from_stash="active",to_stash="pruned")
+
+    def __feasible(self, path):
+        """Sat checks an active path, which in lazy mode may not have been yet. Moves it to deadended or unknown if it isn't possible."""
+        if not self.lazy:
+            return True
+
+        try:
+            if path.state.isSat():
+                return True
+            self.unstash(path,from_stash="active",to_stash="deadended")
+        except SolverUnknown as e:
+            path.error = str(e)
+            self.unstash(path,from_stash="active",to_stash="unknown")
+
+        return False
+
+    def __checkpoint(self, force=False):
+        """Saves to the checkpoint file if one is set and it's been checkpoint_interval seconds since the last save.
+        A failed save is logged and explore carries on, since losing the run over it would be worse."""
+        if self.checkpoint is None or (not force and time.time() - self.__last_checkpoint < self.checkpoint_interval):
+            return
+
+        try:
+            self.save(self.checkpoint)
+        except Exception as e:
+            logger.warning("explore: Couldn't save checkpoint to {0}: {1}".format(self.checkpoint, e))
+            self.__last_checkpoint = time.time()
+
+    def save(self, filename):
+        """Writes everything needed to pick up exploring later to a file. See load.
+
+        Stashes, the search strategy and its state, query statistics and options are kept. Worker processes
+        and cached solver answers aren't. Spilled paths are copied from the spill store without loading them.
+        The data goes to a temporary file that then replaces filename, so dying mid-save leaves the last checkpoint intact.
+
+        Args:
+            filename (str): File to write.
+        """
+        data = _CHECKPOINT_MAGIC + zlib.compress(Serialize.dumps(self))
+
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+
+        self.__last_checkpoint = time.time()
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a PathGroup from a file written by save. explore on it carries on where the saved one was.
+
+        Args:
+            filename (str): File to read.
+
+        Returns:
+            PathGroup: The group as it was saved.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+
+        if not data.startswith(_CHECKPOINT_MAGIC):
+            err = "load: {0} is not a PathGroup checkpoint".format(filename)
+            logger.error(err)
+            raise Exception(err)
+
+        return Serialize.loads(zlib.decompress(data[len(_CHECKPOINT_MAGIC):]))
+
+    def __getstate__(self):
+        """Pickle support, see save."""
+        groups = {id(group): list(group) for group in self.__siblings.values()}
+
+        return {
+            'stashes': {name: getattr(self, name) for name in _STASHES},
+            'ignore_groups': self.ignore_groups,
+            'search_strategy': self.search_strategy,
+            'workers': self.workers,
+            'lazy': self.lazy,
+            'memory_budget': self.memory_budget,
+            'checkpoint': self.checkpoint,
+            'checkpoint_interval': self.checkpoint_interval,
+            'query_cache': (self.query_cache.max_size, self.query_cache.hits, self.query_cache.misses, self.query_cache.model_hits),
+            'siblings': list(groups.values()),
+            'dedup': self.dedup,
+            'deduplicated': self.deduplicated,
+            'stats': self.stats,
+            '_project': self._project,
+        }
+
+    def __setstate__(self, state):
+        for name, paths in state['stashes'].items():
+            setattr(self, name, paths)
+
+        self.ignore_groups = state['ignore_groups']
+        self.workers = state['workers']
+        self.lazy = state['lazy']
+        self.memory_budget = state['memory_budget']
+        self.checkpoint = state['checkpoint']
+        self.checkpoint_interval = state['checkpoint_interval']
+        self._project = state['_project']
+        self.__pool = None
+        self.__cfg = None
+        self.__store = None
+        self.__last_checkpoint = time.time()
+        self.dedup = state['dedup']
+        self.deduplicated = state['deduplicated']
+        self.stats = state['stats']
+        self.__fingerprints = {}
+        self.__fingerprint_of = {}
+        # Active paths dropped as duplicates during the current step
+        self.__covered = set()
+
+        max_size, hits, misses, model_hits = state['query_cache']
+        self.query_cache = QueryCache(max_size)
+        self.query_cache.hits, self.query_cache.misses, self.query_cache.model_hits = hits, misses, model_hits
+
+        self.__siblings = weakref.WeakKeyDictionary()
+        for group in state['siblings']:
+            group = weakref.WeakSet(group)
+            for path in group:
+                self.__siblings[path] = group
+
+        # The strategy's heap came along. Setting it this way would start it over.
+        self.__search_strategy = state['search_strategy']
+
+        for name in _STASHES:
+            for path in getattr(self, name):
+                if path.spilled:
+                    # Spilled paths came back as data in memory. Move them to disk where they were.
+                    if self.memory_budget is not None:
+                        path.spill(self.store)
+                else:
+                    path.state.solver._shared.cache = self.query_cache
+
+        # Spilled paths are only ever compared against in memory, so they can stay out of the index
+        if self.dedup:
+            for path in self.active:
+                if not path.spilled:
+                    self.__index(path)
+
+    def close(self):
+        """Shuts down the worker processes, if any are running. step starts them again when needed."""
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
 
-            if find:
-                # Check for any path that has made it here
-                for path in self.active:
-                    if path.state.lineno() == find:
-                        self.unstash(path,from_stash="active",to_stash="found")
-                        return True
 
+    def retry_unknown(self, query_timeout=None, path_solver_budget=None):
+        """Moves every path in the unknown stash back to active with new solver limits.
+
+        Args:
+            query_timeout (int, optional): New per query limit in milliseconds. None for no limit.
+            path_solver_budget (int, optional): New total limit in milliseconds. Time already spent counts against it. None for no limit.
+
+        Returns:
+            int: Number of paths moved back to active.
+        """
+        paths = list(self.unknown)
+
+        for path in paths:
+            path.state.solver.timeout = query_timeout
+            path.state.solver.budget = path_solver_budget
+            path.error = None
+            self.unstash(path=path,from_stash="unknown",to_stash="active")
+
+        return len(paths)
 
     def unstash(self,path=None,from_stash=None,to_stash=None):
         """
@@ -90,7 +442,27 @@ class PathGroup:
         assert type(from_stash) in [str, type(None)]
         assert type(to_stash) in [str, type(None)]
 
+        if from_stash == "active" and self.dedup:
+            self.__forget(path)
+
+        if to_stash == "active" and self.dedup and self.__duplicate(path):
+            to_stash = None
+
+        if to_stash == "active":
+            path.state.solver._shared.cache = self.query_cache
+            if isinstance(self.search_strategy, Strategy):
+                self.search_strategy.push(path)
+
+        if from_stash == "active" and isinstance(self.search_strategy, Strategy):
+            self.search_strategy.discard(path)
+
         if to_stash is not None and to_stash not in self.ignore_groups:
+            # Found paths are what the caller is after, so they stay in memory
+            if to_stash in _FINISHED and self.memory_budget is not None:
+                path.spill(self.store)
+            elif to_stash == "found":
+                path.restore()
+
             to_stash = getattr(self,to_stash)
             to_stash.append(path)
 
@@ -99,56 +471,171 @@ class PathGroup:
             from_stash.remove(path)
 
 
+    def __duplicate(self, path):
+        """Dedup bookkeeping for a path about to become active. True if an active path already covers it.
+        Active paths it covers are dropped, and it's indexed otherwise."""
+        state = path.state
+        key = Fingerprint.fingerprint(state)
+        constraints = Fingerprint.constraint_set(state)
+
+        for other, other_constraints in list(self.__fingerprints.get(key, [])):
+            # Comparing with a spilled path would mean loading it
+            if other.spilled:
+                continue
+
+            if Fingerprint.redundant(state, constraints, other.state, other_constraints):
+                self.deduplicated += 1
+                return True
+
+            if Fingerprint.redundant(other.state, other_constraints, state, constraints):
+                self.deduplicated += 1
+                self.__covered.add(other)
+                self.unstash(path=other,from_stash="active")
+
+        self.__index(path, key, constraints)
+        return False
+
+    def __index(self, path, key=None, constraints=None):
+        key = Fingerprint.fingerprint(path.state) if key is None else key
+        constraints = Fingerprint.constraint_set(path.state) if constraints is None else constraints
+        self.__fingerprints.setdefault(key, []).append((path, constraints))
+        self.__fingerprint_of[path] = key
+
+    def __forget(self, path):
+        key = self.__fingerprint_of.pop(path, None)
+        if key is None:
+            return
+
+        bucket = [entry for entry in self.__fingerprints[key] if entry[0] is not path]
+        if len(bucket) > 0:
+            self.__fingerprints[key] = bucket
+        else:
+            del self.__fingerprints[key]
+
     def step(self):
         """
         Step all active paths one step.
+        With more than one worker, paths are stepped in worker processes and the results merged back in.
         """
-        #with Pool(processes=1) as pool:
+
+        strategy = self.search_strategy
 
         # Search Strategy
-        if self.search_strategy == "breadth":
-            paths = self.active
-        elif self.search_strategy == "depth":
+        if isinstance(strategy, Strategy):
+            # Someone changed active behind our back
+            if len(strategy) != len(self.active):
+                strategy.reset(self.active)
+            paths = strategy.select(strategy.batch if strategy.batch is not None else self.workers)
+        elif strategy == "breadth":
+            # Oldest first. With a memory budget, only as many as fit at once.
+            paths = list(self.active) if self.memory_budget is None else self.active[:self.memory_budget]
+        elif strategy == "depth":
             paths = [self.active[-1]]
         # Random
         else:
-            paths = random.sample(range(len(self.active)), random.randint(1,len(self.active)))
-        
-        for currentPath in paths:
-            # It's possible this throws an exception on us
-            try:
-                paths_ret = currentPath.step()
-                # Pop it off the block
-                self.unstash(path=currentPath,from_stash="active")
+            most = len(self.active) if self.memory_budget is None else min(len(self.active), self.memory_budget)
+            paths = random.sample(self.active, random.randint(1,most))
 
-            except Exception as e:
-                currentPath.error = str(e)
-                self.unstash(path=currentPath,from_stash="active",to_stash="errored")
+        for path in paths:
+            path.restore()
+            path.state.solver._shared.cache = self.query_cache
+
+        with recording(self.stats):
+            if self.workers > 1 and len(paths) > 1:
+                results = self.__step_parallel(paths)
+            else:
+                results = [_step(currentPath, self.lazy) for currentPath in paths]
+
+        self.__covered = set()
+
+        for currentPath, stepped in zip(paths, results):
+            # Dropped as a duplicate of a path stepped earlier in this batch. Whatever it stepped into is covered as well.
+            if currentPath in self.__covered:
                 continue
 
-            # If an empty list is returned, this path must be done
-            if len(paths_ret) == 0:
-                self.unstash(path=currentPath,to_stash="completed")
+            if isinstance(strategy, Strategy):
+                strategy.stepped(currentPath, [path for path, _ in stepped if path is not currentPath])
+
+            if self.lazy:
+                self.__share(currentPath, stepped)
+
+            # Pop it off the block
+            self.unstash(path=currentPath,from_stash="active")
+
+            for path, stash in stepped:
+                self.unstash(path=path,to_stash=stash)
+
+        self.__covered = set()
+        self.__rebalance()
+
+    def __rebalance(self):
+        """Spills active paths beyond the memory budget, starting with the ones least likely to be stepped next."""
+        if self.memory_budget is None:
+            return
+
+        loaded = [path for path in self.active if not path.spilled]
+        extra = len(loaded) - self.memory_budget
+        if extra <= 0:
+            return
+
+        # depth steps from the back of active. Everything else mostly from the front.
+        cold = loaded[:extra] if self.search_strategy == "depth" else loaded[-extra:]
+
+        for path in cold:
+            path.spill(self.store)
+
+    def __share(self, path, stepped):
+        """Lazy mode bookkeeping after path was stepped. If path was checked and possible, its model is tried on its unchecked
+        siblings. Paths it forked into become siblings of each other."""
+        siblings = self.__siblings.pop(path, None)
+
+        if siblings is not None and path.state.solver.trail.sat is True:
+            for sibling in siblings:
+                # Spilled siblings have their own solver family once loaded, so the model can't be shared anyway
+                if sibling is not path and not sibling.spilled and sibling.state.solver.trail.sat is None:
+                    path.state.solver.share(sibling.state.solver)
+
+        forked = [p for p, stash in stepped if stash == "active" and p is not path]
+        if len(forked) > 1:
+            group = weakref.WeakSet(forked)
+            for p in forked:
+                self.__siblings[p] = group
+
+    def __step_parallel(self, paths):
+        """Runs _step for each path in the worker pool. Paths that can't be serialized are stepped here instead."""
+        if self.__pool is None:
+            self.__pool = Pool(processes=self.workers)
+
+        jobs = []
+        for path in paths:
+            try:
+                jobs.append(self.__pool.apply_async(_step_serialized, (Serialize.dumps(path), Merge.barriers, self.lazy, self.stats is not None)))
+            except Exception as e:
+                logger.warning("step: Stepping path locally, it can't be serialized: {0}".format(e))
+                jobs.append(None)
+
+        results = []
+        for path, job in zip(paths, jobs):
+            if job is None:
+                results.append(_step(path, self.lazy))
                 continue
-        
-            # We have some return path
-            else:
-                for returnedPath in paths_ret:
-                    # Make sure the returned path is possible
-                    if not returnedPath.state.isSat():
-                        self.unstash(path=returnedPath,to_stash="deadended")
-                    else:
-                        # We found our next step in the path
-                        self.unstash(path=returnedPath,to_stash="active")
+
+            stepped, stats = Serialize.loads(job.get())
+            if stats is not None:
+                self.stats.merge(stats)
+            results.append(stepped)
+
+        return results
 
     @property
     def search_strategy(self):
-        """str: Strategy for searching the paths.
+        """str or Strategy: Strategy for searching the paths.
 
         Valid options are:
            - Breadth (default): Traditional searching. Step each path in order.
            - Depth: Drill one path down as far as possible.
            - Random: Randomize what paths get stepped and what order.
+           - A name from Strategy.STRATEGIES, a Strategy, or a function that scores paths (lowest first). These step the best path(s) each step. See Strategy.
         """
         return self.__search_strategy
 
@@ -156,11 +643,46 @@ class PathGroup:
     def search_strategy(self, search_strategy):
         if search_strategy == None:
             search_strategy = "breadth"
-        else:
+        elif type(search_strategy) is str:
             search_strategy = search_strategy.lower()
-        assert search_strategy in ["breadth", "depth", "random"], "Search strategy '{}' is not valid.".format(search_strategy)
+            if search_strategy in STRATEGIES:
+                search_strategy = STRATEGIES[search_strategy]()
+        elif not isinstance(search_strategy, Strategy) and callable(search_strategy):
+            search_strategy = Strategy(score=search_strategy)
+
+        assert isinstance(search_strategy, Strategy) or search_strategy in ["breadth", "depth", "random"], "Search strategy '{}' is not valid.".format(search_strategy)
+
+        if isinstance(search_strategy, Strategy):
+            search_strategy.reset(self.active)
+
         self.__search_strategy = search_strategy
 
+    @property
+    def memory_budget(self):
+        """int: Most active paths kept in memory, or None for no limit. A count of paths, not of bytes. See pySym.Spill."""
+        return self.__memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, memory_budget):
+        assert memory_budget is None or (type(memory_budget) is int and memory_budget > 0), "Invalid memory_budget of {}".format(memory_budget)
+        self.__memory_budget = memory_budget
+
+    @property
+    def store(self):
+        """pySym.Spill.PathStore: Where this group spills paths to. Created on first use, in Config.PYSYM_SPILL_DIR."""
+        if self.__store is None:
+            self.__store = PathStore()
+        return self.__store
+
+    @property
+    def cfg(self):
+        """CFG: Control-flow graph of the script being explored. Built from the source of the active paths on first use. None if they have none."""
+        if self.__cfg is None:
+            source = next((path.source for path in self.active if path.source is not None), None)
+            if source is not None:
+                self.__cfg = CFG.from_source(source)
+        return self.__cfg
+
     @property
     def _project(self):
         """pySym Project that this is associated with."""
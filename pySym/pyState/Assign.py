@@ -29,6 +29,11 @@ def _handleAssignNum(target,value):
 
     varType,kwargs = duplicateSort(value)
 
+    # Symbolic index into a List. Stored without splitting if Config allows.
+    if type(target) is ast.Subscript and Subscript.store(state, target, value):
+        state.path.pop(0)
+        return [state]
+
     x = state.resolveObject(target,varType=varType,kwargs=kwargs)
     
     """
@@ -204,3 +209,4 @@ def handle(state,element):
     return ret
 
 from . import ReturnObject, duplicateSort
+from . import Subscript
@@ -52,17 +52,18 @@ def _handleNum(element,oldTarget):
         oldTargetVar, valueVar = z3Helpers.z3_matchLeftAndRight(oldTarget,value,op)
     
         if hasRealComponent(valueVar) or hasRealComponent(oldTargetVar):
-            parent[index] = Real(oldTarget.varName,ctx=state.ctx,state=state)
+            parent[index] = Real(oldTarget.varName,ctx=state.ctx,count=oldTarget.count,state=state)
             #newTargetVar = parent[index].getZ3Object(increment=True)
 
         elif type(valueVar) in [z3.BitVecRef,z3.BitVecNumRef]:
-            parent[index] = BitVec(oldTarget.varName,ctx=state.ctx,size=valueVar.size(),state=state)
+            parent[index] = BitVec(oldTarget.varName,ctx=state.ctx,size=valueVar.size(),count=oldTarget.count,state=state)
             #newTargetVar = parent[index].getZ3Object(increment=True)
     
         else:
-            parent[index] = Int(oldTarget.varName,ctx=state.ctx,state=state)
+            parent[index] = Int(oldTarget.varName,ctx=state.ctx,count=oldTarget.count,state=state)
             #newTargetVar = parent[index].getZ3Object(increment=True)
 
+        # Keep counting from the old version so the new one gets a fresh name
         newTargetObj = parent[index]
         newTargetObj.increment()
         newTargetVar = newTargetObj.getZ3Object()
@@ -7,6 +7,7 @@ from ..pyObjectManager.Real import Real
 from ..pyObjectManager.BitVec import BitVec
 from ..pyObjectManager.Char import Char
 from ..pyObjectManager.String import String
+from . import Seq
 
 
 logger = logging.getLogger("pyState:Compare")
@@ -139,6 +140,87 @@ def _handleLeftVarInt(state,element,left):
     return ret
     
 
+def _contains(haystack,needle):
+    """
+    Builds the constraint that the Chars of needle show up somewhere in the Chars of haystack, a Char at a time.
+    Returns a python bool if it's decided by the lengths alone.
+    """
+    if len(needle) == 0:
+        return True
+
+    windows = []
+    for i in range(len(haystack) - len(needle) + 1):
+        windows.append(z3.And([h.getZ3Object() == n.getZ3Object() for h,n in zip(haystack[i:i+len(needle)],needle)]))
+
+    if len(windows) == 0:
+        return False
+
+    return windows[0] if len(windows) == 1 else z3.Or(windows)
+
+
+def _handleIn(state,element,left):
+    """
+    Input:
+        state = State object for the evaluation of the compare
+        element = ast element object for the compare (type ast.Compare)
+        left = Resolved left side. Must be a String or Char
+    Action:
+        Handle "in" and "not in" where the right side is a String
+        ex: if "ab" in s
+    Return:
+        Created constraint expressions for True state, or ReturnObject if we're waiting on a call
+    """
+
+    if len(element.ops) > 1 or len(element.comparators) > 1:
+        err = "_handleIn: Don't know how to handle multiple operations '{0}' at line {1} column {2}".format(element.ops,element.lineno,element.col_offset)
+        logger.error(err)
+        raise Exception(err)
+
+    ops = element.ops[0]
+
+    if type(left) not in [String, Char]:
+        err = "_handleIn: Don't know how to handle type '{0}'".format(type(left))
+        logger.error(err)
+        raise Exception(err)
+
+    right = state.resolveObject(element.comparators[0])
+
+    # normalize to list
+    right = right if type(right) is list else [right]
+
+    # Resolve calls if we need to
+    retObjs = [x for x in right if type(x) is pyState.ReturnObject]
+    if len(retObjs) > 0:
+        return retObjs
+
+    ret = []
+
+    for r in right:
+
+        if type(r) is not String:
+            err = "_handleIn: Don't know how to handle type '{0}'".format(type(r))
+            logger.error(err)
+            raise Exception(err)
+
+        # Don't clutter up z3!
+        if left.isStatic() and r.isStatic():
+            found = left.getValue() in r.getValue()
+
+        elif Seq.enabled(state):
+            found = z3.Contains(Seq.to_seq(state,r), Seq.to_seq(state,left))
+
+        else:
+            found = _contains(r.variables,left.variables if type(left) is String else [left])
+
+        if type(ops) == ast.In:
+            ret += [found]
+
+        else:
+            ret += [not found if type(found) is bool else z3.Not(found)]
+
+    return ret
+
+
 def handle(state,element,ctx=None):
     """Attempt to handle the Python Compare element
     
@@ -193,6 +275,10 @@ def handle(state,element,ctx=None):
     # Loop through possibilities
     for l in left:
     
+        if type(element.ops[0]) in [ast.In, ast.NotIn]:
+            ret += _handleIn(state,element,l)
+            continue
+
         # TODO: Probably need to add checks or consolidate here...
         ret += _handleLeftVarInt(state,element,l)
 
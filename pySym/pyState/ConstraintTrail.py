@@ -0,0 +1,884 @@
+"""
+Copy-on-write constraint storage for State.
+
+Rather than every State owning (and translating on copy) its own z3 solver,
+constraints are kept as an immutable, append-only linked list. Forked States
+share their common prefix, and one real z3 solver per family is moved between
+trail nodes with push/pop only when a query actually runs.
+"""
+
+import z3
+import time
+import logging
+from collections import OrderedDict
+from .QueryCache import QueryCache
+from .SolverFactory import classify, query_features, query_class
+from ..PersistentMap import PersistentMap
+from .. import Config
+from .. import Profiler
+
+logger = logging.getLogger("pyState:ConstraintTrail")
+
+
+class SolverUnknown(Exception):
+    """Raised when z3 can't decide a query, or the path is out of solver time."""
+
+    def __init__(self, reason, time=0.0):
+        """
+        Args:
+            reason (str): Why the query went unanswered.
+            time (float): Total solver time spent by the path so far, in seconds.
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.time = time
+
+
+def symbols(expr):
+    """Finds the symbols a z3 expression depends on.
+
+    Args:
+        expr (z3.ExprRef or bool): Expression to walk.
+
+    Returns:
+        frozenset: Names of the constants and uninterpreted functions used in expr.
+    """
+    if type(expr) is bool:
+        return frozenset()
+
+    out = set()
+    seen = set()
+    todo = [expr]
+
+    while todo:
+        e = todo.pop()
+        i = e.get_id()
+        if i in seen:
+            continue
+        seen.add(i)
+
+        if z3.is_app(e) and e.decl().kind() == z3.Z3_OP_UNINTERPRETED:
+            out.add(str(e) if e.num_args() == 0 else e.decl().name())
+
+        todo.extend(e.children())
+
+    return frozenset(out)
+
+
+def _find(parents, x):
+    """Union-find lookup with path halving."""
+    while parents.setdefault(x, x) != x:
+        parents[x] = parents[parents[x]]
+        x = parents[x]
+    return x
+
+
+def independent_slice(constraints, syms):
+    """Picks the constraints that transitively share symbols with syms.
+
+    Args:
+        constraints (list): List of (constraint, symbols) tuples.
+        syms (set): Symbols of the query being sliced for.
+
+    Returns:
+        list: Constraints from the given list that the query depends on, in order.
+    """
+    if len(syms) == 0:
+        return []
+
+    parents = {}
+    for _, c_syms in constraints:
+        it = iter(c_syms)
+        first = next(it, None)
+        for sym in it:
+            parents[_find(parents, sym)] = _find(parents, first)
+
+    syms = iter(syms)
+    root = _find(parents, next(syms))
+    for sym in syms:
+        parents[_find(parents, sym)] = root
+    root = _find(parents, root)
+
+    return [c for c, c_syms in constraints if len(c_syms) > 0 and _find(parents, next(iter(c_syms))) == root]
+
+
+class ConstraintTrail:
+    """
+    Immutable node in a linked list of constraints. The root node holds no constraint.
+    """
+
+    __slots__ = ['constraint', 'parent', 'depth', 'root', 'sat', '__symbols', '__weakref__']
+
+    def __init__(self, constraint=None, parent=None):
+        """
+        Args:
+            constraint (z3.BoolRef, optional): Constraint this node adds on top of its parent.
+            parent (ConstraintTrail, optional): Node this one extends. None for a root.
+        """
+        self.constraint = constraint
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.root = self if parent is None else parent.root
+        # Cached satisfiability of the whole trail up to here. None if not known yet.
+        self.sat = True if parent is None else None
+        self.__symbols = None
+
+    def append(self, *constraints):
+        """Returns a new trail with the given constraints on top of this one. This trail is not modified."""
+        node = self
+        for constraint in constraints:
+            node = ConstraintTrail(constraint, node)
+        return node
+
+    def constraints(self, stop=None):
+        """Returns the list of constraints on this trail, oldest first.
+
+        Args:
+            stop (ConstraintTrail, optional): Ancestor to stop at (exclusive). Defaults to the root.
+
+        Returns:
+            list: z3 constraints between stop and this node.
+        """
+        out = []
+        node = self
+        while node is not stop and node.parent is not None:
+            out.append(node.constraint)
+            node = node.parent
+        out.reverse()
+        return out
+
+    @property
+    def symbols(self):
+        """frozenset: Symbols used by this node's constraint. Computed once and shared by every fork."""
+        if self.__symbols is None:
+            self.__symbols = symbols(self.constraint) if self.parent is not None else frozenset()
+        return self.__symbols
+
+    def known_sat(self, skip_unsat=False):
+        """Finds the nearest node on this trail with a known satisfiability.
+
+        Args:
+            skip_unsat (bool, optional): Only return nodes known to be satisfiable.
+
+        Returns:
+            ConstraintTrail: The nearest node whose sat attribute is not None. The root is always satisfiable.
+        """
+        node = self
+        while node.sat is None or (skip_unsat and node.sat is False):
+            node = node.parent
+        return node
+
+    def ancestor(self, depth):
+        """Returns the ancestor of this node at the given depth."""
+        assert 0 <= depth <= self.depth, "Invalid ancestor depth of {}".format(depth)
+
+        node = self
+        while node.depth > depth:
+            node = node.parent
+        return node
+
+    def is_ancestor_of(self, other):
+        """bool: True if this node is other or one of its ancestors."""
+        return self.depth <= other.depth and other.ancestor(self.depth) is self
+
+    def common_ancestor(self, other):
+        """Returns the deepest node that is an ancestor of both this node and other, or None if they have different roots."""
+        if self.root is not other.root:
+            return None
+
+        a = self.ancestor(min(self.depth, other.depth))
+        b = other.ancestor(a.depth)
+        while a is not b:
+            a = a.parent
+            b = b.parent
+        return a
+
+    def __len__(self):
+        return self.depth
+
+    def __iter__(self):
+        return iter(self.constraints())
+
+
+class SharedSolver:
+    """
+    One z3 solver shared by every trail grown from the same root.
+
+    The solver's scope stack mirrors a chain of trail nodes. Moving it to a new
+    node pops back to the nearest scope that is an ancestor of that node and
+    pushes only the missing constraints.
+    """
+
+    __slots__ = ['solver', 'scopes', 'cache', 'unique', 'features', 'query_class', 'timeout', '__guards', '__factory', '__routed', '__scratch',
+                 'retargets', 'reused', 'sliced']
+
+    def __init__(self, factory, cache=None):
+        """
+        Args:
+            factory (callable): Returns a fresh z3 solver when called. A SolverFactory is also told the class of queries the solver is for.
+            cache (QueryCache, optional): Query cache to use. PathGroup swaps in its own so every path shares one.
+        """
+        self.__factory = factory
+        self.__routed = hasattr(factory, "route")
+        self.solver = None
+        self.scopes = []
+        # Theories used by everything pushed on the solver, and the query class they make
+        self.features = frozenset()
+        self.query_class = "bool"
+        # Time limit the solver was made with, in milliseconds
+        self.timeout = None
+        self.cache = QueryCache() if cache is None else cache
+        self.__scratch = {}
+
+        # Uniqueness answers. ast id -> (expr, symbols, [(trail, result), ...])
+        self.unique = OrderedDict()
+
+        # Guard literal for each retractable constraint. ast id -> (constraint, guard)
+        self.__guards = {}
+
+        # Simple statistics
+        self.retargets = 0
+        self.reused = 0
+        self.sliced = 0
+
+    def __new(self, query_class, timeout):
+        if self.__routed:
+            return self.__factory(query_class, timeout)
+
+        solver = self.__factory()
+        if timeout is not None:
+            solver.set("timeout", timeout)
+        return solver
+
+    def __route(self, query_class):
+        return repr(self.__factory.route(query_class)) if self.__routed else None
+
+    def scratch(self, query_class="bool", timeout=None):
+        """z3.Solver: Solver with nothing asserted, for a one-off query of the given class. Callers must push/pop around use.
+        Checks on it give up after timeout milliseconds."""
+        key = (self.__route(query_class), timeout)
+
+        solver = self.__scratch.get(key)
+        if solver is None:
+            solver = self.__scratch[key] = self.__new(query_class, timeout)
+        return solver
+
+    def record(self, query_class, seconds):
+        """Passes query timing on to the factory's stats, if it keeps any."""
+        if self.__routed:
+            self.__factory.record(query_class, seconds)
+
+    def guard(self, constraint):
+        """z3.BoolRef: Guard literal for a retractable constraint. The same constraint always gets the same guard."""
+        entry = self.__guards.get(constraint.get_id())
+        if entry is None:
+            entry = (constraint, z3.Bool("pySym!guard!{}".format(len(self.__guards))))
+            self.__guards[constraint.get_id()] = entry
+        return entry[1]
+
+    def guarded(self, key):
+        """z3.BoolRef: Retractable constraint with the given ast id. It must have been given a guard already."""
+        return self.__guards[key][0]
+
+    def __getstate__(self):
+        """Pickle support, see pySym.Serialize. Only the factory and guards are kept. The z3 solvers and caches start over."""
+        return {"factory": self.__factory, "guards": list(self.__guards.values())}
+
+    def __setstate__(self, state):
+        self.__init__(state["factory"])
+        for constraint, guard in state["guards"]:
+            self.__guards[constraint.get_id()] = (constraint, guard)
+
+    def retarget(self, trail, timeout=None):
+        """Returns the z3 solver with exactly the constraints of the given trail asserted.
+
+        Args:
+            trail (ConstraintTrail): Trail node to move the solver to.
+            timeout (int, optional): Longest a check on the solver may run, in milliseconds. A solver made with another limit is started over.
+
+        Returns:
+            z3.Solver: The shared solver.
+        """
+        if self.solver is None or self.scopes[0] is not trail.root or self.timeout != timeout:
+            self.timeout = timeout
+            self.solver = self.__new("bool", timeout)
+            self.scopes = [trail.root]
+            self.features = frozenset()
+            self.query_class = "bool"
+
+        self.retargets += 1
+
+        # Walk our scopes top down until we hit one on the trail's own chain.
+        # Scope depths only decrease, so the trail is walked at most once.
+        keep = 0
+        node = trail
+        for i in range(len(self.scopes)-1, -1, -1):
+            scope = self.scopes[i]
+            if scope.depth > node.depth:
+                continue
+            node = node.ancestor(scope.depth)
+            if node is scope:
+                keep = i
+                break
+
+        pops = len(self.scopes) - 1 - keep
+        if pops > 0:
+            self.solver.pop(pops)
+            del self.scopes[keep+1:]
+
+        base = self.scopes[-1]
+        if base is trail:
+            self.reused += 1
+            return self.solver
+
+        delta = trail.constraints(stop=base)
+
+        self.features |= query_features(delta)
+        new_class = query_class(self.features)
+
+        # Outgrew what our solver was made for. Start over with one that covers everything.
+        if new_class != self.query_class:
+            if self.__route(new_class) != self.__route(self.query_class):
+                self.solver = self.__new(new_class, timeout)
+                self.scopes = [trail.root]
+                delta = trail.constraints()
+            self.query_class = new_class
+
+        self.solver.push()
+        self.solver.add(*delta)
+        self.scopes.append(trail)
+
+        return self.solver
+
+
+class TrailSolver:
+    """
+    Solver-like front end for a ConstraintTrail. Copying is O(1).
+
+    Constraints that may need to come back out are added with add_retractable.
+    Those go on the trail as guard -> constraint, and every check assumes the
+    guards that are still active. Retracting one just drops its guard.
+
+    Satisfiability recorded on trail nodes always means "with every guard on
+    the trail active". A solver with retracted guards still trusts sat answers
+    from the trail (it has fewer constraints), but not unsat ones, and does not
+    record either.
+    """
+
+    __slots__ = ['trail', '__shared', '__pushed', '__model', '__reuse', '__active', '__retracted', 'epoch',
+                 'timeout', 'budget', 'time', '__weakref__']
+
+    def __init__(self, factory=None, trail=None, shared=None, reuse=None, active=None, retracted=None, epoch=None, timeout=None, budget=None, time=0.0):
+        """
+        Args:
+            factory (callable, optional): Returns a fresh z3 solver. Required if shared is not given.
+            trail (ConstraintTrail, optional): Starting trail. Defaults to a new empty root.
+            shared (SharedSolver, optional): Solver shared with other TrailSolvers of this family.
+            reuse (tuple, optional): (model, trail) pair where model satisfies every constraint on trail.
+            active (PersistentMap, optional): Active retractable constraints. ast id -> guard.
+            retracted (PersistentMap, optional): Retracted constraints whose guards are still on the trail. ast id -> guard.
+            epoch (object, optional): Token that changes whenever guards are retracted or re-activated.
+            timeout (int, optional): Longest a single z3 query may run, in milliseconds. None for no limit.
+            budget (int, optional): Total z3 time this solver and its copies may use, in milliseconds. None for no limit.
+            time (float, optional): Seconds of z3 time already spent.
+        """
+        assert factory is not None or shared is not None, "TrailSolver needs either a factory or a shared solver."
+
+        self.trail = ConstraintTrail() if trail is None else trail
+        self.__shared = SharedSolver(factory) if shared is None else shared
+        self.__pushed = []
+        self.__model = None
+        self.__reuse = reuse
+        self.__active = PersistentMap() if active is None else active
+        self.__retracted = PersistentMap() if retracted is None else retracted
+        self.epoch = object() if epoch is None else epoch
+        self.timeout = timeout
+        self.budget = budget
+        self.time = time
+
+    def add(self, *constraints):
+        """Adds constraints to this solver only. Copies are unaffected."""
+        flat = []
+        for constraint in constraints:
+            if type(constraint) in [list, tuple]:
+                flat += constraint
+            else:
+                flat.append(constraint)
+        self.trail = self.trail.append(*flat)
+
+    def add_retractable(self, *constraints):
+        """Adds constraints that can be taken back out with retract without rebuilding anything."""
+        for constraint in constraints:
+            if type(constraint) is bool:
+                if not constraint:
+                    self.add(constraint)
+                continue
+
+            key = constraint.get_id()
+            if key in self.__active:
+                continue
+
+            guard = self.__retracted.get(key)
+
+            # Guarded implication is already on the trail. Just turn it back on.
+            if guard is not None:
+                self.__retracted = self.__retracted.delete(key)
+                self.epoch = object()
+
+            else:
+                guard = self.__shared.guard(constraint)
+                self.trail = self.trail.append(z3.Implies(guard, constraint))
+
+            self.__active = self.__active.set(key, guard)
+
+    def retract(self, *constraints):
+        """Retracts constraints added with add_retractable. Others are ignored.
+
+        Returns:
+            int: Number of constraints retracted.
+        """
+        count = 0
+
+        for constraint in constraints:
+            if type(constraint) is bool:
+                continue
+
+            key = constraint.get_id()
+            guard = self.__active.get(key)
+            if guard is None:
+                continue
+
+            self.__active = self.__active.delete(key)
+            self.__retracted = self.__retracted.set(key, guard)
+            self.epoch = object()
+            count += 1
+
+        return count
+
+    def is_retractable(self, constraint):
+        """bool: True if constraint was added with add_retractable and is still active."""
+        return type(constraint) is not bool and constraint.get_id() in self.__active
+
+    def guards(self):
+        """list: Guard literals of the active retractable constraints."""
+        return list(self.__active.values())
+
+    def assertions(self):
+        """list: Constraints currently asserted, oldest first. Retractable constraints show up as guard -> constraint."""
+        return self.trail.constraints()
+
+    def push(self):
+        """Saves the current trail so it can be returned to with pop."""
+        self.__pushed.append(self.trail)
+
+    def pop(self, num=1):
+        """Returns to the trail saved by the num'th last push."""
+        for _ in range(num):
+            self.trail = self.__pushed.pop()
+
+    def check(self, *assumptions):
+        """Checks the current trail. Returns z3.sat or z3.unsat.
+
+        Raises:
+            SolverUnknown: If z3 can't decide the query within our time limits.
+        """
+        cache = self.__shared.cache
+        guards = self.guards()
+
+        if len(assumptions) == 0:
+            constraints = self.assertions() + guards
+            cached = cache.lookup(constraints)
+            if cached is not None:
+                ret, self.__model = cached
+                self.__record(self.trail, ret, full_model=True)
+                return ret
+
+        solver = self.__shared.retarget(self.trail, self.__limit())
+        ret = self.__run(solver, self.__shared.query_class, *(guards + list(assumptions)))
+        self.__model = solver.model() if ret == z3.sat else None
+
+        if len(assumptions) == 0:
+            cache.insert(constraints, ret, self.__model)
+            self.__record(self.trail, ret, full_model=True)
+
+        return ret
+
+    def __record(self, trail, ret, full_model=False):
+        """Remember the satisfiability of a trail node.
+
+        Args:
+            trail (ConstraintTrail): Node that was checked.
+            ret (z3.CheckSatResult): Result of the check.
+            full_model (bool, optional): Our current model satisfies all of trail, so keep it for reuse.
+        """
+        if ret == z3.sat and full_model:
+            self.__reuse = (self.__model, trail)
+
+        # Answers with guards retracted say nothing about the trail as a whole
+        if len(self.__retracted) > 0:
+            return
+
+        if ret == z3.sat:
+            trail.sat = True
+        elif ret == z3.unsat:
+            trail.sat = False
+
+    def check_slice(self, extra_constraints=None, focus=None):
+        """Checks the current trail plus extra constraints, only sending z3 what the query depends on.
+
+        The nearest ancestor known to be satisfiable splits the trail. Anything
+        after it, along with any extra constraints, is the query. From the
+        satisfiable part, only the cluster of constraints that transitively
+        shares symbols with the query is sent along with it.
+
+        Args:
+            extra_constraints (list, optional): Constraints to temporarily add for this check.
+            focus (list, optional): z3 expressions the caller will evaluate in the model.
+
+        Returns:
+            z3.CheckSatResult: z3.sat or z3.unsat. On sat, model() is only
+            valid for the symbols of the query and the focus expressions.
+
+        Raises:
+            SolverUnknown: If z3 can't decide the query within our time limits.
+        """
+        extra_constraints = [] if extra_constraints is None else list(extra_constraints)
+        guards = self.guards()
+
+        known = self.trail.known_sat(skip_unsat=len(self.__retracted) > 0)
+
+        # A known unsat prefix means everything after it is unsat as well
+        if known.sat is False:
+            self.__model = None
+            return z3.unsat
+
+        # Everything is known and we don't need a model
+        if known is self.trail and len(extra_constraints) == 0 and focus is None:
+            return z3.sat
+
+        # Cheapest option first. Does the model we already have still work?
+        if self.__try_reuse(extra_constraints, guards):
+            return z3.sat
+
+        focus = [] if focus is None else focus
+
+        query = self.trail.constraints(stop=known) + extra_constraints
+
+        syms = set()
+        for node in self.__nodes(self.trail, known):
+            syms |= node.symbols
+        for expr in extra_constraints + list(focus):
+            syms |= symbols(expr)
+
+        # Guards come along only if what they guard is part of the slice
+        items = [(node.constraint, node.symbols) for node in self.__nodes(known, None)]
+        items += [(guard, frozenset((str(guard),))) for guard in guards]
+        cluster = independent_slice(items, syms)
+
+        guard_ids = set(guard.get_id() for guard in guards)
+        cluster_guards = [c for c in cluster if c.get_id() in guard_ids]
+        if len(cluster_guards) > 0:
+            cluster = [c for c in cluster if c.get_id() not in guard_ids]
+
+        # The query touches everything anyway. Use the incremental solver.
+        if len(cluster) == known.depth:
+            if len(extra_constraints) == 0:
+                return self.check()
+
+            self.push()
+            self.add(*extra_constraints)
+            try:
+                return self.check()
+            finally:
+                self.pop()
+
+        constraints = cluster + query + cluster_guards
+        cache = self.__shared.cache
+
+        # Maybe the last answer we got happens to satisfy this slice too
+        if self.__model is not None and self.__satisfies(self.__model, constraints):
+            cache.model_hits += 1
+            ret = z3.sat
+            cached = True
+
+        else:
+            cached = cache.lookup(constraints)
+            if cached is not None:
+                ret, self.__model = cached
+
+        if cached is None:
+            kind = classify(constraints)
+            solver = self.__shared.scratch(kind, self.__limit())
+            solver.push()
+            solver.add(*constraints)
+            try:
+                ret = self.__run(solver, kind)
+                self.__model = solver.model() if ret == z3.sat else None
+            finally:
+                solver.pop()
+
+            cache.insert(constraints, ret, self.__model)
+            self.__shared.sliced += 1
+
+        if len(extra_constraints) == 0:
+            self.__record(self.trail, ret)
+
+        return ret
+
+    def __limit(self):
+        """Time limit for the next query, in milliseconds, or None for no limit.
+
+        The limit is part of the z3 solver the query runs on, so it is the
+        query timeout capped by the whole budget rather than by what is left
+        of it. Otherwise every query would need a solver of its own. A query
+        can therefore overrun the budget, but the next one won't start.
+
+        Raises:
+            SolverUnknown: If the budget is used up.
+        """
+        if self.budget is None:
+            return self.timeout
+
+        if self.budget - self.time * 1000 <= 0:
+            raise SolverUnknown("solver budget of {}ms exhausted".format(self.budget), self.time)
+
+        return self.budget if self.timeout is None else min(self.timeout, self.budget)
+
+    def __run(self, solver, kind, *assumptions):
+        """Runs one z3 check of the given query class. The time limit is part of the solver, see __limit.
+
+        Raises:
+            SolverUnknown: If z3 returns unknown.
+        """
+        start = time.time()
+        try:
+            ret = solver.check(*assumptions)
+        finally:
+            elapsed = time.time() - start
+            self.time += elapsed
+            self.__shared.record(kind, elapsed)
+            if Profiler.current is not None:
+                Profiler.current.record("query", kind, elapsed)
+
+        if ret == z3.unknown:
+            raise SolverUnknown("solver returned unknown: {}".format(solver.reason_unknown()), self.time)
+
+        return ret
+
+    def __unaffected(self, node, syms):
+        """bool: True if nothing added to our trail after node is in the cluster of constraints that transitively shares symbols with syms.
+        A constraint on a related variable (say y, given x + y == 3) can fix x as well."""
+        newer = set(id(n) for n in self.__nodes(self.trail, node))
+        if len(newer) == 0:
+            return True
+
+        cluster = independent_slice([(n, n.symbols) for n in self.__nodes(self.trail, None)], syms)
+        return not any(id(n) in newer for n in cluster)
+
+    @staticmethod
+    def __nodes(trail, stop):
+        """Yields the nodes from trail up to (excluding) stop or the root."""
+        node = trail
+        while node is not stop and node.parent is not None:
+            yield node
+            node = node.parent
+
+    @staticmethod
+    def __satisfies(model, constraints):
+        """bool: True if every constraint evaluates to True under model."""
+        for constraint in constraints:
+            if type(constraint) is bool:
+                if not constraint:
+                    return False
+            elif not z3.is_true(model.eval(constraint, model_completion=True)):
+                return False
+        return True
+
+    def __try_reuse(self, extra_constraints, guards):
+        """Tries to answer a check from the model we are carrying around, without calling z3.
+
+        The reuse model satisfies every constraint up to some ancestor of our
+        trail, so only the constraints added since then (and any extra ones)
+        need to be evaluated under it. Active guards have to hold as well.
+
+        Returns:
+            bool: True if the model satisfies the current trail plus extra constraints.
+        """
+        if self.__reuse is None:
+            return False
+
+        model, covered = self.__reuse
+
+        if not covered.is_ancestor_of(self.trail):
+            return False
+
+        if not self.__satisfies(model, self.trail.constraints(stop=covered) + extra_constraints + guards):
+            return False
+
+        self.__model = model
+        self.__shared.cache.model_hits += 1
+
+        if len(extra_constraints) == 0:
+            self.__record(self.trail, z3.sat, full_model=True)
+
+        return True
+
+    def share(self, other):
+        """Offers the last full model of this solver to other, typically a sibling from the same fork.
+
+        The model satisfies every constraint up to where the two trails meet, so
+        other only has to evaluate what it added since then.
+
+        Args:
+            other (TrailSolver): Solver to settle.
+
+        Returns:
+            bool: True if the model satisfies other, which is now known to be satisfiable without asking z3.
+        """
+        if self.__reuse is None or other.__shared is not self.__shared:
+            return False
+
+        model, covered = self.__reuse
+        common = covered.common_ancestor(other.trail)
+        if common is None:
+            return False
+
+        old = other.__reuse
+        other.__reuse = (model, common)
+        if other.__try_reuse([], other.guards()):
+            return True
+
+        # Didn't work out. Leave other with the hint it had.
+        other.__reuse = old
+        return False
+
+    def is_unique(self, expr):
+        """Checks if expr can only take one value on the current trail.
+
+        Answers are remembered per trail node. An answer from an ancestor is
+        still good as long as none of the constraints added since then are in
+        the cluster that transitively shares symbols with expr, and no guards
+        were retracted or re-activated.
+
+        Args:
+            expr (z3.ExprRef): Expression to check.
+
+        Returns:
+            bool: True if expr has exactly one possible value. False if it has more or the trail is unsat.
+        """
+        memo = self.__shared.unique
+        key = expr.get_id()
+
+        entry = memo.get(key)
+        if entry is not None:
+            memo.move_to_end(key)
+            _, syms, answers = entry
+            for node, epoch, result in answers:
+                if epoch is self.epoch and node.is_ancestor_of(self.trail) and self.__unaffected(node, syms):
+                    return result
+        else:
+            syms = symbols(expr)
+            answers = []
+            memo[key] = (expr, syms, answers)
+            while len(memo) > Config.PYSYM_QUERY_CACHE_SIZE:
+                memo.popitem(last=False)
+
+        if self.check_slice(focus=[expr]) != z3.sat:
+            result = False
+        else:
+            value = self.model().eval(expr, model_completion=True)
+            result = self.check_slice([expr != value], focus=[expr]) == z3.unsat
+
+        # A handful of recent trails per expression covers siblings well enough
+        answers.insert(0, (self.trail, self.epoch, result))
+        del answers[8:]
+
+        return result
+
+    def model(self):
+        """z3.ModelRef: Model from the last satisfiable check."""
+        if self.__model is None:
+            raise z3.Z3Exception("model is not available")
+        return self.__model
+
+    def sexpr(self):
+        """str: SMT-LIB2 representation of the current assertions."""
+        solver = z3.Solver(ctx=self.ctx)
+        solver.add(*self.assertions())
+        return solver.sexpr()
+
+    def copy(self):
+        """Returns a TrailSolver sharing this trail, its guards, the underlying z3 solver and the model to reuse.
+        Time limits and time spent so far carry over."""
+        return TrailSolver(trail=self.trail, shared=self.__shared, reuse=self.__reuse, active=self.__active, retracted=self.__retracted, epoch=self.epoch,
+                timeout=self.timeout, budget=self.budget, time=self.time)
+
+    def __copy__(self):
+        return self.copy()
+
+    def join(self, other, selector):
+        """Returns a solver satisfied by anything that satisfies this solver or other.
+
+        The common prefix of the two trails is kept as is. What each side added
+        after it goes on top as selector -> this side and Not(selector) -> other's.
+
+        Args:
+            other (TrailSolver): Solver to join with.
+            selector (z3.BoolRef): Fresh boolean telling which side holds.
+
+        Returns:
+            TrailSolver: The joined solver, or None if the two don't share a z3 solver or their retractable constraints differ.
+        """
+        common = self.trail.common_ancestor(other.trail)
+
+        if common is None or other.__shared is not self.__shared:
+            return None
+
+        if set(self.__active.keys()) != set(other.__active.keys()) or set(self.__retracted.keys()) != set(other.__retracted.keys()):
+            return None
+
+        sides = []
+        for trail in [self.trail, other.trail]:
+            constraints = trail.constraints(stop=common)
+            sides.append(z3.And(*constraints) if len(constraints) > 0 else z3.BoolVal(True))
+
+        return TrailSolver(trail=common.append(z3.Implies(selector, sides[0]), z3.Implies(z3.Not(selector), sides[1])),
+                shared=self.__shared, active=self.__active, retracted=self.__retracted, epoch=self.epoch,
+                timeout=self.timeout, budget=self.budget, time=max(self.time, other.time))
+
+    def __getstate__(self):
+        """Pickle support, see pySym.Serialize. Pushed trails, models and reuse hints are dropped."""
+        return {
+            "trail": self.trail,
+            "shared": self.__shared,
+            "active": [self.__shared.guarded(key) for key in self.__active.keys()],
+            "retracted": [self.__shared.guarded(key) for key in self.__retracted.keys()],
+            "timeout": self.timeout,
+            "budget": self.budget,
+            "time": self.time,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(trail=state["trail"], shared=state["shared"], timeout=state["timeout"], budget=state["budget"], time=state["time"])
+
+        # ast ids are only good within a process, so the maps are keyed again here
+        for constraint in state["active"]:
+            self.__active = self.__active.set(constraint.get_id(), self.__shared.guard(constraint))
+        for constraint in state["retracted"]:
+            self.__retracted = self.__retracted.set(constraint.get_id(), self.__shared.guard(constraint))
+
+    def __str__(self):
+        return "[" + ", ".join(str(x) for x in self.assertions()) + "]"
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def ctx(self):
+        """z3.Context: Context constraints for this solver live in."""
+        return z3.main_ctx()
+
+    @property
+    def _shared(self):
+        """SharedSolver: The underlying solver shared by this family of trails."""
+        return self.__shared
@@ -0,0 +1,101 @@
+"""
+Fingerprints for spotting States that will behave the same from here on.
+
+Two States with the same fingerprint are at the same program point (line,
+call stack, loop and return bookkeeping) and bind every variable to the same
+versions of the same symbolic values. Whatever happens to one from here
+happens to the other, up to their path conditions. So if one path condition
+implies the other, the stronger State only explores things the weaker one
+will explore anyway, and can be dropped.
+
+Implication is only checked syntactically: path conditions are compared as
+sets of constraints. z3 hash-conses its terms, so equal constraints built by
+different States are the same term. A State whose constraints include all of
+another's (subsumed), or are the same (equivalent), is the redundant one.
+
+Fingerprints are cheap to build and hash. They don't look inside the AST
+nodes a State is about to run, so same_point should confirm a match.
+"""
+
+import logging
+
+logger = logging.getLogger("pyState:Fingerprint")
+
+
+def _value_key(value):
+    """Hashable key for a pyObjectManager object. Equal keys mean the same symbolic value, given the same path condition."""
+    t = type(value)
+
+    if t in [Int, Real]:
+        return (t.__name__, value.count, value.varName, value.ctx, value.value)
+
+    if t is BitVec:
+        return ("BitVec", value.count, value.varName, value.ctx, value.size, value.value)
+
+    if t is Char and value._clone is None:
+        return ("Char", _value_key(value.variable))
+
+    if t in [List, String]:
+        return (t.__name__, tuple(_value_key(x) for x in value.variables))
+
+    # Anything else only matches itself
+    return (t.__name__, id(value))
+
+
+def _position(state):
+    loop = state.loop.lineno if state.loop else None
+    frames = tuple((frame['ctx'], frame['retID'], len(frame['path']), frame['loop'].lineno if frame['loop'] else None) for frame in state.callStack)
+    return (state.lineno(), state.ctx, state.retID, len(state.path), loop, frames)
+
+
+def fingerprint(state):
+    """Fingerprints a State's program point and variable bindings. Its path condition isn't part of it, see constraint_set.
+
+    Args:
+        state (pySym.pyState.State): State to fingerprint.
+
+    Returns:
+        tuple: Hashable fingerprint. States that can behave differently from here on almost always get different ones.
+    """
+    manager = state.objectManager
+
+    bindings = tuple(sorted(
+        (ctx, name, _value_key(value))
+        for ctx, variables in manager.variables.items()
+        for name, value in variables.variables.items()))
+
+    returns = tuple(sorted((retID, _value_key(value)) for retID, value in manager.returnObjects.items()))
+
+    functions = tuple(sorted((name, node.lineno) for name, node in state.functions.items()))
+
+    return (_position(state), bindings, returns, functions)
+
+
+def constraint_set(state):
+    """frozenset: Path condition of a State as a set of z3 term ids, including its active retractable constraints."""
+    solver = state.solver
+    return frozenset(c.get_id() for c in solver.assertions() if type(c) is not bool) | frozenset(g.get_id() for g in solver.guards())
+
+
+def redundant(a, a_constraints, b, b_constraints):
+    """Checks if State a only explores what State b will. Fingerprints are assumed to match already.
+
+    Args:
+        a (pySym.pyState.State): State that might be redundant.
+        a_constraints (frozenset): constraint_set of a.
+        b (pySym.pyState.State): State that might cover it.
+        b_constraints (frozenset): constraint_set of b.
+
+    Returns:
+        bool: True if b's path condition is part of a's and both are at the same point.
+    """
+    return b_constraints <= a_constraints and Merge.same_point(a, b)
+
+
+from . import Merge
+from ..pyObjectManager.Int import Int
+from ..pyObjectManager.Real import Real
+from ..pyObjectManager.BitVec import BitVec
+from ..pyObjectManager.List import List
+from ..pyObjectManager.String import String
+from ..pyObjectManager.Char import Char
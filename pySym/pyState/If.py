@@ -1,7 +1,7 @@
 import logging
 import z3
 import ast
-from . import Compare, BoolOp, ReturnObject
+from . import Compare, BoolOp, ReturnObject, Merge
 from copy import copy
 
 logger = logging.getLogger("pyState:If")
@@ -137,6 +137,12 @@ def handle(state,element):
     if len(retObjs) > 0:
         return retObjs
 
+    # Join the branches back together right away if merging is on and they allow it
+    if len(trueConstraint) == 1:
+        merged = Merge.handle_if(state, element, trueConstraint[0])
+        if merged is not None:
+            return merged
+
     # Important to copy after Constraint generation since it may have added to the state!
     stateElse = state.copy()
 
@@ -0,0 +1,395 @@
+"""
+State merging at the join points of If statements.
+
+Normally an If forks the State and the two copies never meet again, so a
+loop around "if x[i]: count += 1" ends up with 2**n paths. With merging on
+(see Project.merge), an If whose branches are straight-line code runs both
+of them to the end right away, veritesting style, and joins the results into
+one State:
+
+    - Path conditions become a disjunction. Both sides keep their common
+      prefix and add selector -> their own constraints on top.
+    - Variables that ended up different get a new version that equals
+      z3.If(selector, this side, other side).
+
+Whether that pays off is decided by query count estimation: merging turns a
+variable that is concrete on either side into a symbolic one, which is bad
+if later conditions read it. In "qce" mode such a merge is only done if the
+number of upcoming conditions reading those variables is at most
+Config.PYSYM_MERGE_QCE_THRESHOLD. "always" merges whenever it can.
+
+Anything the merge can't express (branches defining different variables,
+lists of different lengths, loops or returns in a branch, nested forks that
+didn't merge, solver errors) falls back to the normal fork. So do branches
+with a line in stop_at, since no path ever sits on a line of a merged branch.
+PathGroup.explore stops at its find and avoid lines.
+
+Merging is only ever done between the two branches of one If, while it is
+being stepped. Paths that are already apart, such as the iterations leaving
+a While or For head or paths that reach the same line from different
+places, are never merged with each other. same_point only tells whether two
+States could be.
+"""
+
+import os
+import ast
+import z3
+import logging
+import itertools
+from copy import copy
+from contextlib import contextmanager
+from .. import Config
+
+logger = logging.getLogger("pyState:Merge")
+
+# Merge modes. None turns merging off.
+MODES = [None, "always", "qce"]
+
+# Statements that make a branch more than straight-line code
+_UNMERGEABLE = (ast.While, ast.For, ast.Return, ast.Break, ast.Continue, ast.FunctionDef, ast.ClassDef, ast.Yield, ast.YieldFrom)
+
+_selectors = itertools.count()
+
+# Lines that branches must not be merged over. See stop_at.
+barriers = frozenset()
+
+
+class _Unmergeable(Exception):
+    pass
+
+
+def mode(state):
+    """str: Merge mode for state. From its Project if it has one, otherwise Config.PYSYM_MERGE."""
+    project = state._project
+    return project.merge if project is not None else Config.PYSYM_MERGE
+
+
+def _selector():
+    """z3.BoolRef: New selector literal. Processes forked from each other can meet again, so the pid goes in the name."""
+    return z3.Bool("pySym!merge!{0}!{1}".format(os.getpid(), next(_selectors)))
+
+
+@contextmanager
+def stop_at(lines):
+    """Context in which If branches holding any of the given line numbers are forked instead of merged."""
+    global barriers
+    old = barriers
+    barriers = old | frozenset(line for line in lines if line is not None)
+    try:
+        yield
+    finally:
+        barriers = old
+
+
+def is_straight_line(stmts):
+    """bool: True if stmts have no loops, returns or other jumps, so running them ends at the statement after them."""
+    return not any(isinstance(node, _UNMERGEABLE) for stmt in stmts for node in ast.walk(stmt))
+
+
+def _has_barrier(stmts):
+    return len(barriers) > 0 and any(getattr(node, 'lineno', None) in barriers for stmt in stmts for node in ast.walk(stmt))
+
+
+#########################
+# Query count estimates #
+#########################
+
+def _conditions(node):
+    """Yields the condition expressions under node."""
+    for n in ast.walk(node):
+        if type(n) in [ast.If, ast.While, ast.Assert, ast.IfExp]:
+            yield n.test
+        elif type(n) is ast.For:
+            yield n.iter
+        elif type(n) is ast.comprehension:
+            yield n.iter
+            for test in n.ifs:
+                yield test
+
+
+def query_counts(state, stmts=None):
+    """Estimates which variables upcoming solver queries depend on.
+
+    Looks at the conditions of everything the state may still run: the rest of
+    its path, the loops and call stack it'll return to, and the functions
+    called from those.
+
+    Args:
+        state (pySym.pyState.State): State to look ahead from.
+        stmts (list, optional): Statements to look at instead of the state's path.
+
+    Returns:
+        dict: Variable name -> number of upcoming conditions that read it.
+    """
+    roots = list(state.path if stmts is None else stmts)
+    roots += [state.loop] if state.loop else []
+    for frame in state.callStack:
+        roots += frame['path']
+        roots += [frame['loop']] if frame['loop'] else []
+
+    counts = {}
+    seen = set()
+    todo = [root for root in roots if isinstance(root, ast.AST)]
+
+    while todo:
+        node = todo.pop()
+
+        for test in _conditions(node):
+            for n in (ast.walk(test) if isinstance(test, ast.AST) else []):
+                if type(n) is ast.Name:
+                    counts[n.id] = counts.get(n.id, 0) + 1
+
+        # Follow calls into the script's own functions
+        for n in ast.walk(node):
+            if type(n) is ast.Call and type(n.func) is ast.Name and n.func.id in state.functions and n.func.id not in seen:
+                seen.add(n.func.id)
+                todo.append(state.functions[n.func.id])
+
+    return counts
+
+
+###########
+# Merging #
+###########
+
+def _diff(x, y, name, out):
+    """Collects the scalars that differ between x and y into out as (name, x part, x value, y value, y part).
+
+    Raises:
+        _Unmergeable: If x and y differ in a way one z3.If can't describe.
+    """
+    if x is y:
+        return
+
+    if type(x) is not type(y):
+        raise _Unmergeable("{0} is a {1} on one side and {2} on the other".format(name, type(x).__name__, type(y).__name__))
+
+    if type(x) in [Int, Real, BitVec]:
+        if type(x) is BitVec and x.size != y.size:
+            raise _Unmergeable("{0} has different sizes".format(name))
+
+        a, b = x.getZ3Object(), y.getZ3Object()
+        if not a.eq(b):
+            out.append((name, x, a, b, y))
+
+    elif type(x) in [List, String]:
+        if len(x) != len(y) or x.count != y.count:
+            raise _Unmergeable("{0} has different lengths".format(name))
+
+        for i in range(len(x)):
+            _diff(x[i], y[i], name, out)
+
+    elif type(x) is Char:
+        # Chars carry retractable bounds. Only merge them if they're the same variable.
+        if x._clone is not None or y._clone is not None or not x.variable.getZ3Object().eq(y.variable.getZ3Object()):
+            raise _Unmergeable("{0} has different characters".format(name))
+
+    else:
+        raise _Unmergeable("Can't merge {0} of type {1}".format(name, type(x).__name__))
+
+
+def _is_concrete(value):
+    return z3.is_int_value(value) or z3.is_rational_value(value) or z3.is_bv_value(value)
+
+
+def _same_value(x, y):
+    try:
+        out = []
+        _diff(x, y, None, out)
+        return len(out) == 0
+    except _Unmergeable:
+        return False
+
+
+def _same_node(x, y):
+    """bool: True if two statements (or anything found in one) will run the same way. For loops keep their iterator in the node."""
+    if x is y:
+        return True
+
+    if type(x) is not type(y):
+        return False
+
+    if type(x) in [list, tuple]:
+        return len(x) == len(y) and all(_same_node(i, j) for i, j in zip(x, y))
+
+    if isinstance(x, ast.AST):
+        return all(_same_node(value, getattr(y, field, None)) for field, value in ast.iter_fields(x)) and \
+            getattr(x, 'lineno', None) == getattr(y, 'lineno', None)
+
+    if type(x) is pyState.ReturnObject:
+        return x.retID == y.retID
+
+    if type(x) in [Int, Real, BitVec, List, String, Char]:
+        return _same_value(x, y)
+
+    return x == y
+
+
+def same_point(a, b):
+    """bool: True if States a and b are at the same program point with the same call stack."""
+    if a.ctx != b.ctx or a.retID != b.retID or len(a.callStack) != len(b.callStack):
+        return False
+
+    if not _same_node(a.path, b.path) or not _same_node(a.loop, b.loop):
+        return False
+
+    for fa, fb in zip(a.callStack, b.callStack):
+        if fa['ctx'] != fb['ctx'] or fa['retID'] != fb['retID'] or not _same_node(fa['path'], fb['path']) or not _same_node(fa['loop'], fb['loop']):
+            return False
+
+    return True
+
+
+def merge(a, b, counts=None):
+    """Merges two States at the same program point into one.
+
+    Args:
+        a (pySym.pyState.State): First State. Neither State is modified.
+        b (pySym.pyState.State): Second State.
+        counts (dict, optional): Output of query_counts. If given, the merge is refused when variables that are
+            concrete on either side and differ are read by more than Config.PYSYM_MERGE_QCE_THRESHOLD upcoming conditions.
+
+    Returns:
+        pySym.pyState.State: State that covers both, or None if they couldn't or shouldn't be merged.
+    """
+    if not same_point(a, b):
+        return None
+
+    selector = _selector()
+    solver = a.solver.join(b.solver, selector)
+    if solver is None:
+        logger.debug("merge: Solvers can't be joined")
+        return None
+
+    merged = a.copy()
+    managers = [merged.objectManager, b.objectManager]
+    diffs = []
+
+    try:
+        # Contexts only one side has belong to calls that already returned
+        for ctx in set(managers[0].variables) & set(managers[1].variables):
+            x, y = managers[0].variables[ctx], managers[1].variables[ctx]
+
+            if set(x) != set(y):
+                raise _Unmergeable("Variables {0} are only defined on one side".format(set(x) ^ set(y)))
+
+            for name in x:
+                _diff(x[name], y[name], name, diffs)
+
+    except _Unmergeable as e:
+        logger.debug("merge: {0}".format(e))
+        return None
+
+    if counts is not None:
+        cost = sum(counts.get(name, 0) for name, _, va, vb, _ in diffs if _is_concrete(va) or _is_concrete(vb))
+        if cost > Config.PYSYM_MERGE_QCE_THRESHOLD:
+            logger.debug("merge: Would make variables read by {0} upcoming conditions symbolic".format(cost))
+            return None
+
+    # a's own constraints now only hold under the selector. Drop them from the index, but not ones the common prefix repeats.
+    common = solver.trail.parent.parent
+    kept = set(c.get_id() for c in common.constraints())
+    stale = [c for c in a.solver.trail.constraints(stop=common) if c.get_id() not in kept]
+
+    merged.solver = solver
+    merged._vars_in_solver = merged._vars_in_solver.remove(*stale).add(solver.trail.parent.constraint, solver.trail.constraint)
+
+    for name, x, va, vb, y in diffs:
+        # Names used by either side's versions are taken
+        x.increment()
+        x.count = max(x.count, y.count + 1)
+        merged.addConstraint(x.getZ3Object() == z3.If(selector, va, vb))
+
+    merged.maxCtx = max(a.maxCtx, b.maxCtx)
+    merged.maxRetID = max(a.maxRetID, b.maxRetID)
+
+    return merged
+
+
+def _run(state, stmts):
+    """Runs straight-line stmts from state until they're done.
+
+    Returns:
+        pySym.pyState.State: The State after stmts, or None if it forked, errored or took too long.
+    """
+    state.path = stmts
+    state.callStack = []
+    state.loop = None
+
+    for _ in range(Config.PYSYM_MERGE_MAX_STEPS):
+        if len(state.path) == 0 and len(state.callStack) == 0 and not state.loop:
+            return state
+
+        try:
+            states = state.step()
+        except Exception as e:
+            logger.debug("_run: Stopped by {0}".format(e))
+            return None
+
+        if len(states) != 1:
+            return None
+
+        state = states[0]
+
+    return None
+
+
+def handle_if(state, element, constraint):
+    """Runs both branches of an If and merges them, if merging is on and the branches allow it.
+
+    Args:
+        state (pySym.pyState.State): State sitting on element.
+        element (ast.If): The If.
+        constraint (z3.BoolRef): Condition for the body to run.
+
+    Returns:
+        list: The merged State, or None to fork as usual.
+    """
+    how = mode(state)
+
+    branches = element.body + element.orelse
+    if how is None or type(constraint) is bool or not is_straight_line(branches) or _has_barrier(branches):
+        return None
+
+    after = state.path[1:]
+    counts = query_counts(state, after) if how == "qce" else None
+
+    sides = []
+    for stmts, condition in [(element.body, constraint), (element.orelse, z3.Not(constraint))]:
+        side = state.copy()
+        side.addConstraint(condition)
+
+        try:
+            sat = side.isSat()
+        except Exception as e:
+            logger.debug("handle_if: {0}".format(e))
+            return None
+
+        # Only one way to go. Nothing to merge.
+        if not sat:
+            return None
+
+        side = _run(side, stmts)
+        if side is None:
+            return None
+        sides.append(side)
+
+    # Both sides ran from the same spot with an empty call stack, so put it back before comparing
+    for side in sides:
+        side.path = list(after)
+        side.callStack = state.copyCallStack()
+        side.loop = copy(state.loop)
+        side.ctx = state.ctx
+        side.retID = state.retID
+
+    merged = merge(sides[0], sides[1], counts)
+    return None if merged is None else [merged]
+
+
+from .. import pyState
+from ..pyObjectManager.Int import Int
+from ..pyObjectManager.Real import Real
+from ..pyObjectManager.BitVec import BitVec
+from ..pyObjectManager.List import List
+from ..pyObjectManager.String import String
+from ..pyObjectManager.Char import Char
@@ -0,0 +1,149 @@
+"""
+Counterexample cache for solver queries.
+
+Queries are keyed by the set of z3 AST ids of their constraints. z3 hash-conses
+terms, so structurally equal constraints built by different States share an id.
+The cache keeps a reference to every constraint it indexes, which keeps those
+ids from being reused while the entry lives.
+"""
+
+import z3
+import logging
+from collections import OrderedDict
+from .. import Config
+
+logger = logging.getLogger("pyState:QueryCache")
+
+
+class QueryCache:
+    """
+    LRU cache of sat/unsat results and models, shared by every State in a PathGroup.
+
+    Besides exact matches it answers the way KLEE's counterexample cache does:
+    if a subset of a query is known unsat, the query is unsat. If a superset is
+    known sat, its model satisfies the query as well.
+    """
+
+    __slots__ = ['max_size', 'hits', 'misses', 'model_hits', '__entries', '__postings', '__weakref__']
+
+    def __init__(self, max_size=None):
+        """
+        Args:
+            max_size (int, optional): Maximum number of cached queries. Defaults to Config.PYSYM_QUERY_CACHE_SIZE.
+        """
+        self.max_size = Config.PYSYM_QUERY_CACHE_SIZE if max_size is None else max_size
+        assert type(self.max_size) is int and self.max_size > 0, "Invalid query cache size of {}".format(self.max_size)
+
+        self.hits = 0
+        self.misses = 0
+        # Checks avoided because a model we already had satisfied the query
+        self.model_hits = 0
+
+        # key -> (result, model, constraints)
+        self.__entries = OrderedDict()
+        # ast id -> set of keys containing it
+        self.__postings = {}
+
+    @staticmethod
+    def key(constraints):
+        """frozenset: Canonical key for a list of constraints."""
+        return frozenset(c.get_id() for c in constraints if type(c) is not bool)
+
+    def lookup(self, constraints):
+        """Looks for a cached answer for the given constraints.
+
+        Args:
+            constraints (list): z3 constraints making up the query.
+
+        Returns:
+            tuple: (result, model) if the answer is known, None otherwise. model is None for unsat results.
+        """
+        # Plain bools and empty queries aren't worth caching
+        if any(type(c) is bool for c in constraints) or len(constraints) == 0:
+            return None
+
+        key = self.key(constraints)
+
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+        # Any known unsat subset makes us unsat
+        for other in self.__candidates(key, subset=True):
+            if self.__entries[other][0] == z3.unsat:
+                self.__entries.move_to_end(other)
+                self.hits += 1
+                return z3.unsat, None
+
+        # Any known sat superset has a model that works for us
+        for other in self.__candidates(key, subset=False):
+            if self.__entries[other][0] == z3.sat:
+                self.__entries.move_to_end(other)
+                self.hits += 1
+                return z3.sat, self.__entries[other][1]
+
+        self.misses += 1
+        return None
+
+    def insert(self, constraints, result, model=None):
+        """Records the answer for a query.
+
+        Args:
+            constraints (list): z3 constraints making up the query.
+            result (z3.CheckSatResult): z3.sat or z3.unsat. Anything else is ignored.
+            model (z3.ModelRef, optional): Model for sat results.
+        """
+        if result not in [z3.sat, z3.unsat] or len(constraints) == 0 or any(type(c) is bool for c in constraints):
+            return
+
+        key = self.key(constraints)
+
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+        else:
+            for i in key:
+                self.__postings.setdefault(i, set()).add(key)
+
+        self.__entries[key] = (result, model, tuple(constraints))
+
+        while len(self.__entries) > self.max_size:
+            old, _ = self.__entries.popitem(last=False)
+            for i in old:
+                postings = self.__postings[i]
+                postings.discard(old)
+                if len(postings) == 0:
+                    del self.__postings[i]
+
+    def __candidates(self, key, subset):
+        """Yields cached keys that are a subset (or superset) of key."""
+        if subset:
+            seen = set()
+            for i in key:
+                for other in self.__postings.get(i, ()):
+                    if other not in seen:
+                        seen.add(other)
+                        if other <= key:
+                            yield other
+
+        else:
+            # Supersets must show up in the postings of every id we have. Start from the smallest.
+            postings = [self.__postings.get(i, ()) for i in key]
+            for other in list(min(postings, key=len)):
+                if key <= other:
+                    yield other
+
+    def clear(self):
+        """Drops every cached query. Counters are kept."""
+        self.__entries.clear()
+        self.__postings.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __str__(self):
+        return "<QueryCache {0} entries, {1} hits, {2} misses, {3} model hits>".format(len(self), self.hits, self.misses, self.model_hits)
+
+    def __repr__(self):
+        return self.__str__()
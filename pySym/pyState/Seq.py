@@ -0,0 +1,112 @@
+"""
+z3 sequence view of Strings, for the "seq" string search mode.
+
+Strings are always stored as lists of Chars, and every String operation
+works on those Chars. The only exceptions are searches for a substring,
+String.index and "in", which is what the string_search option of Project
+picks the handling of. Under the default "chars" mode, String.index checks
+every window of the string with the solver and forks a State for each place
+the substring can be.
+
+Under the "seq" mode, those two searches turn the Chars into one z3 String
+term (a Concat of the static runs and a Unit per symbolic Char) and use
+z3's sequence theory instead. String.index becomes a single IndexOf
+constraint on a symbolic result, and "in" a single Contains, so the solver
+reasons about the string as a whole and nothing forks. The catch is that
+the index stays symbolic. Code that needs a concrete one (range(), zfill,
+str) takes it only once the path condition leaves it a single possible
+value, and raises otherwise. The mode is only a search accelerator.
+Everything else (len, concatenation, slicing, join, rstrip, zfill) is
+modelled on the Chars under both modes.
+
+The mode is picked per Project (see Project.string_search), falling back
+to Config.PYSYM_STRING_SEARCH for States without one.
+"""
+
+import logging
+import z3
+from .. import Config
+
+logger = logging.getLogger("pyState:Seq")
+
+MODES = ["chars", "seq"]
+
+
+def mode(state):
+    """str: String search mode the given State uses. One of MODES."""
+    project = state._project
+    return Config.PYSYM_STRING_SEARCH if project is None else project.string_search
+
+
+def enabled(state):
+    """bool: True if the given State uses the "seq" string search mode."""
+    return mode(state) == "seq"
+
+
+def _char(state, c):
+    """z3 String of length one holding Char c, or a python str if c is static."""
+    if c._clone is None and c.variable.value is not None:
+        return chr(c.variable.value)
+
+    # z3 is very slow to solve sequences built with Int2BV. Give the Char a byte that BV2Int ties to its Int instead.
+    value = c.getZ3Object()
+    byte = z3.BitVec("{0}!byte".format(value.decl().name()), 8)
+
+    # The byte is named after the Char's variable, so the tie only has to go in once per version of the Char
+    link = z3.BV2Int(byte) == value
+    if link.get_id() not in state._vars_in_solver.constraints(byte):
+        state.addConstraint(link)
+
+    return z3.Unit(byte)
+
+
+def to_seq(state, obj):
+    """Builds the z3 String term for a String, Char or python str.
+
+    Static runs of Chars become one StringVal. Looking at Char values doesn't
+    ask the solver, so a Char that is only static under the path condition
+    still becomes a Unit. Symbolic Chars get tied to their Unit by a
+    constraint added to state the first time they are converted.
+
+    Args:
+        state (pySym.pyState.State): State the term is used in.
+        obj (pySym.pyObjectManager.String.String, pySym.pyObjectManager.Char.Char or str): What to convert.
+
+    Returns:
+        z3.SeqRef: z3 String with the same contents.
+    """
+    if type(obj) is str:
+        return z3.StringVal(obj)
+
+    if type(obj) is Char:
+        part = _char(state, obj)
+        return z3.StringVal(part) if type(part) is str else part
+
+    if type(obj) is not String:
+        err = "to_seq: Don't know how to convert type {0}".format(type(obj))
+        logger.error(err)
+        raise Exception(err)
+
+    parts = []
+    run = ""
+
+    for c in obj:
+        part = _char(state, c)
+
+        if type(part) is str:
+            run += part
+            continue
+
+        if run != "":
+            parts.append(z3.StringVal(run))
+            run = ""
+        parts.append(part)
+
+    if run != "" or len(parts) == 0:
+        parts.append(z3.StringVal(run))
+
+    return parts[0] if len(parts) == 1 else z3.Concat(*parts)
+
+
+from ..pyObjectManager.String import String
+from ..pyObjectManager.Char import Char
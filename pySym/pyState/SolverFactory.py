@@ -0,0 +1,285 @@
+"""
+Builds the z3 solvers States run their queries on.
+
+Building z3's tactic graph is not free, so a factory builds it once and hands
+out solvers made from it. A Project owns one factory. States without a
+Project share a default one.
+
+Queries are classified by the theories they use so each can go to the
+solver that handles that kind of query best.
+"""
+
+import z3
+import logging
+from collections import OrderedDict
+from prettytable import PrettyTable
+from .. import Config
+
+logger = logging.getLogger("pyState:SolverFactory")
+
+
+# ast id -> (expr, frozenset of features). Holding expr keeps the id from being reused.
+_features = OrderedDict()
+
+# Feature -> query class when it's the only theory used
+_THEORIES = {"int": "lia", "real": "lra", "bv": "bv"}
+
+_NUMERAL_ARGS = [z3.Z3_OP_MUL, z3.Z3_OP_DIV, z3.Z3_OP_IDIV, z3.Z3_OP_MOD, z3.Z3_OP_REM, z3.Z3_OP_POWER]
+
+
+def _is_numeral(e):
+    return z3.is_int_value(e) or z3.is_rational_value(e) or z3.is_algebraic_value(e)
+
+
+def _own_features(e):
+    """Features of e itself, ignoring its children."""
+    out = set()
+
+    sort = e.sort_kind()
+    if sort == z3.Z3_INT_SORT:
+        out.add("int")
+    elif sort == z3.Z3_REAL_SORT:
+        out.add("real")
+    elif sort == z3.Z3_BV_SORT:
+        out.add("bv")
+    elif sort != z3.Z3_BOOL_SORT:
+        out.add("other")
+
+    if z3.is_app(e):
+        kind = e.decl().kind()
+
+        # Arithmetic stays linear while only one side isn't a number, and we never divide by a variable
+        if kind in _NUMERAL_ARGS:
+            args = e.children()
+            if sum(1 for c in args if not _is_numeral(c)) > 1 or (kind != z3.Z3_OP_MUL and not _is_numeral(args[-1])):
+                out.add("nonlinear")
+
+        # Anything uninterpreted beyond plain constants
+        elif kind == z3.Z3_OP_UNINTERPRETED and e.num_args() > 0:
+            out.add("other")
+
+    return out
+
+
+def features(expr):
+    """Finds which theories an expression uses. Memoized per sub-expression.
+
+    Args:
+        expr (z3.ExprRef or bool): Expression to classify.
+
+    Returns:
+        frozenset: Some of "int", "real", "bv", "nonlinear" and "other".
+    """
+    if type(expr) is bool:
+        return frozenset()
+
+    memo = _features
+    hit = memo.get(expr.get_id())
+    if hit is not None:
+        return hit[1]
+
+    todo = [(expr, False)]
+
+    while todo:
+        e, expanded = todo.pop()
+        i = e.get_id()
+
+        if i in memo:
+            continue
+
+        if not expanded and e.num_args() > 0:
+            todo.append((e, True))
+            todo.extend((c, False) for c in e.children() if c.get_id() not in memo)
+            continue
+
+        out = _own_features(e)
+        for c in e.children():
+            out |= memo[c.get_id()][1]
+
+        memo[i] = (e, frozenset(out))
+
+    result = memo[expr.get_id()][1]
+
+    while len(memo) > Config.PYSYM_QUERY_CACHE_SIZE * 4:
+        memo.popitem(last=False)
+
+    return result
+
+
+def query_features(constraints):
+    """frozenset: Union of the features of every constraint."""
+    out = frozenset()
+    for constraint in constraints:
+        out |= features(constraint)
+    return out
+
+
+def query_class(feats):
+    """Names the kind of query a set of features makes up.
+
+    Args:
+        feats (frozenset): Features, from features or query_features.
+
+    Returns:
+        str: One of "bool", "bv", "lia", "lra", "nonlinear" or "mixed".
+    """
+    theories = [theory for theory in _THEORIES if theory in feats]
+
+    if "other" in feats or len(theories) > 1:
+        return "mixed"
+
+    if "nonlinear" in feats:
+        return "nonlinear"
+
+    if len(theories) == 0:
+        return "bool"
+
+    return _THEORIES[theories[0]]
+
+
+def classify(constraints):
+    """str: Class of the query made up of the given constraints. See query_class."""
+    return query_class(query_features(constraints))
+
+
+def _build(chains):
+    """Builds an OrElse over tactic chains. Each chain is a tactic name or a list of them."""
+    built = [z3.Then(*chain) if type(chain) in [list, tuple] and len(chain) > 1 else z3.Tactic(chain if type(chain) is str else chain[0])
+             for chain in chains]
+    return built[0] if len(built) == 1 else z3.OrElse(*built)
+
+
+class SolverFactory:
+    """
+    Makes z3 solvers from cached tactic pipelines.
+
+    In "tactic" mode every solver is the configured OrElse chain of tactics.
+    In "logic" mode each query is classified (see classify) and gets whatever
+    its class is routed to. By default that's a plain incremental
+    z3.SolverFor(logic) for single linear theories, and the tactic chain for
+    nonlinear or mixed queries.
+
+    Either way, the factory counts queries and solver time per class.
+    """
+
+    __slots__ = ['tactics', 'mode', 'routes', 'stats', '__tactics', '__weakref__']
+
+    __default = None
+
+    def __init__(self, tactics=None, mode=None, routes=None):
+        """
+        Args:
+            tactics (list, optional): Tactic chains to try in order. Each is a str or a list of str run one after another. Defaults to Config.PYSYM_SOLVER_TACTICS.
+            mode (str, optional): "tactic" or "logic". Defaults to Config.PYSYM_SOLVER_MODE.
+            routes (dict, optional): Query class -> logic name, list of tactic chains, or None for the default tactics. Defaults to Config.PYSYM_SOLVER_ROUTES.
+        """
+        self.tactics = Config.PYSYM_SOLVER_TACTICS if tactics is None else tactics
+        self.mode = Config.PYSYM_SOLVER_MODE if mode is None else mode
+        self.routes = Config.PYSYM_SOLVER_ROUTES if routes is None else routes
+
+        assert type(self.tactics) in [list, tuple] and len(self.tactics) > 0, "Invalid tactics of {}".format(self.tactics)
+        assert self.mode in ["tactic", "logic"], "Invalid solver mode of {}".format(self.mode)
+        assert type(self.routes) is dict, "Invalid routes of {}".format(self.routes)
+
+        # query class -> [queries, seconds]
+        self.stats = {}
+        # repr of tactic chains -> z3.Tactic
+        self.__tactics = {}
+
+    @classmethod
+    def default(cls):
+        """SolverFactory: Shared factory for States that have no Project."""
+        if SolverFactory.__default is None:
+            SolverFactory.__default = cls()
+        return SolverFactory.__default
+
+    @property
+    def tactic(self):
+        """z3.Tactic: The default tactic pipeline. Built on first use and then kept."""
+        return self.__tactic(None)
+
+    def __tactic(self, chains):
+        key = None if chains is None else repr(chains)
+        tactic = self.__tactics.get(key)
+        if tactic is None:
+            tactic = self.__tactics[key] = _build(self.tactics if chains is None else chains)
+        return tactic
+
+    def route(self, query_class):
+        """What queries of a class run on.
+
+        Args:
+            query_class (str): Class from classify.
+
+        Returns:
+            str, list or None: Logic name for z3.SolverFor, tactic chains, or None for the default tactics.
+        """
+        if self.mode == "tactic":
+            return None
+        return self.routes.get(query_class)
+
+    def __call__(self, query_class=None, timeout=None):
+        """Makes a new solver.
+
+        Args:
+            query_class (str, optional): Class of the queries the solver is for, from classify. Only used in "logic" mode.
+            timeout (int, optional): Longest any one check of the solver may run, in milliseconds. z3 answers unknown after that.
+
+        Returns:
+            z3.Solver: Fresh solver with nothing asserted.
+        """
+        route = self.route(query_class)
+
+        if type(route) is str:
+            if timeout is None:
+                return z3.SolverFor(route)
+
+            # z3's SolverFor solvers refuse the timeout parameter. The general solver takes both it and the logic.
+            solver = z3.Solver()
+            solver.set("logic", route)
+            solver.set("timeout", timeout)
+            return solver
+
+        tactic = self.__tactic(route)
+
+        # Tactic solvers refuse the timeout parameter too, so the tactic gets z3's own time limit instead
+        return (tactic if timeout is None else z3.TryFor(tactic, timeout)).solver()
+
+    def record(self, query_class, seconds):
+        """Adds one query of the given class that took seconds to the stats."""
+        entry = self.stats.get(query_class)
+        if entry is None:
+            entry = self.stats[query_class] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def stats_table(self):
+        """PrettyTable: Queries, total and average solver time per query class."""
+        table = PrettyTable(field_names=["class", "solver", "queries", "time (s)", "avg (ms)"])
+        table.align = 'l'
+
+        for query_class, (queries, seconds) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            route = self.route(query_class)
+            table.add_row([
+                query_class,
+                route if type(route) is str else "tactics",
+                queries,
+                "{0:.3f}".format(seconds),
+                "{0:.2f}".format(seconds * 1000 / queries)])
+
+        return table
+
+    def __getstate__(self):
+        """Pickle support. Tactics are z3 objects, so they get built again on first use."""
+        return {"tactics": self.tactics, "mode": self.mode, "routes": self.routes, "stats": self.stats}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.__tactics = {}
+
+    def __str__(self):
+        return "<SolverFactory mode={0} tactics={1}>".format(self.mode, self.tactics)
+
+    def __repr__(self):
+        return self.__str__()
@@ -7,6 +7,7 @@ from ..pyObjectManager.Real import Real
 from ..pyObjectManager.BitVec import BitVec
 from ..pyObjectManager.List import List
 from ..pyObjectManager.String import String
+from ..pyObjectManager.Char import Char
 import itertools
 from copy import copy
 
@@ -14,6 +15,129 @@ logger = logging.getLogger("pyState:Subscript")
 
 from .. import Config
 
+
+def _array(sub_object):
+    """Builds a z3 Array holding the elements of a List or String, for indexing it with a symbolic value.
+
+    A List keeps the Array it last got in List.array, and gets it back as long as its elements are the same
+    z3 terms. The Array only ever depends on those terms, never on constraints, so copies and merged States
+    can share it.
+
+    Args:
+        sub_object (List or String): Object to index.
+
+    Returns:
+        tuple: (z3.ArrayRef from Int to the element sort, element type, kwargs for getVar), or None if the
+            elements aren't all Int, all BitVec of one size or all Char.
+    """
+    elements = list(sub_object)
+    if len(elements) == 0:
+        return None
+
+    varType, kwargs = pyState.duplicateSort(elements[0])
+    if varType not in [Int, BitVec, Char]:
+        return None
+
+    values = [element.getZ3Object() for element in elements]
+    sort = values[0].sort()
+    if any(type(element) is not varType for element in elements) or any(value.sort() != sort for value in values):
+        return None
+
+    # Holding on to the terms keeps their ids from being reused
+    if type(sub_object) is List and sub_object.array is not None and _ids(sub_object.array[0]) == _ids(values):
+        return sub_object.array[1], varType, kwargs
+
+    # Reads are kept in bounds, so what the rest of the array holds doesn't matter
+    array = z3.K(z3.IntSort(), values[0])
+    for i, value in enumerate(values[1:], 1):
+        array = z3.Store(array, i, value)
+
+    if type(sub_object) is List:
+        sub_object.array = (values, array)
+
+    return array, varType, kwargs
+
+
+def _ids(values):
+    """list: z3 AST ids of the given terms."""
+    return [value.get_id() for value in values]
+
+
+def _index(sub_index):
+    """z3.ArithRef: Symbolic index as an Int term. BitVec indexes are unsigned."""
+    if type(sub_index) is BitVec:
+        return z3.BV2Int(sub_index.getZ3Object())
+    return sub_index.getZ3Object()
+
+
+def _select(sub_object, sub_index):
+    """Reads sub_object[sub_index] for a symbolic index with one z3 Select, if the elements allow it. See _array.
+
+    Returns:
+        The new variable holding the element, or None to fall back to ite chains or state splitting.
+    """
+    array = _array(sub_object)
+    if array is None:
+        return None
+
+    array, varType, kwargs = array
+    state = sub_index.state
+    index = _index(sub_index)
+
+    tmpRetVar = state.getVar("tmpSymbolicIndexVar",varType=varType,kwargs=kwargs,ctx=1,softFail=True)
+    tmpRetVar.increment()
+
+    state.addConstraint(index >= 0, index < len(sub_object))
+    state.addConstraint(tmpRetVar.getZ3Object() == z3.Select(array, index))
+
+    return tmpRetVar
+
+
+def store(state, element, value):
+    """Handles "l[i] = value" with a symbolic i as one z3 Store, if Config.PYSYM_SYMBOLIC_LIST_ARRAYS is on.
+
+    Every element of l gets a new version equal to its slot in the stored array, so nothing splits and
+    no solver queries are made. Only "l[i]" with plain names is taken, so looking them up here and again
+    on the normal way has no side effects.
+
+    Args:
+        state (pySym.pyState.State): State to assign in. It is changed in place.
+        element (ast.Subscript): Assignment target.
+        value (Int or BitVec): Resolved value to assign.
+
+    Returns:
+        bool: True if the assignment was done. False if it has to go the normal way, because the option is off,
+            the target isn't "l[i]", the index is concrete, or l isn't a List of value's type.
+    """
+    if not Config.PYSYM_SYMBOLIC_LIST_ARRAYS or type(element.slice) is not ast.Index or type(element.value) is not ast.Name \
+            or type(element.slice.value) is not ast.Name:
+        return False
+
+    sub_objects = state.resolveObject(element.value)
+    sub_indexs = state.resolveObject(element.slice.value)
+
+    if len(sub_objects) != 1 or len(sub_indexs) != 1:
+        return False
+
+    sub_object, sub_index = sub_objects[0], sub_indexs[0]
+
+    if type(sub_object) is not List or type(sub_index) not in [Int, BitVec] or sub_index.isStatic():
+        return False
+
+    array = _array(sub_object)
+    if array is None or array[1] is not type(value) or (type(value) is BitVec and value.size != array[2]['size']):
+        return False
+
+    array = z3.Store(array[0], _index(sub_index), value.getZ3Object())
+    state.addConstraint(_index(sub_index) >= 0, _index(sub_index) < len(sub_object))
+
+    for i, var in enumerate(sub_object):
+        var.increment()
+        state.addConstraint(var.getZ3Object() == z3.Select(array, i))
+
+    return True
+
+
 def _handleIndex(state,sub_object,sub_slice):
 
     if type(sub_object) not in [List, String]:
@@ -45,6 +169,13 @@ def _handleIndex(state,sub_object,sub_slice):
         # Truly symbolic index. Example: array[x] where x can be multiple values at that point
         else:
 
+            # One Select over the whole list, without asking the solver about each index
+            if Config.PYSYM_SYMBOLIC_LIST_ARRAYS:
+                var = _select(sub_object, sub_index)
+                if var is not None:
+                    ret.append(var)
+                    continue
+
             # Because Z3 needs to know var type, we can only offload this onto z3 if all the valid vars inside this list are of the same type!
             varCount = 0
             varAllSameType = False
@@ -0,0 +1,144 @@
+"""
+Index of which constraints mention which variables.
+
+Variables and constraints are both identified by z3 AST id. z3 hash-conses
+terms, so the same variable always has the same id for as long as something
+references it. The index is persistent, so States share it when forking.
+"""
+
+import z3
+import logging
+from collections import OrderedDict
+from ..PersistentMap import PersistentMap
+from .. import Config
+
+logger = logging.getLogger("pyState:VarIndex")
+
+# ast id -> (expr, frozenset of variable ids). Holding expr keeps the id from being reused.
+_free_vars = OrderedDict()
+
+
+def free_vars(expr):
+    """Finds the variables a z3 expression depends on.
+
+    Results are memoized for every sub-expression, so constraints built on top
+    of each other are only walked once.
+
+    Args:
+        expr (z3.ExprRef or bool): Expression to walk.
+
+    Returns:
+        frozenset: AST ids of the uninterpreted constants used in expr.
+    """
+    if type(expr) is bool:
+        return frozenset()
+
+    memo = _free_vars
+    hit = memo.get(expr.get_id())
+    if hit is not None:
+        return hit[1]
+
+    todo = [(expr, False)]
+
+    while todo:
+        e, expanded = todo.pop()
+        i = e.get_id()
+
+        if i in memo:
+            continue
+
+        if z3.is_const(e):
+            out = frozenset((i,)) if e.decl().kind() == z3.Z3_OP_UNINTERPRETED else frozenset()
+
+        elif not expanded:
+            todo.append((e, True))
+            todo.extend((c, False) for c in e.children() if c.get_id() not in memo)
+            continue
+
+        else:
+            out = frozenset()
+            for c in e.children():
+                out |= memo[c.get_id()][1]
+
+        memo[i] = (e, out)
+
+    result = memo[expr.get_id()][1]
+
+    while len(memo) > Config.PYSYM_QUERY_CACHE_SIZE * 4:
+        memo.popitem(last=False)
+
+    return result
+
+
+_NONE = PersistentMap()
+
+
+class VarIndex:
+    """
+    Immutable map from variable to the set of constraints that mention it.
+    add and remove return new indexes.
+    """
+
+    __slots__ = ['__vars', '__weakref__']
+
+    def __init__(self, vars=None):
+        """
+        Args:
+            vars (PersistentMap, optional): variable id -> PersistentMap of constraint id -> constraint.
+        """
+        self.__vars = PersistentMap() if vars is None else vars
+
+    def add(self, *constraints):
+        """VarIndex: Copy of this index that also tracks the given constraints."""
+        vars = self.__vars
+
+        for constraint in constraints:
+            if type(constraint) is bool:
+                continue
+
+            c = constraint.get_id()
+            for var in free_vars(constraint):
+                vars = vars.set(var, vars.get(var, _NONE).set(c, constraint))
+
+        return self if vars is self.__vars else VarIndex(vars)
+
+    def remove(self, *constraints):
+        """VarIndex: Copy of this index that no longer tracks the given constraints."""
+        vars = self.__vars
+
+        for constraint in constraints:
+            if type(constraint) is bool:
+                continue
+
+            c = constraint.get_id()
+            for var in free_vars(constraint):
+                ids = vars.get(var)
+                if ids is None or c not in ids:
+                    continue
+                ids = ids.delete(c)
+                vars = vars.set(var, ids) if len(ids) > 0 else vars.delete(var)
+
+        return self if vars is self.__vars else VarIndex(vars)
+
+    def constraints(self, var):
+        """PersistentMap: AST id -> constraint for the tracked constraints that mention var."""
+        return self.__vars.get(var.get_id(), _NONE)
+
+    def __contains__(self, var):
+        return var.get_id() in self.__vars
+
+    def __len__(self):
+        return len(self.__vars)
+
+    def __copy__(self):
+        return self
+
+    def __getstate__(self):
+        """Pickle support. ast ids are only good within a process, so just the constraints are kept and indexed again on load."""
+        constraints = {}
+        for ids in self.__vars.values():
+            constraints.update(ids.items())
+        return {"constraints": list(constraints.values())}
+
+    def __setstate__(self, state):
+        self.__vars = VarIndex().add(*state["constraints"]).__vars
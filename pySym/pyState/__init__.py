@@ -8,6 +8,7 @@ import importlib
 from types import ModuleType
 import ntpath
 import pickle
+import time
 from ..pyObjectManager import ObjectManager
 from ..pyObjectManager.Int import Int
 from ..pyObjectManager.Real import Real
@@ -17,9 +18,10 @@ from ..pyObjectManager.Ctx import Ctx
 from ..pyObjectManager.String import String
 from ..pyObjectManager.Char import Char
 from ..Project import Project
-
-# Override z3 __copy__ so i can just use "copy()"
-z3.z3.Solver.__copy__ = lambda self: self.translate(self.ctx)
+from .ConstraintTrail import TrailSolver
+from .VarIndex import VarIndex
+from .SolverFactory import SolverFactory
+from .. import Profiler
 
 # The current directory for running pySym
 SCRIPTDIR = os.path.dirname(os.path.abspath(__file__))
@@ -305,7 +307,7 @@ class State:
         """
         (optional) path = list of sequential actions. Derived by ast.parse. Passed to state.
         (optional) backtrace = list of asts that happened before the current one
-        (optional) vars_in_solver = dict of list of variable strings that are in the solver. Do not set this manually.
+        (optional) vars_in_solver = VarIndex of the variables that are in the solver. Do not set this manually.
         (optional) project = pySym project file associated with this group. This will be auto-filled.
         """
 
@@ -315,7 +317,7 @@ class State:
         self.objectManager = objectManager if objectManager is not None else ObjectManager(state=self)
         self.solver = self.__new_solver() if solver is None else solver
         #self.solver.set("timeout", 60000) # 1 minute (in miliseconds) timeout for the solver
-        self._vars_in_solver = vars_in_solver if vars_in_solver is not None else dict()
+        self._vars_in_solver = vars_in_solver if vars_in_solver is not None else VarIndex()
         self.functions = {} if functions is None else functions
         self.simFunctions = {} if simFunctions is None else simFunctions
         self.retVar = self.getVar('ret',ctx=1,varType=Int) if retVar is None else retVar
@@ -338,8 +340,9 @@ class State:
         _temporary_refs.add(self)
 
     def __new_solver(self):
-        """Generates a new solver."""
-        return z3.OrElse('smt', z3.Then("simplify","propagate-ineqs","propagate-values","unit-subsume-simplify","smt","fail-if-undecided"),z3.Then("simplify","propagate-ineqs","propagate-values","unit-subsume-simplify","qfnra-nlsat")).solver()
+        """Generates a new solver. z3 solvers come from the project's SolverFactory, and only once a query actually needs one."""
+        factory = self._project.solver_factory if self._project is not None else SolverFactory.default()
+        return TrailSolver(factory=factory)
 
 
     def setVar(self,varName,var,ctx=None):
@@ -462,6 +465,10 @@ class State:
             ast.Assert: Assert,
             }
 
+        profiler = Profiler.current
+        if profiler is not None:
+            start = time.time()
+
         # Return initial return state
         state = self.copy()
         
@@ -483,7 +490,11 @@ class State:
 
         # Generically handle any instruction we know about
         if type(inst) in instructions:
-            ret_states = instructions[type(inst)].handle(state,inst)
+            # Straight to the handler unless profiling. This runs for every instruction.
+            if profiler is None:
+                ret_states = instructions[type(inst)].handle(state, inst)
+            else:
+                ret_states = Profiler.call("handler", type(inst).__name__, instructions[type(inst)].handle, state, inst)
 
         else:
             err = "step: Unhandled element of type {0} at Line {1} Col {2}".format(type(inst),inst.lineno,inst.col_offset)
@@ -494,6 +505,9 @@ class State:
         for state in ret_states:
             state.backtrace.insert(0,inst)
 
+        if profiler is not None:
+            profiler.record("line", inst.lineno, time.time() - start)
+
         # Assert we haven't changed
         assert h == hash(self)
 
@@ -1157,11 +1171,15 @@ class State:
         
         elif t == ast.BinOp:
             logger.debug("resolveObject: Resolving object type BinOp")
-            return BinOp.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return BinOp.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "BinOp", BinOp.handle, self, obj, ctx=ctx)
 
         elif t == ast.Subscript:
             logger.debug("resolveObject: Resolving object type Subscript")
-            return Subscript.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return Subscript.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "Subscript", Subscript.handle, self, obj, ctx=ctx)
 
         elif t == ReturnObject:
             logger.debug("resolveObject: Resolving return type object with ID: ret{0}".format(obj.retID))
@@ -1177,15 +1195,21 @@ class State:
 
         elif t == ast.ListComp:
             logger.debug("resolveObject: Resolving ListComprehension")
-            return ListComp.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return ListComp.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "ListComp", ListComp.handle, self, obj, ctx=ctx)
 
         elif t == ast.GeneratorExp:
             logger.debug("resolveObject: Resolving GeneratorExpression")
-            return GeneratorExp.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return GeneratorExp.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "GeneratorExp", GeneratorExp.handle, self, obj, ctx=ctx)
 
         elif t == ast.Compare:
             logger.debug("resolveObject: Resolving Compare")
-            return pyState.Compare.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return pyState.Compare.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "Compare", pyState.Compare.handle, self, obj, ctx=ctx)
 
         # Hack-ish solution to handle calls
         elif t == ast.Call:
@@ -1202,20 +1226,26 @@ class State:
             # If this is a simFunction
             if type(func) is ModuleType:
                 # Simple pass it off to the handler, filling in args as appropriate
-                return func.handle(self, obj, *obj.args,ctx=ctx)
+                if Profiler.current is None:
+                    return func.handle(self, obj, *obj.args, ctx=ctx)
+                name = func.__name__.replace("pySym.pyState.functions.", "")
+                return Profiler.call("simFunction", name, func.handle, self, obj, *obj.args, ctx=ctx)
 
             # If we get here, we're a normal symbolic function
             else:
                 # Change our state, record the return object
-                o = Call.handle(self,obj)
-                return o
+                if Profiler.current is None:
+                    return Call.handle(self, obj)
+                return Profiler.call("handler", "Call", Call.handle, self, obj)
             
 
         elif t == ast.UnaryOp:
             # TODO: Not sure if there will be symbolic UnaryOp objects... This wouldn't work for those.
             logger.debug("resolveObject: Resolving UnaryOp type object")
             #return ast.literal_eval(obj)
-            return UnaryOp.handle(self,obj,ctx=ctx)
+            if Profiler.current is None:
+                return UnaryOp.handle(self, obj, ctx=ctx)
+            return Profiler.call("handler", "UnaryOp", UnaryOp.handle, self, obj, ctx=ctx)
 
 
         else:
@@ -1244,43 +1274,38 @@ class State:
         if type(constraints) not in [list, tuple]:
             constraints = [constraints]
 
-        new_constraints = [assertion for assertion in self.solver.assertions() if assertion not in constraints]
+        # Retractable constraints just get their guard dropped
+        retracted = [constraint for constraint in constraints if self.solver.retract(constraint) == 1]
+        ret_code = len(retracted)
+        rest = [constraint for constraint in constraints if not any(constraint is r for r in retracted)]
+
+        if rest != []:
+            new_constraints = [assertion for assertion in self.solver.assertions() if assertion not in rest]
 
-        # If we have less, then we successfully removed at least one thing
-        ret_code = len(self.solver.assertions()) - len(new_constraints)
+            # If we have less, then we successfully removed at least one thing
+            removed = len(self.solver.assertions()) - len(new_constraints)
+
+            # Removing is costly. Don't rebuild solver if we don't have to.
+            if removed > 0:
+                # Trails are immutable. Start back at the root and re-add what's left.
+                self.solver.trail = self.solver.trail.root
+                self.solver.add(*new_constraints)
+                ret_code += removed
 
-        # Removing is costly. Don't rebuild solver if we don't have to.
         if ret_code == 0:
             return 0
 
-        self.solver = self.__new_solver()
-        self.addConstraint(*new_constraints)
-
         # Remove the vars from our set tracker
-        for constraint in constraints:
-            if type(constraint) is bool:
-                continue
-
-            for var in set(get_all(constraint)):
-                if type(var) not in [z3.z3.IntNumRef, z3.z3.BitVecNumRef]:
-                    var = str(var)
-
-                    if var in self._vars_in_solver:
-                        try:
-                            self._vars_in_solver[var].remove(str(constraint))
-                            if self._vars_in_solver[var] == set():
-                                self._vars_in_solver.pop(var)
-                        except KeyError:
-                            # Ignoring attempt to remove constraint that isn't tracked.
-                            pass
+        self._vars_in_solver = self._vars_in_solver.remove(*constraints)
 
         return ret_code
 
 
-    def addConstraint(self,*constraints):
+    def addConstraint(self,*constraints,retractable=False):
         """
         Input:
             constraints = Any number of z3 expressions to use as a constraint
+            (optional) retractable = True if these will likely be removed again. remove_constraints is then O(1) for them.
         Action:
             Add constraint given
         Returns:
@@ -1299,71 +1324,33 @@ class State:
             return constraints
 
         # Add our new constraint to the solver
-        self.solver.add(*constraints)
+        if retractable:
+            self.solver.add_retractable(*constraints)
+        else:
+            self.solver.add(*constraints)
 
         # Record that they are now in the solver somewhere
-        for constraint in constraints:
-
-            if type(constraint) is bool:
-                continue
-
-            for var in set(get_all(constraint)):
-
-                # Don't keep track of plain numbers. Only vars
-                if type(var) not in [z3.z3.IntNumRef, z3.z3.BitVecNumRef]:
-                    var = str(var)
-
-                    # Init the dict if need be
-                    if var not in self._vars_in_solver:
-                        self._vars_in_solver[var] = set()
-                        
-                    self._vars_in_solver[var].add(str(constraint))
+        self._vars_in_solver = self._vars_in_solver.add(*constraints)
 
 
-    def isSat(self,extra_constraints=None):
+    def isSat(self,extra_constraints=None,focus=None):
         """
         Input:
             extra_constraints: Optional list of extra constraints to temporarily add before checking for sat.
+            (optional) focus = z3 expressions the caller will evaluate in solver.model() afterwards
         Action:
             Checks if the current state is satisfiable
-            Note, it uses the local and global vars to create the solver on the fly
+            Only the constraints that share variables with the new constraints
+            (and the focus expressions) are sent to z3
         Returns:
             Boolean True or False
+            Raises SolverUnknown if z3 can't decide within the solver time limits
         """
 
-        solver = self.solver
-
-        if extra_constraints == None:
-            return solver.check() == z3.sat
-
-        if type(extra_constraints) not in [list, tuple]:
+        if extra_constraints is not None and type(extra_constraints) not in [list, tuple]:
             extra_constraints = [extra_constraints]
 
-        #
-        # Deal with extra constraints
-        #
-
-        # Determine if we can push and pop
-        try:
-            solver.push()
-            pushed = True
-        except:
-            pushed = False
-
-        # Prefer push/pop
-        if pushed:
-            # Add in the constraints
-            solver.add(*extra_constraints)
-            ret = solver.check() == z3.sat
-            # Pop off the constraints
-            solver.pop()
-            return ret
-
-        # Use translate method
-        else:
-            solver = solver.translate(solver.ctx)
-            solver.add(*extra_constraints)
-            return solver.check() == z3.sat
+        return self.solver.check_slice(extra_constraints,focus=focus) == z3.sat
         
 
     def printVars(self):
@@ -1375,8 +1362,8 @@ class State:
         Returns:
             Nothing
         """
-        # Populate model
-        if not self.isSat():
+        # Populate model. Need the full model here, not just a slice of it.
+        if self.solver.check() != z3.sat:
             print("State does not seem possible.")
             return
         
@@ -1492,60 +1479,28 @@ class State:
 
         """
 
-        try:
-            solver = self.solver
-            solver.push()
-            pushed = True
-        except:
-            pushed = False
+        solver = self.solver
+        solver.push()
 
         s = self
         varZ3Object = s.getVar(var,ctx=ctx).getZ3Object() if type(var) is str else var.getZ3Object()
         out = []
 
-        #
-        # Push method preferred
-        #
-        if pushed:
-            logger.debug("any_n_int: Using push/pop method.")
-
-            for i in range(n):
-
-                try:
-                    myInt = s.any_int(var,ctx=ctx)
-                except:
-                    #Looks like we're done
-                    break
-
-                if myInt == None:
-                    break
-                
-                out.append(myInt)
-                solver.add(varZ3Object != myInt)
-
-            solver.pop()
-
-        #
-        # Fall back to other method TODO: Update this to use translate instead.
-        # 
-
-        else:
-            logger.debug("any_n_int: Using legacy method.")
+        for i in range(n):
 
-            extra_constraints = []
+            try:
+                myInt = s.any_int(var,ctx=ctx)
+            except:
+                #Looks like we're done
+                break
 
-            for i in range(n):
-                try:
-                    myInt = s.any_int(var,ctx=ctx,extra_constraints=extra_constraints)
-                except:
-                    #Looks like we're done
-                    break
+            if myInt == None:
+                break
+            
+            out.append(myInt)
+            solver.add(varZ3Object != myInt)
 
-                if myInt == None:
-                    break
-                
-                out.append(myInt)
-                extra_constraints.append(varZ3Object != myInt)
+        solver.pop()
 
         return out
 
@@ -1586,6 +1541,37 @@ class State:
 
         return out
 
+    def is_unique(self,var,ctx=None):
+        """
+        Input:
+            var = variable name. i.e.: "x" --or-- ObjectManager object (i.e.: Int) --or-- z3 expression
+            (optional) ctx = context if not current one
+        Action:
+            Checks if var can only take one value under the current constraints.
+            Costs at most one solve for a value and one check that var can't be
+            anything else. Answers are remembered until a constraint touching
+            var is added.
+        Returns:
+            True if var has exactly one possible value, False otherwise
+            (including when the state is unsat)
+        """
+        # Grab appropriate ctx
+        ctx = ctx if ctx is not None else self.ctx
+
+        # Plain python values only have one value
+        if type(var) in [int, float, bool]:
+            return True
+
+        if type(var) is str:
+            var = self.getVar(var,ctx=ctx)
+
+        var = var if isinstance(var, z3.ExprRef) else var.getZ3Object()
+
+        if z3.is_int_value(var) or z3.is_rational_value(var) or z3.is_bv_value(var):
+            return True
+
+        return self.solver.is_unique(var)
+
 
     """
     def any_n_str(self,var,n,ctx=None):
@@ -1650,9 +1636,6 @@ class State:
             logger.debug("any_char: No valid model found")
             return None
 
-        # Get model
-        m = self.solver.model()
-
         # Return a possible string
         #return chr(m.eval(var.getZ3Object(),model_completion=True).as_long())
         return chr(int(var))
@@ -1673,22 +1656,21 @@ class State:
         # Grab appropriate ctx
         ctx = ctx if ctx is not None else self.ctx
 
-        # Solve model first
-        if not self.isSat():
-            logger.debug("any_str: No valid model found")
-            return None
-
-        # Get model
-        m = self.solver.model()
-
         # Check if we have it in our variable
         if type(var) is str and self.getVar(var,ctx=ctx) == None:
             logger.debug("any_str: var '{0}' not in known variables".format(var))
             return None
 
-
         # Resolve the variable
         var = self.getVar(var,ctx=ctx) if type(var) is str else var
+
+        # Solve model first
+        if not self.isSat(focus=[c.getZ3Object() for c in var]):
+            logger.debug("any_str: No valid model found")
+            return None
+
+        # Get model
+        m = self.solver.model()
         
         # Return a possible string
         return ''.join([chr(m.eval(c.getZ3Object(),model_completion=True).as_long()) for c in var])
@@ -1709,51 +1691,24 @@ class State:
         # Grab appropriate ctx
         ctx = ctx if ctx is not None else self.ctx
 
-        # Solve model first
-        if not self.isSat():
-            logger.debug("any_int: No valid model found")
-            # No valid ints
-            return None
-
-        # If we're adding temporary constraints, create a temporary solver
-        if extra_constraints is not None:
-            # Normalize it to a tuple if need be
-            if type(extra_constraints) not in [tuple, list]:
-                extra_constraints = (extra_constraints,)
-
-            # Try push/pop first
-            try:
-                solver = self.solver
-                solver.push()
-                pushed = True
-
-            # Fall back to translate
-            except:
-                solver = self.solver.translate(self.solver.ctx)
-                pushed = False
-
-            solver.add(*extra_constraints)
-
-            # Make sure this new situation is possible
-            if solver.check() != z3.sat:
-                if pushed:
-                    solver.pop()
-                return None
-
-            m = solver.model()
-
-            if pushed:
-                solver.pop()
-        
-        else:
-            m = self.solver.model()
-        
         # Check if we have it in our localVars
         if type(var) is str and self.getVar(var,ctx=ctx) == None:
             logger.debug("any_int: var '{0}' not in known variables".format(var))
             return None
 
         var = self.getVar(var,ctx=ctx).getZ3Object() if type(var) is str else var.getZ3Object()
+
+        # Normalize it to a tuple if need be
+        if extra_constraints is not None and type(extra_constraints) not in [tuple, list]:
+            extra_constraints = (extra_constraints,)
+
+        # Solve model first
+        if not self.isSat(extra_constraints,focus=[var]):
+            logger.debug("any_int: No valid model found")
+            # No valid ints
+            return None
+
+        m = self.solver.model()
         
         # Try getting the value
         value = m.eval(var,model_completion=True)
@@ -1814,15 +1769,6 @@ class State:
         # Grab appropriate ctx
         ctx = ctx if ctx is not None else self.ctx
 
-        # Solve model first
-        if not self.isSat():
-            logger.debug("any_real: No valid model found")
-            # No valid ints
-            return None
-
-        # Get model
-        m = self.solver.model()
-
         if type(var) is str:
             try:
                 self.getVar(var,ctx=ctx)
@@ -1832,6 +1778,15 @@ class State:
         
         var = self.getVar(var,ctx=ctx).getZ3Object() if type(var) is str else var.getZ3Object()
 
+        # Solve model first
+        if not self.isSat(focus=[var]):
+            logger.debug("any_real: No valid model found")
+            # No valid ints
+            return None
+
+        # Get model
+        m = self.solver.model()
+
         # Try getting the value
         value = m.eval(var,model_completion=True)
 
@@ -1858,26 +1813,19 @@ class State:
     def var_in_solver(self, var, ignore=None):
         """Checks if the variable given is in the z3 solver."""
         assert z3Helpers.isZ3Object(var), "Expected var to be z3 object, got type {} instead".format(type(var))
-        var = str(var)
-        
-        # No constraints for this var
-        if var not in self._vars_in_solver or self._vars_in_solver[var] is set():
-            return False
+        constraints = self._vars_in_solver.constraints(var)
 
-        # If we're ignoring, do the filter
+        # If we're ignoring, don't count those
         if ignore is not None:
 
             # Standardize ignore
             if type(ignore) not in [list, tuple]:
                 ignore = [ignore]
 
-            ignore = [str(i) for i in ignore]
-            constraints = set([constraint for constraint in self._vars_in_solver[var] if constraint not in ignore])
-
-        else:
-            constraints = self._vars_in_solver[var]
+            ignored = set(i.get_id() for i in ignore if type(i) is not bool)
+            return len(constraints) > sum(1 for i in ignored if i in constraints)
 
-        return constraints != set()
+        return len(constraints) > 0
 
     def copy(self):
         """
@@ -1891,7 +1839,11 @@ class State:
         #solverCopy.add(self.solver.assertions())
 
         #solverCopy = self.solver.translate(self.solver.ctx)
-        
+
+        profiler = Profiler.current
+        if profiler is not None:
+            start = time.time()
+
         newState = State(
             #solver=solverCopy,
             solver=copy(self.solver),
@@ -1907,31 +1859,70 @@ class State:
             maxRetID=self.maxRetID,
             maxCtx=self.maxCtx,
             objectManager=self.objectManager.copy(),
-            #vars_in_solver=deepcopy(self._vars_in_solver),
-            vars_in_solver={key:copy(self._vars_in_solver[key]) for key in self._vars_in_solver.keys()},
+            vars_in_solver=self._vars_in_solver,
             project=self._project
             )
 
         # Make sure to give the objectManager the new state
         newState.objectManager.state = newState
 
+        if profiler is not None:
+            profiler.record("copy", "State", time.time() - start)
+
         return newState
 
     def __copy__(self):
         return self.copy()
 
+    def __getstate__(self):
+        """Pickle support. Use pySym.Serialize, plain pickle can't handle the z3 parts.
+        simFunctions are modules, so only their names are kept."""
+        return {
+            'path': self.path,
+            'ctx': self.ctx,
+            'objectManager': self.objectManager,
+            'solver': self.solver,
+            '_vars_in_solver': self._vars_in_solver,
+            'functions': self.functions,
+            'simFunctions': {name: func.__name__ for name, func in self.simFunctions.items()},
+            'retVar': self.retVar,
+            'callStack': self.callStack,
+            'backtrace': self.backtrace,
+            'retID': self.retID,
+            'loop': self.loop,
+            'maxRetID': self.maxRetID,
+            'maxCtx': self.maxCtx,
+            '_project': self._project,
+        }
+
+    def __setstate__(self, state):
+        simFunctions = state.pop('simFunctions')
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        self.simFunctions = {name: importlib.import_module(module) for name, module in simFunctions.items()}
+
+        # Weakrefs back to us didn't come along. Re-attach everything the same way copy does.
+        self.objectManager = self.objectManager.copy()
+        self.objectManager.state = self
+        self.retVar.state = self
+
+        global _temporary_refs
+        _temporary_refs.add(self)
+
     ##############
     # Properties #
     ##############
 
     @property
     def _vars_in_solver(self):
-        """dict: Dict of sets of string representations of all the vars in the solver."""
+        """VarIndex: Which constraints in the solver mention which vars. Immutable, so forks share it."""
         return self.__vars_in_solver
 
     @_vars_in_solver.setter
     def _vars_in_solver(self, vars):
-        assert issubclass(type(vars), dict), "Unhandled _vars_in_solver type of {}".format(type(vars))
+        assert type(vars) is VarIndex, "Unhandled _vars_in_solver type of {}".format(type(vars))
 
         self.__vars_in_solver = vars
 
@@ -5,7 +5,9 @@ from ....pyObjectManager.Real import Real
 from ....pyObjectManager.BitVec import BitVec
 from ....pyObjectManager.Char import Char
 from ....pyObjectManager.String import String
+from ... import Seq
 import ast
+import z3
 
 logger = logging.getLogger("pyState:SimFunction:String.index")
 
@@ -66,6 +68,30 @@ def handle(state,call,sub,start=None,end=None,ctx=None):
     subStr = root[start:end]
     ret = []
 
+    # One IndexOf constraint on a symbolic result, instead of a State per possible index
+    if Seq.enabled(state):
+        for sub in subs:
+            index = state.getVar('tempStrIndex',ctx=1,varType=Int)
+            index.increment()
+
+            found = z3.simplify(z3.IndexOf(Seq.to_seq(state,subStr), Seq.to_seq(state,sub), 0))
+
+            # Static strings simplify right down to the answer
+            if z3.is_int_value(found):
+                if found.as_long() >= 0:
+                    index.setTo(found.as_long() + start)
+                    ret.append(index.copy())
+                continue
+
+            # Python raises ValueError when it isn't there
+            if not state.isSat(extra_constraints=[found >= 0]):
+                continue
+
+            state.addConstraint(index.getZ3Object() == found + start, found >= 0)
+            ret.append(index.copy())
+
+        return ret
+
     # Move the size window through the input
     for i in range(0,len(subStr) - len(sub) + 1):
         # If it is possible to have this index here, add it
@@ -38,8 +38,15 @@ def handle(state,call,width,ctx=None):
     for width in widths:
 
         # TODO: Add symbolic width capability
-        if not width.isStatic():
-            err = "handle: Don't know how to handle non static width"
+        if width.isStatic():
+            width = width.getValue()
+
+        # Check if it's a variable that only has one possibility (i.e.: a String.index result under string_search "seq")
+        elif type(width) in [Int, BitVec] and state.is_unique(width):
+            width = state.any_int(width)
+
+        else:
+            err = "handle: Don't know how to handle symbolic width. A String.index result is only symbolic under string_search \"seq\", \"chars\" gives concrete ones"
             logger.error(err)
             raise Exception(err)
 
@@ -53,9 +60,6 @@ def handle(state,call,width,ctx=None):
         newString = state.getVar('tempZfillStr',ctx=1,varType=String)
         newString.increment()
     
-        # Resolve the width
-        width = width.getValue()
-
         # zfill will not truncate
         newString.setTo(root,clear=True)
     
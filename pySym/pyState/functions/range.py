@@ -58,11 +58,11 @@ def handle(state,call,a,b=None,c=None,ctx=None):
                 a = a.getValue()
 
             # Check if it's a variable that only has one possibility
-            elif type(a) in [Int, BitVec] and len(state.any_n_int(a,2)) == 1:
+            elif type(a) in [Int, BitVec] and state.is_unique(a):
                 a = state.any_int(a)
 
             else:
-                err = "handle: Don't know how to handle symbolic integers at the moment"
+                err = "handle: Don't know how to handle symbolic integers at the moment. A String.index result is only symbolic under string_search \"seq\", \"chars\" gives concrete ones"
                 logger.error(err)
                 raise Exception(err)
 
@@ -75,11 +75,11 @@ def handle(state,call,a,b=None,c=None,ctx=None):
                 b = b.getValue()
 
             # Check if it's a variable that only has one possibility
-            elif type(b) in [Int, BitVec] and len(state.any_n_int(b,2)) == 1:
+            elif type(b) in [Int, BitVec] and state.is_unique(b):
                 b = state.any_int(b)
     
             else:
-                err = "handle: Don't know how to handle symbolic integers at the moment"
+                err = "handle: Don't know how to handle symbolic integers at the moment. A String.index result is only symbolic under string_search \"seq\", \"chars\" gives concrete ones"
                 logger.error(err)
                 raise Exception(err)
     
@@ -93,11 +93,11 @@ def handle(state,call,a,b=None,c=None,ctx=None):
                 c = c.getValue()
     
             # Check if it's a variable that only has one possibility
-            elif type(c) in [Int, BitVec] and len(state.any_n_int(c,2)) == 1:
-                lower = state.any_int(c)
+            elif type(c) in [Int, BitVec] and state.is_unique(c):
+                c = state.any_int(c)
     
             else:
-                err = "handle: Don't know how to handle symbolic integers at the moment"
+                err = "handle: Don't know how to handle symbolic integers at the moment. A String.index result is only symbolic under string_search \"seq\", \"chars\" gives concrete ones"
                 logger.error(err)
                 raise Exception(err)
     
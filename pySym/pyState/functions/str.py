@@ -43,9 +43,15 @@ def handle(state,call,obj,ctx=None):
             # Utilize pyObjectManager class methods
             ret.setTo(obj.__str__(),clear=True)
 
+        # Check if it's a variable that only has one possibility (i.e.: a String.index result under string_search "seq")
+        elif type(obj) in [Int, BitVec] and state.is_unique(obj):
+            ret = state.getVar("tmpStrVal",ctx=1,varType=String)
+            ret.increment()
+            ret.setTo(str(state.any_int(obj)),clear=True)
+
         # TODO: Deal with symbolic values (returning list of possibilities)
         else:
-            err = "handle: Don't know how to handle symbolic ints for now"
+            err = "handle: Don't know how to handle symbolic ints for now. A String.index result is only symbolic under string_search \"seq\", \"chars\" gives concrete ones"
             logger.error(err)
             raise Exception(err)
 
@@ -68,7 +68,7 @@ def handle(state,call,left,right,ctx=None):
            tempList = state.getVar('tmpZipInner',ctx=1,varType=List)
            tempList.increment()
            tempList.variables = [l,r]
-           newList.variables.append(tempList.copy())
+           newList.append(tempList)
 
         ret.append(newList.copy())
 
@@ -0,0 +1,9 @@
+a = pyState.Int()
+b = pyState.Int()
+c = pyState.Int()
+
+if a > 1:
+    if b > 1:
+        if c > 1:
+            if a*a*a + b*b*b == c*c*c:
+                x = 1
@@ -0,0 +1,5 @@
+s = pyState.String(8)
+x = -1
+
+if "pw" in s:
+    x = s.index("pw")
@@ -0,0 +1,91 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+from pySym.CFG import CFG
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+
+test1 = """
+def f(a):
+    if a > 3:
+        return 1
+    return 2
+
+x = pyState.Int()
+y = 0
+while y < 3:
+    if y == 5:
+        break
+    y += 1
+if x > 10:
+    z = f(x)
+else:
+    z = 0
+q = 1
+"""
+
+test2 = """
+x = pyState.Int()
+if x > 5:
+    y = 1
+    z = 2
+else:
+    y = 2
+    z = 3
+q = 4
+"""
+
+def test_CFG_edges():
+    cfg = CFG.from_source(test1)
+
+    assert cfg.entry == 2
+    assert cfg.functions == {'f': 3}
+    assert cfg.successors[9] == {10, 13}
+    assert cfg.successors[11] == {13}
+    assert cfg.successors[12] == {9}
+    # Calls go into the function, and its returns come back to the call
+    assert cfg.successors[14] == {3, 17}
+    assert cfg.successors[4] == {("exit", "f")}
+    assert cfg.successors[("exit", "f")] == {14}
+
+
+def test_CFG_distances():
+    cfg = CFG.from_source(test1)
+
+    assert cfg.distance(14, 4) == 2
+    assert cfg.distance(17, 4) is None
+    assert cfg.distance(7, 17) == 5
+    assert not cfg.can_reach(17, 4)
+    assert cfg.can_reach(100, 4)
+
+    # Going through line 14 is the only way into f
+    assert cfg.distance(7, 4, avoid=[14]) is None
+    assert cfg.distance(7, 17, avoid=[14]) == 5
+
+
+def test_CFG_explore_avoid():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    pg = PathGroup(p)
+
+    assert pg.explore(find=9,avoid=[4])
+    assert len(pg.found) == 1
+    assert len(pg.pruned) == 1
+    assert pg.found[0].state.any_int('y') == 2
+
+
+def test_CFG_explore_prune():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    pg = PathGroup(p,search_strategy="closest")
+
+    # The else branch can't get to line 5
+    assert pg.explore(find=5)
+    assert len(pg.pruned) == 1
+    assert pg.found[0].state.any_int('y') == 1
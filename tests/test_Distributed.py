@@ -0,0 +1,116 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+from pySym import Distributed
+from pySym.pyPath import Path
+import threading
+import subprocess
+from multiprocessing import Process
+from multiprocessing.connection import Client
+
+test1 = """
+a = pyState.Int()
+b = pyState.Int()
+c = pyState.Int()
+q = 0
+if a > 0:
+    q += 1
+if b > 0:
+    q += 2
+if c > 0:
+    q += 4
+x = q
+"""
+
+test2 = """
+x = pyState.Int()
+if x > 5:
+    y = 1
+else:
+    y = 2
+z = 3
+"""
+
+def test_Distributed_explore():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = Distributed.explore(p,workers=3,steps=2)
+
+    assert len(pg.active) == 0
+    assert len(pg.errored) == 0
+    assert len(pg.completed) == 8
+    assert set(path.state.any_int('x') for path in pg.completed) == set(range(8))
+
+
+def test_Distributed_find():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    pg = Distributed.explore(p,workers=2,find=7)
+
+    assert len(pg.found) > 0
+    assert pg.found[0].state.any_int('y') in [1, 2]
+    assert len(pg.completed) == 0
+
+
+def test_Distributed_lost_worker():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    coordinator = Distributed.Coordinator([p])
+
+    result = []
+    server = threading.Thread(target=lambda: result.append(coordinator.serve()))
+    server.start()
+
+    # Takes the only path, then disappears
+    conn = Client(coordinator.address, authkey=coordinator.authkey)
+    conn.recv()
+    conn.send(("pull",))
+    assert conn.recv()[0] == "paths"
+    conn.close()
+
+    worker = Process(target=Distributed._run_worker, args=(coordinator, 2), daemon=True)
+    worker.start()
+    server.join()
+    worker.join()
+
+    pg = result[0]
+    assert len(pg.completed) == 8
+    assert set(path.state.any_int('x') for path in pg.completed) == set(range(8))
+
+
+def test_Distributed_command_line():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.join(myPath, "..") + os.pathsep + env.get("PYTHONPATH", "")
+
+    # The authkey comes from the environment, or stdin without it. Never from the arguments.
+    for use_env in [True, False]:
+        b = ast_parse.parse(test2).body
+        coordinator = Distributed.Coordinator([Path(b,source=test2)])
+        host, port = coordinator.address
+
+        worker_env = dict(env)
+        worker_env.pop(Distributed.AUTHKEY_ENV, None)
+        if use_env:
+            worker_env[Distributed.AUTHKEY_ENV] = coordinator.authkey.hex()
+
+        worker = subprocess.Popen([sys.executable, "-m", "pySym.Distributed", host, str(port)], env=worker_env, stdin=subprocess.PIPE)
+        worker.stdin.write(b"" if use_env else coordinator.authkey.hex().encode() + b"\n")
+        worker.stdin.close()
+
+        assert coordinator.authkey.hex() not in " ".join(worker.args)
+
+        pg = coordinator.serve()
+        assert worker.wait(timeout=60) == 0
+        assert set(path.state.any_int('y') for path in pg.completed) == set([1, 2])
+
+    # No authkey at all
+    env.pop(Distributed.AUTHKEY_ENV, None)
+    worker = subprocess.run([sys.executable, "-m", "pySym.Distributed", "localhost", "1"], env=env, input=b"", stderr=subprocess.PIPE)
+    assert worker.returncode != 0
+    assert Distributed.AUTHKEY_ENV.encode() in worker.stderr
@@ -0,0 +1,74 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import random
+from pySym.PersistentMap import PersistentMap
+
+
+class Collide:
+    """Key with a constant hash so every instance collides."""
+    def __init__(self, n):
+        self.n = n
+    def __hash__(self):
+        return 7
+    def __eq__(self, other):
+        return type(other) is Collide and other.n == self.n
+
+
+def test_PersistentMap_basic():
+    m = PersistentMap({'a': 1, 'b': 2})
+    m2 = m.set('c', 3)
+
+    assert len(m) == 2 and len(m2) == 3
+    assert 'c' not in m and m2['c'] == 3
+    assert m.get('c') is None
+    assert m.set('a', 1) is m
+
+    m3 = m2.delete('a')
+    assert 'a' in m2 and 'a' not in m3
+    assert m3.delete('a') is m3
+    assert dict(m3.items()) == {'b': 2, 'c': 3}
+
+
+def test_PersistentMap_random():
+    random.seed(1234)
+    m = PersistentMap()
+    d = {}
+    snapshots = []
+
+    for i in range(3000):
+        k = random.randint(0, 1500)
+        if random.random() < 0.3:
+            m = m.delete(k)
+            d.pop(k, None)
+        else:
+            m = m.set(k, i)
+            d[k] = i
+
+        if i % 500 == 0:
+            snapshots.append((m, dict(d)))
+
+    assert len(m) == len(d)
+    assert dict(m.items()) == d
+
+    # Old versions are untouched
+    for snap, expected in snapshots:
+        assert dict(snap.items()) == expected
+
+
+def test_PersistentMap_collisions():
+    keys = [Collide(i) for i in range(5)]
+    m = PersistentMap()
+    for i, k in enumerate(keys):
+        m = m.set(k, i)
+
+    assert len(m) == 5
+    assert all(m[k] == i for i, k in enumerate(keys))
+
+    for k in keys[:4]:
+        m = m.delete(k)
+
+    assert len(m) == 1
+    assert m[keys[4]] == 4
+    assert Collide(0) not in m
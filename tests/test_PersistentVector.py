@@ -0,0 +1,64 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import random
+import pickle
+import pytest
+from pySym.PersistentVector import PersistentVector
+
+
+def test_PersistentVector_basic():
+    v = PersistentVector([1, 2, 3])
+    v2 = v.append(4).set(0, 0)
+
+    assert list(v) == [1, 2, 3]
+    assert list(v2) == [0, 2, 3, 4]
+    assert v2[-1] == 4 and v2[1:3] == [2, 3]
+
+    # Popping the front only moves the start
+    v3 = v2.delete(0).delete(0)
+    assert list(v3) == [3, 4] and len(v3) == 2
+    assert list(v3.insert(0, 9)) == [9, 3, 4]
+    assert list(v2) == [0, 2, 3, 4]
+
+    with pytest.raises(IndexError):
+        v3[2]
+
+    assert list(pickle.loads(pickle.dumps(v3))) == [3, 4]
+
+
+def test_PersistentVector_random():
+    random.seed(1234)
+    v = PersistentVector()
+    l = []
+    snapshots = []
+
+    for i in range(5000):
+        op = random.random()
+        if op < 0.4:
+            v, _ = v.append(i), l.append(i)
+        elif op < 0.6 and len(l) > 0:
+            j = random.randrange(-len(l), len(l))
+            v = v.set(j, i)
+            l[j] = i
+        elif op < 0.8 and len(l) > 0:
+            v = v.delete(0)
+            del l[0]
+        elif op < 0.9 and len(l) > 0:
+            j = random.randrange(len(l))
+            v = v.delete(j)
+            del l[j]
+        else:
+            j = random.randint(-len(l), len(l))
+            v = v.insert(j, i)
+            l.insert(j, i)
+
+        if i % 500 == 0:
+            snapshots.append((v, list(l)))
+
+    assert list(v) == l
+    assert [v[j] for j in range(len(l))] == l
+
+    for snapshot, expected in snapshots:
+        assert list(snapshot) == expected
@@ -0,0 +1,89 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+import json
+from pySym import ast_parse
+from pySym import Profiler as profiling
+from pySym.Profiler import Profiler
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+
+test1 = """
+s = "abcd"
+x = pyState.Int()
+l = [1,2,3]
+if x > 1:
+    y = l[1] + x
+else:
+    y = s.index("c")
+"""
+
+def test_Profiler_record():
+    p = Profiler()
+    p.record("line", 3, 0.5)
+    p.record("line", 3, 0.25)
+    p.record("line", 4, 1.0)
+    assert p.stats["line"] == {3: [2, 0.75], 4: [1, 1.0]}
+
+    other = Profiler()
+    other.record("line", 3, 1.0)
+    other.record("query", "lia", 2.0)
+    p.merge(other.stats)
+    assert p.stats["line"][3] == [3, 1.75]
+    assert p.stats["query"]["lia"] == [1, 2.0]
+
+    # Most time first
+    assert p.table("line")._rows[0][0] == 3
+    assert len(p.table("line", limit=1)._rows) == 1
+
+    out = json.loads(p.to_json())
+    assert out["line"]["3"] == {"calls": 3, "time": 1.75}
+
+    p.reset()
+    assert p.stats["line"] == {}
+
+def test_Profiler_recording():
+    assert profiling.current is None
+    assert profiling.call("handler", "f", lambda x: x + 1, 1) == 2
+
+    p = Profiler()
+    with profiling.recording(p):
+        assert profiling.current is p
+        assert profiling.call("handler", "f", lambda x: x + 1, 1) == 2
+    assert profiling.current is None
+    assert p.stats["handler"]["f"][0] == 1
+
+def test_Profiler_PathGroup(tmpdir):
+    b = ast_parse.parse(test1).body
+
+    # Off by default
+    pg = PathGroup(Path(b,source=test1))
+    pg.explore()
+    assert pg.stats is None
+
+    pg = PathGroup(Path(b,source=test1), profile=True)
+    pg.explore()
+    assert len(pg.completed) == 2
+
+    stats = pg.stats.stats
+    assert stats["handler"]["Assign"][0] >= 5
+    assert stats["handler"]["If"][0] == 1
+    assert "BinOp" in stats["handler"]
+    assert "Subscript" in stats["handler"]
+    assert stats["simFunction"]["String.index"][0] == 1
+    assert stats["simFunction"]["pyState.Int"][0] == 1
+    assert set([2, 3, 4, 5, 6, 8]) <= set(stats["line"])
+    assert stats["copy"]["State"][0] > 0
+    assert sum(calls for calls, _ in stats["query"].values()) > 0
+
+    assert "String.index" in str(pg.stats)
+
+    filename = str(tmpdir.join("stats.json"))
+    pg.stats.dump(filename)
+    with open(filename) as f:
+        assert json.load(f)["handler"]["If"]["calls"] == 1
@@ -0,0 +1,115 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+from pySym import Serialize
+import z3
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyState.ConstraintTrail import TrailSolver
+
+test1 = """
+def f(a):
+    if a > 3:
+        return a - 3
+    return 0
+
+x = pyState.Int()
+l = [1,2]
+y = f(x) + 1
+l.append(y)
+"""
+
+def test_Serialize_solver():
+    x, y = z3.Ints('x y')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5)
+    s.add_retractable(x < 3)
+    s2 = s.copy()
+    s2.add(y == x)
+    s2.retract(x < 3)
+    assert s.check() == z3.unsat
+
+    s_new, s2_new = Serialize.loads(Serialize.dumps([s, s2]))
+
+    # Still one family, sharing the trail prefix
+    assert s_new._shared is s2_new._shared
+    assert s2_new.trail.parent is s_new.trail
+    assert s_new.trail.sat is False
+
+    assert s_new.check() == z3.unsat
+    assert s2_new.check() == z3.sat
+    assert s_new.is_retractable(x < 3)
+    assert not s2_new.is_retractable(x < 3)
+    assert s_new.retract(x < 3) == 1
+    assert s_new.check() == z3.sat
+
+
+def test_Serialize_path():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p)
+
+    # Stop inside the call to f
+    for _ in range(5):
+        pg.step()
+    assert len(pg.active) == 2
+    assert all(len(path.state.callStack) > 0 for path in pg.active)
+
+    pg2 = PathGroup()
+    for path in Serialize.loads(Serialize.dumps(pg.active)):
+        pg2.unstash(path=path,to_stash="active")
+
+    pg.explore()
+    pg2.explore()
+
+    assert len(pg2.completed) == 2
+    assert len(pg2.errored) == 0
+    assert set(path.state.any_int('y') for path in pg2.completed) == set(path.state.any_int('y') for path in pg.completed)
+    assert set(path.state.any_list('l')[-1] for path in pg2.completed) == set(path.state.any_int('y') for path in pg.completed)
+
+
+test2 = """
+s = 0
+for i in [1,2,3]:
+    s += i
+z = s
+"""
+
+def test_Serialize_ast():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    for _ in range(2):
+        p = p.step()[0]
+
+    # Inside the loop. The For node holds its iterator.
+    assert p.state.loop is not None
+
+    data = Serialize.dumps(p)
+    new = Serialize.loads(data)
+    again = Serialize.loads(data)
+
+    # The source goes in once, nodes are indexes into it
+    assert data.count(b"s += i") == 1
+
+    # Unchanged nodes are shared between loads, changed ones are copies
+    assert new.state.path[0] is again.state.path[0]
+    assert new.state.loop is not again.state.loop
+    assert new.source is again.source
+
+    while True:
+        paths = new.step()
+        if len(paths) == 0:
+            break
+        new = paths[0]
+    assert new.state.any_int('z') == 6
+
+    # Sources can be given without a Path
+    assert Serialize.dumps(p.state).count(b"s += i") == 0
+    state = Serialize.loads(Serialize.dumps(p.state, sources=[test2]))
+    assert state.path[0] is again.state.path[0]
@@ -0,0 +1,113 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+from pySym import Serialize
+import pytest
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.Spill import PathStore
+from pySym.Strategy import FewestConstraints
+
+test1 = """
+x = pyState.Int()
+l = [1,2]
+if x > 3:
+    l.append(x)
+y = 1
+"""
+
+def test_Spill_PathStore():
+    store = PathStore()
+    filename = store.filename
+    assert os.path.exists(filename)
+
+    a = store.put(b"hello")
+    b = store.put(b"world")
+    assert len(store) == 2
+    assert store.get(a) == b"hello"
+    assert store.get(b) == b"world"
+    assert store.size() == 10
+
+    store.delete(a)
+    assert len(store) == 1
+    with pytest.raises(Exception):
+        store.get(a)
+
+    # Temporary files go away with the store
+    store.close()
+    assert not os.path.exists(filename)
+
+
+def test_Spill_Path():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    p = p.step()[0].step()[0]
+    left, right = p.step()
+    left = left.step()[0]
+    cache = left.state.solver._shared.cache
+    line = left.state.lineno()
+    constraints = left.constraints()
+    assert constraints == len(left.state.solver.trail)
+
+    store = PathStore()
+    left.spill(store)
+    assert left.spilled
+    assert len(store) == 1
+
+    # Line and constraint count are known without loading it back, so strategies can score it
+    assert left.lineno() == line
+    assert left.constraints() == constraints
+    assert FewestConstraints().score(left) == constraints
+    assert left.spilled
+
+    # Reading the state loads it back
+    assert left.state.isSat()
+    assert not left.spilled
+    assert len(store) == 0
+    assert left.state.solver._shared.cache is cache
+    assert left.state.any_list('l') == [1, 2, left.state.any_int('x')]
+    assert left.state.any_int('x') > 3
+
+    # Stepping on works the same
+    assert left.step()[0].state.any_int('y') == 1
+
+    # Spilled paths serialize as the data they were spilled as, and stay spilled until read
+    right.spill(store)
+    assert right.spilled
+    new = Serialize.loads(Serialize.dumps(right))
+    assert new.spilled
+    assert new.lineno() == right.lineno()
+    assert new.constraints() == right.constraints()
+    assert new.state.any_list('l') == [1, 2]
+    assert not new.spilled
+    assert right.spilled
+
+    # Replacing the state drops the stored copy
+    right.state = new.state
+    assert not right.spilled
+    assert len(store) == 0
+
+
+def test_Spill_Path_unserializable():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    p = p.step()[0]
+
+    # Something pickle can't take
+    state = p.state
+    state.functions['bad'] = lambda: None
+
+    store = PathStore()
+    assert not p.spill(store)
+    assert not p.spilled
+    assert len(store) == 0
+    assert p.state is state
+
+    # The path carries on in memory
+    assert p.step()[0].state.any_list('l') == [1, 2]
@@ -0,0 +1,105 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+import random
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.Strategy import Strategy, ClosestToTarget, RandomPathTree, STRATEGIES
+
+test1 = """
+a = pyState.Int()
+b = pyState.Int()
+c = pyState.Int()
+q = 0
+if a > 0:
+    q += 1
+if b > 0:
+    q += 2
+if c > 0:
+    q += 4
+x = q
+"""
+
+def test_Strategy_heap():
+    s = Strategy(score=lambda x: x[0])
+    a, b, c, d = [3], [1], [2], [1]
+    for x in [a, b, c, d]:
+        s.push(x)
+    s.discard(c)
+
+    assert len(s) == 3
+    # Ties go in the order they came in
+    assert s.select(2) == [b, d]
+    assert s.pop() is a
+    assert s.pop() is None
+
+
+def test_Strategy_builtins():
+    for strategy in list(STRATEGIES) + [lambda path: -len(path.state.backtrace)]:
+        b = ast_parse.parse(test1).body
+        p = Path(b,source=test1)
+        pg = PathGroup(p,search_strategy=strategy)
+        assert isinstance(pg.search_strategy, Strategy)
+
+        pg.explore()
+
+        assert len(pg.completed) == 8
+        assert len(pg.errored) == 0
+        assert set(path.state.any_int('x') for path in pg.completed) == set(range(8))
+
+
+def test_Strategy_closest():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p,search_strategy="closest")
+
+    assert pg.explore(find=12)
+    assert pg.search_strategy.target == 12
+    assert len(pg.found) == 1
+
+    # Only stepped one path at a time, so the rest are still waiting
+    assert len(pg.active) + len(pg.found) < 8
+
+
+def test_Strategy_random_path():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    strategy = RandomPathTree()
+    pg = PathGroup(p,search_strategy=strategy)
+
+    while len(pg.completed) == 0:
+        pg.step()
+
+    # Three ifs, three forks
+    assert strategy.forks[pg.completed[0]] == 3
+
+    # Keys pick up where the last picked one left off
+    assert strategy.now > 0
+    assert all(key >= strategy.now for key in strategy.keys.values())
+
+
+def test_Strategy_random_path_waiting():
+    random.seed(1)
+
+    class P:
+        pass
+
+    # The path left waiting after a pick and a path pushed after it have the same weight, so either goes first half the time
+    first = 0
+    for _ in range(2000):
+        strategy = RandomPathTree()
+        a, b = P(), P()
+        strategy.push(a)
+        strategy.push(b)
+        waiting = b if strategy.pop() is a else a
+        strategy.push(P())
+        if strategy.pop() is waiting:
+            first += 1
+
+    assert 900 < first < 1100
@@ -15,6 +15,8 @@ from pySym.pyObjectManager.Int import Int
 from pySym.pyObjectManager.Real import Real
 from pySym.pyObjectManager.BitVec import BitVec
 from pySym.pyObjectManager.List import List
+from pySym import Config
+from pySym.pyState import Seq
 
 test1 = """
 s = "Test"
@@ -33,6 +35,85 @@ if s[3] == "a":
     x = s.index('a')
 """
 
+test4 = """
+s = pyState.String(10)
+x = s.index('a')
+if x == 2:
+    r = range(x)
+    z = "1".zfill(x)
+    t = str(x)
+"""
+
+test5 = """
+s = pyState.String(10)
+x = s.index('a')
+{0}
+"""
+
+
+
+def test_function_String_Index_Seq():
+    Config.PYSYM_STRING_SEARCH = "seq"
+    try:
+        # One path, with x free to be any index
+        pg = PathGroup(Path(ast_parse.parse(test2).body,source=test2))
+        pg.explore()
+        assert len(pg.completed) == 1
+        assert set(pg.completed[0].state.any_n_int('x',20)) == set(range(10))
+
+        pg = PathGroup(Path(ast_parse.parse(test3).body,source=test3))
+        pg.explore()
+        assert len(pg.completed) == 2
+        indexes = set()
+        for path in pg.completed:
+            indexes |= set(path.state.any_n_int('x',20))
+        assert indexes == set(range(4)).union({-1})
+
+        for sub, index in [("T",0), ("t",3), ("es",1), ("st",2)]:
+            source = test1.format(sub)
+            pg = PathGroup(Path(ast_parse.parse(source).body,source=source))
+            pg.explore()
+            assert len(pg.completed) == 1
+            assert pg.completed[0].state.any_int('x') == index
+
+        # Each symbolic Char gets tied to its byte once, however often it is converted
+        pg = PathGroup(Path(ast_parse.parse(test2).body,source=test2))
+        pg.explore()
+        state = pg.completed[0].state
+        s = state.getVar('s')
+        Seq.to_seq(state, s)
+        before = len(state.solver.trail)
+        Seq.to_seq(state, s)
+        assert len(state.solver.trail) == before
+
+    finally:
+        Config.PYSYM_STRING_SEARCH = "chars"
+
+
+def test_function_String_Index_Seq_Concrete():
+    Config.PYSYM_STRING_SEARCH = "seq"
+    try:
+        # Narrowed down to one value, the symbolic index works where a concrete int is needed
+        pg = PathGroup(Path(ast_parse.parse(test4).body,source=test4))
+        pg.explore()
+        assert len(pg.errored) == 0
+        assert len(pg.completed) == 2
+        state = [path.state for path in pg.completed if path.state.any_int('x') == 2][0]
+        assert state.any_list('r') == [0, 1]
+        assert state.any_str('z') == "01"
+        assert state.any_str('t') == "2"
+
+        # Otherwise it's an error saying why
+        for line in ["r = range(x)", "z = '1'.zfill(x)", "t = str(x)"]:
+            source = test5.format(line)
+            pg = PathGroup(Path(ast_parse.parse(source).body,source=source))
+            pg.explore()
+            assert len(pg.completed) == 0
+            assert len(pg.errored) == 1
+            assert "string_search" in pg.errored[0].error
+
+    finally:
+        Config.PYSYM_STRING_SEARCH = "chars"
 
 
 def test_function_String_Index_PartiallySymbolic():
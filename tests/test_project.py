@@ -36,3 +36,49 @@ def test_basic_project():
     assert pg.completed[0]._project is proj
     assert pg.completed[0].state._project is proj
 
+
+def test_project_solver_budget():
+    proj = pySym.Project(os.path.join(myPath, "scripts", "hard_query.py"), query_timeout=200)
+    pg = proj.factory.path_group()
+    pg.explore()
+
+    # Only the cubes query is too hard
+    assert len(pg.completed) == 4
+    assert len(pg.unknown) == 1
+    assert "unknown" in pg.unknown[0].error
+    assert pg.unknown[0].state.solver.time >= 0.2
+
+    # Retrying with a budget that's already used up fails right away
+    assert pg.retry_unknown(path_solver_budget=100) == 1
+    assert len(pg.active) == 1
+    pg.explore()
+    assert len(pg.unknown) == 1
+    assert "budget" in pg.unknown[0].error
+
+def test_project_profile():
+    proj = pySym.Project(os.path.join(myPath, "scripts", "basic_function.py"), profile=True)
+    pg = proj.factory.path_group()
+    pg.explore()
+
+    assert pg.stats.stats["line"][8][0] == 1
+    assert pg.stats.stats["handler"]["AugAssign"][0] == 1
+
+    # Off by default
+    pg = pySym.Project(os.path.join(myPath, "scripts", "basic_function.py")).factory.path_group()
+    assert pg.stats is None
+
+def test_project_string_search():
+    proj = pySym.Project(os.path.join(myPath, "scripts", "string_index.py"), string_search="seq")
+    pg = proj.factory.path_group()
+    pg.explore()
+
+    # index is one symbolic result instead of a path per place "pw" can be
+    assert len(pg.completed) == 2
+    found = [path for path in pg.completed if path.state.any_int('x') != -1][0]
+    assert set(found.state.any_n_int('x', 10)) == set(range(7))
+
+    proj = pySym.Project(os.path.join(myPath, "scripts", "string_index.py"))
+    assert proj.string_search == "chars"
+    pg = proj.factory.path_group()
+    pg.explore()
+    assert len(pg.completed) == 8
@@ -75,3 +75,116 @@ def test_pyObjectManager_getParent():
     assert pg.completed[0].state.objectManager.getParent(i) == q[2]
 
 
+def test_pyObjectManager_getParent_index():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p)
+
+    pg.explore()
+    s = pg.completed[0].state
+    om = s.objectManager
+
+    # Assignments put variables in the index as they go
+    q = s.getVar('q')
+    assert om.parents[q.uuid] == (0, 'q')
+
+    # Forks share it
+    s2 = s.copy()
+    assert s2.objectManager.parents is om.parents
+
+    # Nested lookups come back as the fork's own JIT copies
+    q2 = s2.getVar('q')
+    i = q2[2][0]
+    parent = s2.objectManager.getParent(i)
+    assert parent is q2[2]
+    assert parent is not q[2]
+    assert parent.state is s2
+
+    # Incrementing moves the entry to the new uuid
+    old = i.uuid
+    i.increment()
+    assert old not in s2.objectManager.parents
+    assert s2.objectManager.getParent(i) is q2[2]
+    assert old in om.parents
+
+    # Inserting in front shifts the slot, which the lookup repairs
+    l = s2.getVar('l')
+    elm = l[2]
+    l.insert(0, l[0])
+    assert s2.objectManager.getParent(elm) is l
+    assert s2.objectManager.parents[elm.uuid][1] == 3
+
+    # Popped and overwritten variables leave the index, along with everything in them
+    popped = l.pop(3)
+    assert popped.uuid not in s2.objectManager.parents
+
+    inner = q2[2]
+    nested = [var.uuid for var in inner]
+    assert all(uuid in s2.objectManager.parents for uuid in nested)
+    q2[2] = q2[0]
+    assert inner.uuid not in s2.objectManager.parents
+    assert not any(uuid in s2.objectManager.parents for uuid in nested)
+
+    # Reassigning a List clears it out, so its old elements go too
+    q2 = s2.getVar('q')
+    first = q2[0]
+    q2.increment()
+    assert first.uuid not in s2.objectManager.parents
+    assert q2.uuid in s2.objectManager.parents
+
+    ctx = s2.objectManager.variables[0]
+    old = ctx['l']
+    ctx['l'] = s2.getVar('q')
+    assert old.uuid not in s2.objectManager.parents
+    assert not any(var.uuid in s2.objectManager.parents for var in old)
+
+    # Copies share a uuid. Incrementing one leaves the entry of another alone.
+    ctx['m'] = s2.getVar('l')
+    uuid = ctx['m'].uuid
+    s2.getVar('l').increment()
+    assert s2.objectManager.parents[uuid] == (0, 'm')
+
+    # Temporaries don't take entries from the variables they were copied from
+    s2.objectManager.variables[1]['tmp'] = s2.getVar('m')
+    assert s2.objectManager.parents[uuid] == (0, 'm')
+
+    # The fork it came from still has its own
+    assert q[2].uuid in om.parents
+
+
+def test_pyObjectManager_Ctx():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    pg = PathGroup(p)
+
+    pg.explore()
+    s = pg.completed[0].state
+    ctx = s.objectManager.variables[0]
+    assert 'i' in ctx
+    assert 'nope' not in ctx
+    assert set(['l', 's', 'i', 'bvs']) <= set(ctx)
+    assert len(ctx) == len(list(ctx))
+
+    # Copies share the variables until one of them is touched
+    s2 = s.copy()
+    ctx2 = s2.objectManager.variables[0]
+    assert ctx2.variables is ctx.variables
+
+    i = s.getVar('i')
+    i2 = s2.getVar('i')
+    assert i is not i2
+    assert i.state is s
+    assert i2.state is s2
+    assert ctx2.variables is not ctx.variables
+
+    # Handed out objects are ours until the next copy
+    assert s2.getVar('i') is i2
+    s2.copy()
+    i2 = s2.getVar('i')
+    assert s2.getVar('i') is i2
+
+    # Writes only show up in their own copy
+    i2.increment()
+    s2.addConstraint(i2.getZ3Object() == 5)
+    assert s2.any_int('i') == 5
+    assert s.any_int('i') == 1337
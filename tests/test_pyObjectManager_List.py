@@ -266,3 +266,26 @@ def test_pyObjectManager_List_NestedList():
     assert len(pg.completed) == 1
     assert pg.completed[0].state.any_list('l') == [1,2.2,[3,[4,5],6]]
 
+
+
+def test_pyObjectManager_List_copy():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p)
+    pg.explore()
+
+    s = pg.completed[0].state
+    l = s.getVar('l')
+    s2 = s.copy()
+    l2 = s2.getVar('l')
+
+    # Elements are copied for the List that touches them
+    assert l2[0] is not l[0]
+    assert l2[0].state is s2 and l[0].state is s
+    assert l2[0] is l2[0]
+
+    # Changes stay on their own side
+    l2.append(l2[2])
+    assert l2.pop(0).state is s2
+    assert s2.any_list('l') == [2.2, 3, 3]
+    assert s.any_list('l') == [1, 2.2, 3]
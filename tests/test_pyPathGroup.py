@@ -7,6 +7,8 @@ from pySym import Colorer
 logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
 from pySym import ast_parse
 import z3
+import pytest
+from pySym import Config
 from pySym.pyPath import Path
 from pySym.pyPathGroup import PathGroup
 
@@ -139,3 +141,152 @@ def test_pyPath_stepThroughProgram():
     assert pg.completed[0].state.any_int('x') == 10
     assert pg.completed[0].state.any_int('z') == 1
 
+
+
+def test_pyPathGroup_workers():
+    b = ast_parse.parse(test4).body
+    p = Path(b,source=test4)
+    pg = PathGroup(p,workers=2)
+    pg.explore()
+
+    assert len(pg.active) == 0
+    assert len(pg.completed) == 1
+    assert len(pg.errored) == 0
+    assert len(pg.deadended) == 16
+
+    # Paths that came back from the workers still solve here
+    assert pg.completed[0].state.any_str('s') == "A"*16
+    assert pg.completed[0].state.any_int('q') == 1
+
+
+test5 = """
+a = pyState.Int()
+b = pyState.Int()
+c = 0
+if a > 0:
+    c += 1
+if a > 5:
+    c += 1
+if b > a:
+    c += 1
+if b == 7:
+    c += 1
+if a < 0:
+    c += 1
+z = c
+"""
+
+def test_pyPathGroup_lazy():
+    results = {}
+    for lazy in [False, True]:
+        b = ast_parse.parse(test5).body
+        pg = PathGroup(Path(b,source=test5),lazy=lazy)
+        pg.explore()
+        results[lazy] = pg
+
+    eager, lazy = results[False], results[True]
+    assert len(lazy.active) == 0
+    assert len(lazy.completed) == len(eager.completed)
+    assert len(lazy.errored) == 0
+    assert set(p.state.any_int('z') for p in lazy.completed) == set(p.state.any_int('z') for p in eager.completed)
+
+    # a > 0 and a < 0 can't both hold. Those paths are only dropped once they're picked.
+    assert len(lazy.deadended) > 0
+    assert all(not p.state.isSat() for p in lazy.deadended)
+
+    # Depth first towards a line leaves the other paths unchecked
+    counts = {}
+    for lazy in [False, True]:
+        b = ast_parse.parse(test5).body
+        pg = PathGroup(Path(b,source=test5),lazy=lazy,search_strategy="depth")
+        assert pg.explore(find=15)
+        assert pg.found[0].state.isSat()
+        counts[lazy] = pg.query_cache.misses
+
+    assert counts[True] < counts[False]
+
+    # Config sets the default
+    Config.PYSYM_LAZY_FEASIBILITY = True
+    try:
+        assert PathGroup(Path(ast_parse.parse(test5).body,source=test5)).lazy
+    finally:
+        Config.PYSYM_LAZY_FEASIBILITY = False
+
+
+def test_pyPathGroup_memory_budget():
+    results = {}
+    for budget in [None, 2]:
+        for strategy in ["breadth", "depth", "random", "closest"]:
+            b = ast_parse.parse(test5).body
+            pg = PathGroup(Path(b,source=test5),memory_budget=budget,search_strategy=strategy)
+
+            while len(pg.active) > 0:
+                pg.step()
+                if budget is not None:
+                    assert sum(1 for path in pg.active if not path.spilled) <= budget
+
+            assert len(pg.errored) == 0
+            results[budget, strategy] = pg
+
+    for strategy in ["breadth", "depth", "random", "closest"]:
+        pg = results[2, strategy]
+        assert len(pg.completed) == len(results[None, strategy].completed)
+        assert len(pg.deadended) == len(results[None, strategy].deadended)
+
+        # Finished paths were written out as they came in
+        assert all(path.spilled for path in pg.completed + pg.deadended)
+        assert len(pg.store) == len(pg.completed) + len(pg.deadended)
+
+        assert set(p.state.any_int('z') for p in pg.completed) == set(p.state.any_int('z') for p in results[None, strategy].completed)
+        assert len(pg.store) == len(pg.deadended)
+
+    # Found paths stay in memory
+    b = ast_parse.parse(test5).body
+    pg = PathGroup(Path(b,source=test5),memory_budget=1)
+    assert pg.explore(find=15)
+    assert not pg.found[0].spilled
+
+
+def test_pyPathGroup_checkpoint(tmpdir):
+    filename = str(tmpdir.join("checkpoint"))
+
+    b = ast_parse.parse(test5).body
+    full = PathGroup(Path(b,source=test5))
+    full.explore()
+
+    for kwargs in [{}, {"search_strategy": "least-visited"}, {"search_strategy": "random-path", "memory_budget": 2}]:
+        b = ast_parse.parse(test5).body
+        pg = PathGroup(Path(b,source=test5),**kwargs)
+        for _ in range(10):
+            pg.step()
+
+        pg.save(filename)
+        pg2 = PathGroup.load(filename)
+
+        # Same stashes, strategy state and statistics
+        assert str(pg2) == str(pg)
+        assert pg2.query_cache.misses == pg.query_cache.misses
+        assert type(pg2.search_strategy) is type(pg.search_strategy)
+        if kwargs.get("search_strategy") == "least-visited":
+            assert pg2.search_strategy.visits == pg.search_strategy.visits
+            assert len(pg2.search_strategy) == len(pg2.active)
+        assert pg2.memory_budget == pg.memory_budget
+        assert all(path.spilled for path in pg2.deadended) == (pg.memory_budget is not None)
+
+        pg2.explore()
+        assert len(pg2.completed) == len(full.completed)
+        assert len(pg2.deadended) == len(full.deadended)
+        assert set(p.state.any_int('z') for p in pg2.completed) == set(p.state.any_int('z') for p in full.completed)
+
+    # explore saves on its own
+    b = ast_parse.parse(test5).body
+    pg = PathGroup(Path(b,source=test5),checkpoint=filename,checkpoint_interval=0)
+    pg.explore()
+    pg2 = PathGroup.load(filename)
+    assert str(pg2) == str(pg)
+    assert pg2.checkpoint == filename
+
+    with open(filename, "wb") as f:
+        f.write(b"nope")
+    with pytest.raises(Exception):
+        PathGroup.load(filename)
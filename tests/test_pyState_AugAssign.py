@@ -131,6 +131,13 @@ s = "test"
 s *= 3
 """
 
+test20 = """
+x = pyState.Int()
+c = x
+c += 1
+c += 1
+"""
+
 def test_pySym_AugAssign_MultString():
     b = ast_parse.parse(test19).body
     p = Path(b,source=test19)
@@ -226,6 +233,19 @@ def test_pySym_AugAssign_MultipleStates():
     assert set(rets) == set([1+x for x in range(10)])
 
 
+def test_pySym_AugAssign_Symbolic():
+    # Each update needs its own variable, otherwise the second one is c == c + 1
+    b = ast_parse.parse(test20).body
+    p = Path(b,source=test20)
+    pg = PathGroup(p)
+    pg.explore()
+
+    assert len(pg.completed) == 1
+    s = pg.completed[0].state
+    assert s.isSat(extra_constraints=[s.getVar('c').getZ3Object() == s.getVar('x').getZ3Object() + 2])
+    assert not s.isSat(extra_constraints=[s.getVar('c').getZ3Object() == s.getVar('x').getZ3Object() + 1])
+
+
 def test_pySym_AugAssign_Subscript():
     b = ast_parse.parse(test9).body
     p = Path(b,source=test9)
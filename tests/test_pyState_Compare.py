@@ -8,6 +8,7 @@ from pySym.pyPath import Path
 from pySym.pyState import Compare
 import pytest
 from pySym.pyPathGroup import PathGroup
+from pySym import Config
 
 compare1 = """
 x = {0}
@@ -57,6 +58,37 @@ def test_pySym_Compare_Symbolic_String():
 
 
 
+compare5 = """
+s = pyState.String(4)
+x = 0
+if "ab" {0} s:
+    x = 1
+"""
+
+def test_pySym_Compare_String_In():
+    # Static strings don't need the solver
+    source = '''x = 0\nif "b" in "abc":\n    x = 1\n'''
+    pg = PathGroup(Path(ast_parse.parse(source).body,source=source))
+    pg.explore()
+    assert [path.state.any_int('x') for path in pg.completed] == [1]
+
+    for mode in ["chars", "seq"]:
+        Config.PYSYM_STRING_SEARCH = mode
+        try:
+            for op in ["in", "not in"]:
+                source = compare5.format(op)
+                pg = PathGroup(Path(ast_parse.parse(source).body,source=source))
+                pg.explore()
+                assert len(pg.completed) == 2
+
+                for path in pg.completed:
+                    s = path.state.any_str('s')
+                    assert path.state.any_int('x') == int(("ab" in s) == (op == "in"))
+
+        finally:
+            Config.PYSYM_STRING_SEARCH = "chars"
+
+
 def test_pySym_Compare():
     ################
     # Greater Than #
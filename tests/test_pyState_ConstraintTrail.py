@@ -0,0 +1,275 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+import z3
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyState.ConstraintTrail import ConstraintTrail, TrailSolver, symbols, independent_slice
+
+test1 = """
+x = pyState.Int()
+if x > 5:
+    y = 1
+else:
+    y = 2
+"""
+
+def test_pyState_ConstraintTrail_sharing():
+    x = z3.Int('x')
+    root = ConstraintTrail()
+    a = root.append(x > 1, x < 10)
+    b = a.append(x == 3)
+    c = a.append(x == 4)
+
+    assert len(a) == 2
+    assert b.parent is a and c.parent is a
+    assert a.constraints() == [x > 1, x < 10]
+    assert b.constraints(stop=a) == [x == 3]
+    assert a.is_ancestor_of(b)
+    assert not b.is_ancestor_of(c)
+    assert b.ancestor(0) is root
+
+
+def test_pyState_ConstraintTrail_copy_on_write():
+    x = z3.Int('x')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5)
+    s2 = s.copy()
+    s2.add(x < 3)
+
+    assert len(s.assertions()) == 1
+    assert len(s2.assertions()) == 2
+    assert s.check() == z3.sat
+    assert s2.check() == z3.unsat
+    assert s.check() == z3.sat
+    assert s.model().eval(x).as_long() > 5
+
+    # Both checks went through the same z3 solver. The repeat came from the cache.
+    assert s._shared is s2._shared
+    assert s._shared.retargets == 2
+    assert s._shared.cache.hits == 1
+
+
+def test_pyState_ConstraintTrail_push_pop():
+    x = z3.Int('x')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5)
+    s.push()
+    s.add(x < 5)
+    assert s.check() == z3.unsat
+    s.pop()
+    assert s.check() == z3.sat
+    assert len(s.assertions()) == 1
+
+
+def test_pyState_ConstraintTrail_state_fork():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p)
+
+    pg.explore()
+
+    assert len(pg.completed) == 2
+    s1, s2 = [p.state for p in pg.completed]
+
+    # Siblings share the trail prefix from before the If
+    assert s1.solver.trail.parent is s2.solver.trail.parent
+    assert set(s.any_int('y') for s in [s1, s2]) == set([1,2])
+
+
+def test_pyState_ConstraintTrail_independent_slice():
+    x, y, z = z3.Ints('x y z')
+    constraints = [x > 1, y > 2, z == y, x < 10]
+    items = [(c, symbols(c)) for c in constraints]
+
+    assert independent_slice(items, symbols(x == 3)) == [x > 1, x < 10]
+    assert independent_slice(items, symbols(z == 4)) == [y > 2, z == y]
+    assert independent_slice(items, set()) == []
+
+
+def test_pyState_ConstraintTrail_check_slice():
+    x, y = z3.Ints('x y')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5, y < 0)
+
+    # First check covers the whole trail and marks it sat
+    assert s.check_slice() == z3.sat
+    assert s.trail.sat is True
+
+    # Only the x constraint should be needed here
+    assert s.check_slice([x == 7], focus=[x]) == z3.sat
+    assert s.model().eval(x).as_long() == 7
+    assert s._shared.sliced == 1
+    assert s.check_slice([x == 3]) == z3.unsat
+
+    # Unsat trails are remembered
+    s.add(y > 0)
+    assert s.check_slice() == z3.unsat
+    s.add(x == 8)
+    assert s.check_slice() == z3.unsat
+
+
+def test_pyState_ConstraintTrail_model_reuse():
+    x, y = z3.Ints('x y')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5, y < 0)
+    assert s.check() == z3.sat
+    m = s.model()
+    cache = s._shared.cache
+
+    # A fork whose new constraint the model already satisfies doesn't need z3
+    s2 = s.copy()
+    s2.add(x > m.eval(x).as_long() - 1)
+    assert s2.check_slice() == z3.sat
+    assert cache.model_hits == 1
+    assert s2.trail.sat is True
+
+    # Extra constraints are evaluated the same way
+    assert s2.check_slice([y != 5], focus=[y]) == z3.sat
+    assert cache.model_hits == 2
+
+    # Model doesn't work here, z3 has to answer
+    assert s2.check_slice([x == m.eval(x).as_long() + 10]) == z3.sat
+    assert cache.model_hits == 2
+
+
+def test_pyState_ConstraintTrail_is_unique():
+    x, y = z3.Ints('x y')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5, x < 7, y > 0)
+    assert s.is_unique(x)
+    assert not s.is_unique(y)
+
+    # Memoized answers survive constraints on other variables
+    s2 = s.copy()
+    s2.add(y < 10)
+    checks = s._shared.retargets + s._shared.sliced
+    assert s2.is_unique(x)
+    assert s._shared.retargets + s._shared.sliced == checks
+
+    # But not constraints on the same variable
+    s2.add(y < 2)
+    assert s2.is_unique(y)
+    assert not s.is_unique(y)
+
+    # Unsat trails have no unique values
+    s2.add(x == 3)
+    assert not s2.is_unique(x)
+
+    # Constraints on related variables count too
+    s3 = TrailSolver(factory=z3.Solver)
+    s3.add(x + y == 3)
+    assert not s3.is_unique(x)
+    s4 = s3.copy()
+    s4.add(y == 1)
+    assert s4.is_unique(x)
+
+
+test2 = """
+x = pyState.Int()
+y = pyState.Int()
+if x + y == 3:
+    if y == 1:
+        for i in range(x):
+            pass
+"""
+
+def test_pyState_ConstraintTrail_is_unique_related():
+    b = ast_parse.parse(test2).body
+    pg = PathGroup(Path(b,source=test2))
+    pg.explore()
+
+    assert len(pg.completed) == 3
+    assert len(pg.errored) == 0
+
+
+def test_pyState_ConstraintTrail_retractable():
+    x = z3.Int('x')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 5)
+    s.add_retractable(x < 3)
+    assert s.is_retractable(x < 3)
+    assert s.check_slice() == z3.unsat
+    assert s.trail.sat is False
+
+    # Retracting doesn't touch the trail, and the unsat answer isn't trusted anymore
+    trail = s.trail
+    s2 = s.copy()
+    assert s2.retract(x < 3) == 1
+    assert s2.trail is trail
+    assert s2.check_slice() == z3.sat
+    assert s2.check() == z3.sat
+    assert not s2.is_unique(x)
+
+    # The original still has it
+    assert s.check() == z3.unsat
+
+    # Turning it back on doesn't grow the trail
+    s2.add_retractable(x < 3)
+    assert s2.trail is trail
+    assert s2.check_slice() == z3.unsat
+
+
+def test_pyState_ConstraintTrail_join():
+    x = z3.Int('x')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 0)
+    a = s.copy()
+    a.add(x == 1)
+    b = s.copy()
+    b.add(x == 5, x < 10)
+
+    assert a.trail.common_ancestor(b.trail) is s.trail
+    assert ConstraintTrail().common_ancestor(a.trail) is None
+
+    m = z3.Bool('m')
+    j = a.join(b, m)
+    assert j.trail.parent.parent is s.trail
+    assert j.check(m) == z3.sat and j.model().eval(x).as_long() == 1
+    assert j.check(z3.Not(m)) == z3.sat and j.model().eval(x).as_long() == 5
+    assert j.check() == z3.sat
+    assert not j.is_unique(x)
+
+    # Different retractable constraints can't be joined
+    b.add_retractable(x < 7)
+    assert a.join(b, m) is None
+
+
+def test_pyState_ConstraintTrail_share():
+    x, y = z3.Ints('x y')
+    s = TrailSolver(factory=z3.Solver)
+    s.add(x > 0)
+    a = s.copy()
+    a.add(y > 10)
+    b = s.copy()
+    b.add(y > 5)
+    c = s.copy()
+    c.add(y < 0)
+
+    # Nothing to share before a full model is known
+    assert not a.share(b)
+
+    assert a.check_slice() == z3.sat
+    hits = s._shared.cache.model_hits
+
+    # Any model of y > 10 fits y > 5, so b is settled without z3
+    assert a.share(b)
+    assert b.trail.sat is True
+    assert s._shared.cache.model_hits == hits + 1
+
+    # But never y < 0
+    assert not a.share(c)
+    assert c.trail.sat is None
+    assert c.check_slice() == z3.sat
+
+    # Solvers from another family can't use the model
+    other = TrailSolver(factory=z3.Solver)
+    other.add(x > 0)
+    assert not a.share(other)
+    assert other.trail.sat is None
@@ -0,0 +1,112 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+import z3
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyState import Fingerprint
+
+test1 = """
+a = pyState.Int()
+c = 0
+if a > 0:
+    c = 1
+else:
+    c = 1
+z = c
+"""
+
+test2 = """
+s = pyState.String(3)
+x = 0
+while x < s.index('a'):
+    x += 1
+z = x
+"""
+
+test3 = """
+a = pyState.Int()
+x = 1
+y = 2
+z = 3
+"""
+
+
+def test_pyState_Fingerprint_fingerprint():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    p = p.step()[0].step()[0]
+    left, right = p.step()
+    left, right = left.step()[0], right.step()[0]
+
+    # Same line and the same version of c, but neither path condition covers the other
+    assert Fingerprint.fingerprint(left.state) == Fingerprint.fingerprint(right.state)
+    l, r = Fingerprint.constraint_set(left.state), Fingerprint.constraint_set(right.state)
+    assert not Fingerprint.redundant(left.state, l, right.state, r)
+    assert not Fingerprint.redundant(right.state, r, left.state, l)
+
+    # A copy with one more constraint only explores part of what the original does
+    stronger = left.state.copy()
+    stronger.addConstraint(stronger.getVar('a').getZ3Object() > 5)
+    s = Fingerprint.constraint_set(stronger)
+    assert Fingerprint.fingerprint(stronger) == Fingerprint.fingerprint(left.state)
+    assert Fingerprint.redundant(stronger, s, left.state, l)
+    assert not Fingerprint.redundant(left.state, l, stronger, s)
+    assert Fingerprint.redundant(left.state.copy(), l, left.state, l)
+
+    # Different bindings or line
+    assert Fingerprint.fingerprint(left.step()[0].state) != Fingerprint.fingerprint(left.state)
+    assert Fingerprint.fingerprint(p.state) != Fingerprint.fingerprint(left.state)
+
+
+def test_pyState_Fingerprint_PathGroup():
+    b = ast_parse.parse(test2).body
+    pg = PathGroup(Path(b,source=test2))
+    pg.explore()
+    assert pg.deduplicated == 0
+
+    b = ast_parse.parse(test2).body
+    pg2 = PathGroup(Path(b,source=test2),dedup=True)
+    pg2.explore()
+
+    # s.index forks once per place 'a' could be. Once the loop is done with them, those paths are all alike.
+    assert pg2.deduplicated > 0
+    assert len(pg2.completed) < len(pg.completed)
+    assert len(pg2.errored) == 0
+    assert set(p.state.any_int('z') for p in pg2.completed) == set(p.state.any_int('z') for p in pg.completed)
+
+    # Nothing is dropped when there's nothing alike
+    b = ast_parse.parse(test1).body
+    pg = PathGroup(Path(b,source=test1),dedup=True)
+    pg.explore()
+    assert pg.deduplicated == 0
+    assert len(pg.completed) == 2
+
+
+def test_pyState_Fingerprint_PathGroup_batch():
+    b = ast_parse.parse(test3).body
+    p = Path(b,source=test3).step()[0]
+
+    # One step ahead of p, and only part of what p will explore from there
+    ahead = p.step()[0]
+    ahead.state.addConstraint(ahead.state.getVar('a').getZ3Object() > 5)
+
+    pg = PathGroup(p,dedup=True)
+    pg.unstash(path=ahead,to_stash="active")
+    assert len(pg.active) == 2
+
+    # Both are stepped in the same batch. Stepping p drops ahead before ahead's own results come in.
+    pg.step()
+    assert pg.deduplicated == 1
+    assert len(pg.active) == 1
+    assert len(pg.errored) == 0
+
+    pg.explore()
+    assert len(pg.completed) == 1
+    assert pg.completed[0].state.any_int('z') == 3
@@ -0,0 +1,204 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse, Config
+import z3
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyState import Merge
+
+test1 = """
+a = pyState.Int()
+b = pyState.Int()
+d = pyState.Int()
+c = 0
+if a > 0:
+    c += 1
+if b > 0:
+    c += 2
+else:
+    c -= 1
+if d > 0:
+    c += 4
+for i in range(3):
+    if d > i:
+        c += 1
+z = c
+"""
+
+test2 = """
+a = pyState.Int()
+if a > 0:
+    c = 1
+else:
+    c = 2
+if c == 1:
+    z = 5
+else:
+    z = 6
+"""
+
+test3 = """
+a = pyState.Int()
+if a > 0:
+    c = 1
+    e = 3
+z = 1
+"""
+
+test4 = """
+a = pyState.Int()
+c = 0
+if a > 0:
+    c = 1
+    z = c
+q = c
+"""
+
+test5 = """
+a = pyState.Int()
+c = 0
+if a > 0:
+    c = 5
+z = c
+"""
+
+test6 = """
+a = pyState.Int()
+c = 1
+if a > 0:
+    c += 2
+else:
+    c += 3
+c += 1
+z = c
+"""
+
+
+def explore(source, merge, find=None):
+    Config.PYSYM_MERGE = merge
+    try:
+        b = ast_parse.parse(source).body
+        pg = PathGroup(Path(b,source=source))
+        found = pg.explore(find=find)
+    finally:
+        Config.PYSYM_MERGE = None
+    return pg, found
+
+
+def values(pg, var):
+    out = set()
+    for path in pg.completed:
+        out |= set(path.state.any_n_int(path.state.getVar(var), 50))
+    return out
+
+
+def test_pyState_Merge_off():
+    pg, _ = explore(test1, None)
+    assert len(pg.completed) > 8
+
+
+def test_pyState_Merge_always():
+    forked, _ = explore(test1, None)
+    merged, _ = explore(test1, "always")
+
+    assert len(merged.completed) == 1
+    assert len(merged.errored) == 0
+    assert values(merged, 'z') == values(forked, 'z')
+
+    # Only the variables that differ get a new version
+    s = merged.completed[0].state
+    assert any("pySym!merge!" in str(c) for c in s.solver.assertions())
+
+
+def test_pyState_Merge_qce():
+    # c decides the next If. Merging would make it symbolic.
+    pg, _ = explore(test2, "qce")
+    assert len(pg.completed) == 2
+    assert set(p.state.any_int('z') for p in pg.completed) == set([5, 6])
+
+    pg, _ = explore(test2, "always")
+    assert len(pg.completed) == 1
+    assert values(pg, 'z') == set([5, 6])
+
+    # Nothing later reads c here
+    pg, _ = explore(test1, "qce")
+    assert len(pg.completed) == 1
+
+
+def test_pyState_Merge_unmergeable():
+    # e only exists on one side
+    pg, _ = explore(test3, "always")
+    assert len(pg.completed) == 2
+
+
+def test_pyState_Merge_find():
+    # Paths have to stop on line 6 to find it, so that branch isn't merged
+    pg, found = explore(test4, "always", find=6)
+    assert found
+    assert pg.found[0].state.any_int('c') == 1
+
+
+def test_pyState_Merge_same_point():
+    b = ast_parse.parse(test2).body
+    p = Path(b,source=test2)
+    p = p.step()[0]
+    left, right = p.step()
+    left = left.step()[0]
+    right = right.step()[0]
+
+    # Both sides are now on line 7
+    assert Merge.same_point(left.state, right.state)
+    assert not Merge.same_point(left.state, p.state)
+    assert Merge.merge(left.state, p.state) is None
+
+    merged = Merge.merge(left.state, right.state)
+    assert merged.isSat()
+    assert set(merged.any_n_int(merged.getVar('c'), 5)) == set([1, 2])
+
+    # Only constraints that are really on the merged trail are indexed. The branch's own "a > 0" isn't.
+    trail = set(c.get_id() for c in merged.solver.trail.constraints())
+    for var in [merged.getVar('a'), merged.getVar('c')]:
+        indexed = merged._vars_in_solver.constraints(var.getZ3Object())
+        assert len(indexed) > 0
+        assert all(c in trail for c, _ in indexed.items())
+
+    # Inputs are left alone
+    assert left.state.any_int('c') == 1
+    assert right.state.any_int('c') == 2
+
+    # counts say c is read by an upcoming condition
+    assert Merge.query_counts(left.state)['c'] == 1
+    assert Merge.merge(left.state, right.state, Merge.query_counts(left.state)) is None
+
+
+def test_pyState_Merge_one_branch():
+    # c is only assigned when a > 0. The other side keeps the c from before the If.
+    pg, _ = explore(test5, "always")
+    assert len(pg.completed) == 1
+    assert values(pg, 'z') == set([0, 5])
+
+    s = pg.completed[0].state
+    a, z = s.getVar('a').getZ3Object(), s.getVar('z').getZ3Object()
+    assert not s.isSat(extra_constraints=[a > 0, z == 0])
+    assert not s.isSat(extra_constraints=[a <= 0, z == 5])
+
+
+def test_pyState_Merge_augassign():
+    # Both branches AugAssign c, and it's AugAssigned again after the merge
+    forked, _ = explore(test6, None)
+    merged, _ = explore(test6, "always")
+    assert len(forked.completed) == 2
+    assert len(merged.completed) == 1
+    assert len(merged.errored) == 0
+    assert values(merged, 'z') == values(forked, 'z') == set([4, 5])
+
+    s = merged.completed[0].state
+    a, z = s.getVar('a').getZ3Object(), s.getVar('z').getZ3Object()
+    assert not s.isSat(extra_constraints=[a > 0, z == 5])
+    assert not s.isSat(extra_constraints=[a <= 0, z == 4])
@@ -0,0 +1,94 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import logging
+from pySym import Colorer
+logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+from pySym import ast_parse
+import z3
+from pySym.pyPath import Path
+from pySym.pyPathGroup import PathGroup
+from pySym.pyState.QueryCache import QueryCache
+
+test1 = """
+x = pyState.Int()
+y = 0
+while y < 4:
+    if x > y:
+        y += 1
+    else:
+        y += 2
+"""
+
+def test_pyState_QueryCache_exact():
+    x = z3.Int('x')
+    c = QueryCache()
+    assert c.lookup([x > 1]) is None
+    assert c.misses == 1
+
+    s = z3.Solver()
+    s.add(x > 1)
+    assert s.check() == z3.sat
+    c.insert([x > 1], z3.sat, s.model())
+
+    # Rebuilding the same constraint hits thanks to z3 hash consing
+    ret, model = c.lookup([z3.Int('x') > 1])
+    assert ret == z3.sat
+    assert model.eval(x).as_long() > 1
+    assert c.hits == 1
+
+
+def test_pyState_QueryCache_subset_superset():
+    x, y = z3.Ints('x y')
+    c = QueryCache()
+
+    s = z3.Solver()
+    s.add(x > 1, y > 1)
+    assert s.check() == z3.sat
+    c.insert([x > 1, y > 1], z3.sat, s.model())
+    c.insert([x > 1, x < 0], z3.unsat)
+
+    # Sat superset answers a subset
+    ret, model = c.lookup([y > 1])
+    assert ret == z3.sat
+    assert model.eval(y).as_long() > 1
+
+    # Unsat subset answers a superset
+    assert c.lookup([x > 1, x < 0, y == 3]) == (z3.unsat, None)
+
+    # Nothing known about this one
+    assert c.lookup([x > 1, y < 0]) is None
+    assert c.hits == 2
+    assert c.misses == 1
+
+
+def test_pyState_QueryCache_lru():
+    x = z3.Int('x')
+    c = QueryCache(max_size=2)
+    c.insert([x == 1, x == 2], z3.unsat)
+    c.insert([x == 3, x == 4], z3.unsat)
+    # Touch the first one so the second gets evicted
+    assert c.lookup([x == 1, x == 2]) is not None
+    c.insert([x == 5, x == 6], z3.unsat)
+
+    assert len(c) == 2
+    assert c.lookup([x == 3, x == 4]) is None
+    assert c.lookup([x == 1, x == 2]) is not None
+
+
+def test_pyState_QueryCache_pathgroup():
+    b = ast_parse.parse(test1).body
+    p = Path(b,source=test1)
+    pg = PathGroup(p,query_cache_size=128)
+
+    pg.explore()
+
+    assert len(pg.completed) > 1
+    # Everything shared the group cache
+    assert all(p.state.solver._shared.cache is pg.query_cache for p in pg.completed)
+    assert pg.query_cache.hits + pg.query_cache.misses > 0
+    # Forks mostly get answered from the model they inherited
+    assert pg.query_cache.model_hits > 0
+    assert len(pg.query_cache) <= 128
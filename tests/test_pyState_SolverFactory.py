@@ -0,0 +1,101 @@
+import sys, os
+myPath = os.path.dirname(os.path.abspath(__file__))
+#sys.path.insert(0, myPath + '/../')
+
+import z3
+import pytest
+import pySym
+from pySym.pyState.SolverFactory import SolverFactory, classify, features
+from pySym.pyState.ConstraintTrail import TrailSolver, SolverUnknown
+
+
+def test_pyState_SolverFactory_classify():
+    x, y = z3.Ints('x y')
+    r = z3.Real('r')
+    b = z3.BitVec('b', 32)
+
+    assert classify([x + 2*y > 3, x % 4 == 1]) == "lia"
+    assert classify([r / 2 > 1]) == "lra"
+    assert classify([b * b == 9]) == "bv"
+    assert classify([z3.Bool('a')]) == "bool"
+    assert classify([x * y == 6]) == "nonlinear"
+    assert classify([x / y == 6]) == "nonlinear"
+    assert classify([x > 1, r > 1]) == "mixed"
+    assert classify([z3.BV2Int(b) > x]) == "mixed"
+
+    # Sub-expressions are classified once and remembered
+    e = x * y + 1 > 3
+    assert features(e) is features(e)
+    assert "nonlinear" in features(e)
+
+
+def test_pyState_SolverFactory_cached_tactic():
+    factory = SolverFactory()
+    assert factory.mode == "tactic"
+    assert factory.tactic is factory.tactic
+    assert factory().check() == z3.sat
+
+    proj = pySym.Project(os.path.join(myPath, "scripts", "basic_function.py"))
+    pg = proj.factory.path_group()
+    assert isinstance(proj.solver_factory, SolverFactory)
+    pg.explore()
+    assert len(pg.completed) == 1
+
+
+def test_pyState_SolverFactory_logic_mode():
+    x, y = z3.Ints('x y')
+    factory = SolverFactory(mode="logic")
+    s = TrailSolver(factory=factory)
+    shared = s._shared
+
+    s.add(x > 1)
+    assert s.check() == z3.sat
+    assert shared.query_class == "lia"
+    first = shared.solver
+
+    # Same logic keeps the incremental solver
+    s.add(x < 10)
+    assert s.check() == z3.sat
+    assert shared.solver is first
+
+    # Going nonlinear needs the tactics
+    s.add(x * y == 12)
+    assert s.check() == z3.sat
+    assert shared.query_class == "nonlinear"
+    assert shared.solver is not first
+    m = s.model()
+    assert m.eval(x * y).as_long() == 12
+
+    # Every check shows up in the stats
+    assert factory.stats["lia"][0] == 2
+    assert factory.stats["nonlinear"][0] == 1
+    assert "nonlinear" in str(factory.stats_table())
+
+
+def test_pyState_SolverFactory_timeout():
+    x, y = z3.Ints('x y')
+    hard = [x > 1, y > 1, x * y == 1000000016000000063 * 1000000007]
+
+    # The time limit belongs to the solver. z3 says unknown instead of running on.
+    for mode in ["tactic", "logic"]:
+        factory = SolverFactory(mode=mode, routes={"nonlinear": "QF_NIA"})
+        solver = factory("nonlinear", timeout=200)
+        solver.add(*hard)
+        assert solver.check() == z3.unknown
+
+        # Other solvers have no limit
+        other = factory("nonlinear")
+        other.add(x * y == 6, x > 1, y > 1)
+        assert other.check() == z3.sat
+
+    s = TrailSolver(factory=SolverFactory(), timeout=200)
+    s.add(*hard)
+    with pytest.raises(SolverUnknown):
+        s.check()
+    assert s.time >= 0.2
+
+    # Dropping the limit gets a solver without one
+    t = TrailSolver(shared=s._shared)
+    t.add(x * y == 6, x > 1, y > 1)
+    assert t.check() == z3.sat
+    assert s._shared.timeout is None
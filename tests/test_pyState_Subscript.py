@@ -6,7 +6,7 @@ import logging
 from pySym import Colorer
 logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
 
-from pySym import ast_parse
+from pySym import ast_parse, Config
 import z3
 from pySym.pyPath import Path
 from pySym.pyPathGroup import PathGroup
@@ -149,6 +149,92 @@ def test_pyState_Subscript_symbolic_index():
     assert len(pg.completed) == 1
 
 
+test15 = """
+l = [1,2,3,4,5]
+i = pyState.Int()
+x = l[i]
+l[i] = 10
+y = l[2]
+s = "abcde"
+c = s[i]
+"""
+
+def test_pyState_Subscript_symbolic_array():
+    Config.PYSYM_SYMBOLIC_LIST_ARRAYS = True
+    try:
+        b = ast_parse.parse(test15).body
+        p = Path(b,source=test15)
+        pg = PathGroup(p)
+        pg.explore()
+    finally:
+        Config.PYSYM_SYMBOLIC_LIST_ARRAYS = False
+
+    # No splitting for reads or writes
+    assert len(pg.completed) == 1
+    s = pg.completed[0].state
+
+    assert set(s.any_n_int('x', 10)) == set([1,2,3,4,5])
+    assert set(s.any_n_int('y', 10)) == set([3,10])
+    assert set(s.any_n_int('i', 10)) == set([0,1,2,3,4])
+
+    # The write went where the read came from
+    s.addConstraint(s.getVar('i').getZ3Object() == 2)
+    assert s.any_int('y') == 10
+    assert s.any_int('x') == 3
+    assert s.any_str('c') == "c"
+
+    # Mixed types still split
+    Config.PYSYM_SYMBOLIC_LIST_ARRAYS = True
+    try:
+        b = ast_parse.parse(test12).body
+        pg = PathGroup(Path(b,source=test12))
+        pg.explore()
+    finally:
+        Config.PYSYM_SYMBOLIC_LIST_ARRAYS = False
+
+    assert len(pg.completed) == 5
+
+
+test16 = """
+l = [1,2,3]
+i = pyState.Int()
+x = l[i]
+y = l[i]
+l[i+0] = 5
+"""
+
+def test_pyState_Subscript_symbolic_array_reuse():
+    Config.PYSYM_SYMBOLIC_LIST_ARRAYS = True
+    try:
+        b = ast_parse.parse(test16).body
+        pg = PathGroup(Path(b,source=test16))
+        pg.explore(find=6)
+    finally:
+        Config.PYSYM_SYMBOLIC_LIST_ARRAYS = False
+
+    # Both reads went through the one Array the List kept
+    s = pg.found[0].state
+    l = s.getVar('l')
+    values, array = l.array
+    assert [value.get_id() for value in values] == [var.getZ3Object().get_id() for var in l]
+    assert set(s.any_n_int('x', 10)) == set([1,2,3])
+
+    # Only plain names are stored as an Array. Anything else goes the normal way.
+    pg = PathGroup(Path(b,source=test16))
+    pg.explore()
+    normal = len(pg.completed)
+
+    Config.PYSYM_SYMBOLIC_LIST_ARRAYS = True
+    try:
+        pg = PathGroup(Path(b,source=test16))
+        pg.explore()
+    finally:
+        Config.PYSYM_SYMBOLIC_LIST_ARRAYS = False
+
+    assert len(pg.errored) == 0
+    assert len(pg.completed) == normal
+
+
 def test_pyState_nestedSlice():
     b = ast_parse.parse(test11).body
     p = Path(b,source=test11)
@@ -187,6 +187,25 @@ def test_var_used_in_z3_ignore():
     assert not s.var_in_solver(z3_obj, ignore=[z3_obj > 3])
     assert not s.var_in_solver(z3_obj, ignore=z3_obj > 3)
 
+def test_var_in_solver_fork():
+    b = ast_parse.parse(test4).body
+    p = Path(b,source=test4)
+    pg = PathGroup(p)
+
+    pg.explore()
+
+    s = pg.completed[0].state
+    x = s.getVar('x').getZ3Object()
+    s.addConstraint(x > 3)
+
+    # Forks share the index until one of them changes it
+    s2 = s.copy()
+    assert s2._vars_in_solver is s._vars_in_solver
+
+    s2.remove_constraints(x > 3)
+    assert not s2.var_in_solver(x)
+    assert s.var_in_solver(x)
+
 def test_remove_constraints():
     b = ast_parse.parse(test10).body
     p = Path(b,source=test10)
@@ -334,6 +353,28 @@ def test_any_n_int():
     assert len(pg.completed[0].state.any_n_int('x',10)) == 10
 
 
+def test_is_unique():
+    b = ast_parse.parse(test4).body
+    p = Path(b,source=test4)
+    pg = PathGroup(p)
+
+    pg.explore()
+
+    assert len(pg.completed) == 1
+    s = pg.completed[0].state
+    x = s.getVar('x')
+
+    assert not s.is_unique('x')
+    assert not x.isStatic()
+    assert s.is_unique(5)
+
+    s.addConstraint(x.getZ3Object() > 3, x.getZ3Object() < 5)
+    assert s.is_unique(x)
+    assert x.isStatic()
+    assert x.getValue() == 4
+    assert x.mustBe(4)
+
+
 def test_assignInt():
     b = ast_parse.parse(test1).body
     p = Path(b,source=test1)